@@ -14,6 +14,8 @@ import os
 import re
 
 import boto3
+import sources
+from claimcheck import hydrate, offload
 from renderers import _escape_xml
 from renderers.architecture import render_architecture_diagram
 from renderers.bar import render_bar_chart
@@ -42,14 +44,15 @@ def handler(event, context):
         "description": "...",
         "markdown": "complete markdown with <!-- CHART: ... --> placeholders",
         "date": "YYYY-MM-DD",
-        "research": "research notes containing data_points section"
+        "sources_key": "the Research sources index (common/sources.py)",
+        "research": "optional — research notes, parsed only when there is no sources index"
     }
 
     Output: same as input but with chart placeholders replaced by image references,
     plus a "charts" array listing generated chart paths.
     """
+    event = hydrate(event)
     markdown = event.get("markdown", "")
-    research = event.get("research", "")
     slug = event.get("slug", "untitled")
     date = event.get("date", "")
 
@@ -63,9 +66,16 @@ def handler(event, context):
 
     logger.info("Found %d chart placeholder(s) and %d diagram placeholder(s) in markdown", len(chart_matches), len(diagram_matches))
 
-    # Also extract structured data points from research
-    data_points = _extract_data_points(research)
-    logger.info("Extracted %d data point(s) from research", len(data_points))
+    # Structured data points come from the Research sources index; the research text is
+    # only parsed when there is no index (direct invocation, S3 outage) and there are
+    # chart placeholders to fill.
+    index = sources.load(event.get("sources_key", ""))
+    if index is None and chart_matches:
+        logger.warning("Sources index %r unavailable — parsing data points from research",
+                       event.get("sources_key", ""))
+    data_points = (index.data_points if index is not None
+                   else sources.parse_data_points(event.get("research", "")) if chart_matches else [])
+    logger.info("Loaded %d data point(s) from %s", len(data_points), "sources index" if index is not None else "research")
     for dp in data_points:
         logger.info("  Data point: %s — values: %s — type: %s", dp.get('description', '?'), dp.get('values', []), dp.get('chart_type', '?'))
 
@@ -207,86 +217,13 @@ def handler(event, context):
     prior_filenames = {c.get("filename") for c in prior_charts}
     merged_charts = prior_charts + [c for c in charts_generated if c.get("filename") not in prior_filenames]
 
-    result = {k: v for k, v in event.items()}
+    # items() yields pointers as they arrived, so fields this pass never read stay offloaded
+    # research is only an input (the sources index fallback); it is not passed on.
+    result = {k: v for k, v in event.items() if k != "research"}
     result["markdown"] = updated_markdown
     result["charts"] = merged_charts
 
-    return result
-
-
-def _extract_data_points(research):
-    """
-    Extract structured data points from research notes.
-    Looks for the format:
-      - Data point: [description]
-      - Values: [label: value, label: value, ...]
-      - Source: [citation]
-      - Chart type: [bar|line|pie|comparison]
-    """
-    data_points = []
-    current = {}
-
-    for line in research.split("\n"):
-        line = line.strip()
-        line_lower = line.lower()
-
-        # Support ### headings as data point section markers
-        if line_lower.startswith("###") and current.get("description"):
-            # A new ### heading after we already have a data point means new section
-            if current:
-                data_points.append(current)
-            current = {}
-
-        if line_lower.startswith("- data point:") or line_lower.startswith("data point:"):
-            if current and current.get("description"):
-                data_points.append(current)
-            current = {"description": line.split(":", 1)[1].strip()}
-        elif line_lower.startswith("- values:") or line_lower.startswith("values:"):
-            # Values line may have multiple colons (e.g., "Values: 2021: 45%, 2022: 75%")
-            # Split only on the FIRST colon after "Values"
-            values_str = line.split(":", 1)[1].strip()
-            current["values"] = _parse_values(values_str)
-        elif line_lower.startswith("- source:") or line_lower.startswith("source:"):
-            current["source"] = line.split(":", 1)[1].strip()
-        elif line_lower.startswith("- chart type:") or line_lower.startswith("chart type:"):
-            current["chart_type"] = line.split(":", 1)[1].strip().lower()
-
-    if current and current.get("description"):
-        data_points.append(current)
-
-    return data_points
-
-
-def _parse_values(values_str):
-    """Parse 'label: value, label: value' into list of (label, value) tuples.
-    Handles formats like:
-      - "Label1: 45%, Label2: 30%"
-      - "2021: 45%, 2022: 75%, 2023: 82%"
-      - "Manual: 6.5hrs, Automated: 1.8hrs"
-      - "60, 40" (bare numbers — labels generated as Item 1, Item 2)
-    """
-    pairs = []
-    # Split on comma followed by optional space — handles both alpha and numeric labels
-    for pair in re.split(r",\s*", values_str):
-        if ":" in pair:
-            label, val = pair.split(":", 1)
-            label = label.strip()
-            # Strip common suffixes: %, hrs, h, ms, s, x
-            val = val.strip()
-            val = re.sub(r'(hrs|hr|h|ms|s|x|%|\$)$', '', val, flags=re.IGNORECASE).strip()
-            try:
-                pairs.append((label, float(val)))
-            except ValueError:
-                continue
-        else:
-            # Bare number without a label — try to parse it
-            val = pair.strip()
-            val = re.sub(r'(hrs|hr|h|ms|s|x|%|\$)$', '', val, flags=re.IGNORECASE).strip()
-            try:
-                pairs.append((f"Item {len(pairs) + 1}", float(val)))
-            except ValueError:
-                continue
-    return pairs
+    return offload(result)
 
 
 def _match_data_point(chart_desc, data_points):
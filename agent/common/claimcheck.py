@@ -0,0 +1,132 @@
+"""Claim-check layer for Step Functions payloads.
+
+Every stage used to pass ``research``, ``markdown`` and ``author_content`` inline
+through the state machine. On long posts that is close to the 256 KB state limit,
+and every Lambda serializes and deserializes text it may never read. Handlers now
+wrap their output with ``offload`` and their input with ``hydrate``:
+
+  * ``offload(result)`` replaces each top-level string above
+    ``CLAIM_CHECK_THRESHOLD_BYTES`` (default 8 KB, UTF-8) with a pointer
+    ``{"claim_check": "claims/<sha256>.txt", "bytes": N}``, writing the text to the
+    drafts bucket. Keys are content-addressed, so an unchanged field that flows
+    through several stages is stored once, and a pointer that was never read
+    passes through untouched.
+  * ``hydrate(event)`` returns the event as a ``ClaimCheckEvent``: a dict that
+    fetches a pointer's text on first access (``event["markdown"]``,
+    ``event.get("markdown")``) and keeps it. Fields the handler never touches are
+    never fetched, and ``{**event}`` copies pointers as they are.
+
+Step Functions only moves the pointers; ``Parameters`` paths such as
+``$.draft_output.markdown`` select them like any other value.
+
+Vendored into each Lambda package via ``.common-deps`` (see ``llm.py``); boto3 and
+the standard library only. An offload that cannot be written leaves the field
+inline (the pre-claim-check behaviour); a pointer that cannot be read raises,
+since the stage cannot run without its input. ``CLAIM_CHECK=0`` stops offloading;
+pointers already in flight still hydrate.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import boto3
+
+logger = logging.getLogger()
+
+_ENABLED = os.environ.get("CLAIM_CHECK", "1") != "0"
+_BUCKET = os.environ.get("DRAFTS_BUCKET", "")
+_PREFIX = "claims/"
+_THRESHOLD_BYTES = int(os.environ.get("CLAIM_CHECK_THRESHOLD_BYTES", "8192"))
+_MEMORY_ENTRIES = 32
+
+_memory = OrderedDict()  # key -> text, for pointers this container has read or written
+_lock = threading.Lock()
+_s3 = None
+
+
+def _get_s3():
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client("s3", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+    return _s3
+
+
+def _remember(key, text):
+    with _lock:
+        _memory[key] = text
+        _memory.move_to_end(key)
+        while len(_memory) > _MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def is_pointer(value):
+    return isinstance(value, dict) and isinstance(value.get("claim_check"), str)
+
+
+def fetch(value):
+    """The text behind a pointer (any other value is returned as is)."""
+    if not is_pointer(value):
+        return value
+    key = value["claim_check"]
+    with _lock:
+        if key in _memory:
+            return _memory[key]
+    obj = _get_s3().get_object(Bucket=_BUCKET, Key=key)
+    text = obj["Body"].read().decode("utf-8")
+    _remember(key, text)
+    return text
+
+
+def _store(text):
+    data = text.encode("utf-8")
+    key = f"{_PREFIX}{hashlib.sha256(data).hexdigest()}.txt"
+    with _lock:
+        known = key in _memory
+    if not known:
+        _get_s3().put_object(Bucket=_BUCKET, Key=key, Body=data, ContentType="text/plain; charset=utf-8")
+        _remember(key, text)
+    return {"claim_check": key, "bytes": len(data)}
+
+
+def offload(result):
+    """``result`` with every top-level string above the threshold replaced by a pointer."""
+    if not (_ENABLED and _BUCKET):
+        return result
+    out = dict(result)
+    offloaded = {}
+    for name, value in result.items():
+        if not isinstance(value, str) or len(value.encode("utf-8")) <= _THRESHOLD_BYTES:
+            continue
+        try:
+            out[name] = _store(value)
+            offloaded[name] = out[name]["bytes"]
+        except Exception as e:
+            logger.warning(json.dumps({"event": "claim_check_offload_failed", "field": name, "error": str(e)[:200]}))
+    if offloaded:
+        logger.info(json.dumps({"event": "claim_check_offloaded", "fields": offloaded}))
+    return out
+
+
+class ClaimCheckEvent(dict):
+    """A handler event whose pointer fields hydrate on first access."""
+
+    def __getitem__(self, name):
+        value = super().__getitem__(name)
+        if is_pointer(value):
+            value = fetch(value)
+            super().__setitem__(name, value)
+        return value
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
+def hydrate(event):
+    return event if isinstance(event, ClaimCheckEvent) else ClaimCheckEvent(event or {})
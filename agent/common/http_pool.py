@@ -0,0 +1,252 @@
+"""Pooled keep-alive HTTP client for the Blog Agent Lambdas.
+
+Research and Verify talk to the same few hosts over and over in one run — every
+Tavily query goes to api.tavily.com, every Perplexity query to api.perplexity.ai,
+and link checking often hits several pages on one documentation site. With
+``urllib.request.urlopen`` each of those calls paid a fresh TCP connect and TLS
+handshake. This module keeps idle HTTP/1.1 connections per (scheme, host, port)
+and reuses them, so only the first request to a host pays the handshake.
+
+  * ``request(method, url, ...)`` returns a ``Response`` whose ``read(n)`` can
+    stop early (e.g. the first 4KB of a page) — a partially-read connection is
+    closed instead of being returned to the pool.
+  * ``Accept-Encoding: gzip`` is sent by default and gzip/deflate bodies are
+    decoded incrementally, so ``read(n)`` counts decoded bytes.
+  * Redirects are followed (up to ``max_redirects``), the way urlopen did.
+  * Every request takes its own ``timeout`` (connect and per-socket-read).
+  * HTTP error statuses are returned, not raised; call ``raise_for_status()``
+    to get an ``HTTPError`` carrying ``.status``.
+
+A pooled connection that the server closed while idle (common across a warm
+Lambda container's freeze/thaw) is detected on first use and the request is
+retried once on a fresh connection.
+
+This module is VENDORED into each Lambda deployment package at build time by
+``scripts/package-lambda.sh`` (driven by the function's ``.common-deps`` file):
+
+    from http_pool import request
+
+Like ``llm.py`` it is self-contained — standard library only, no sibling imports.
+"""
+
+import http.client
+import json
+import logging
+import ssl
+import threading
+import time
+import urllib.parse
+import zlib
+
+logger = logging.getLogger()
+
+# Idle connections kept per (scheme, host, port). Research fans out up to 8
+# threads at a single host, so a smaller pool would just churn handshakes.
+_MAX_IDLE_PER_HOST = 8
+# Idle connections older than this are discarded rather than reused — most
+# servers drop keep-alive connections after 5-60s anyway.
+_IDLE_TTL_SECONDS = 30
+_READ_CHUNK = 16384
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError,
+                 BrokenPipeError, ConnectionAbortedError)
+
+_ssl_context = ssl.create_default_context()
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+class HTTPError(Exception):
+    """Raised by ``Response.raise_for_status`` for 4xx/5xx responses."""
+
+    def __init__(self, status, url, reason=""):
+        super().__init__(f"HTTP {status} {reason} for {url[:120]}".strip())
+        self.status = status
+        self.url = url
+
+
+def _pool_key(parts):
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return parts.scheme, parts.hostname, port
+
+
+def _checkout(key, timeout):
+    """Return (connection, reused) — an idle pooled connection if one is fresh."""
+    now = time.monotonic()
+    with _pool_lock:
+        idle = _pool.get(key, [])
+        while idle:
+            conn, released_at = idle.pop()
+            if now - released_at <= _IDLE_TTL_SECONDS:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            conn.close()
+    scheme, host, port = key
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, port, timeout=timeout, context=_ssl_context), False
+    return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+
+def _checkin(key, conn):
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < _MAX_IDLE_PER_HOST:
+            idle.append((conn, time.monotonic()))
+            return
+    conn.close()
+
+
+def close_all():
+    """Close every pooled connection (tests; never needed in the handlers)."""
+    with _pool_lock:
+        for idle in _pool.values():
+            for conn, _ in idle:
+                conn.close()
+        _pool.clear()
+
+
+class Response:
+    """A response body bound to its (possibly pooled) connection.
+
+    Use as a context manager or call ``close()``: a fully-read body hands the
+    connection back to the pool, anything else closes it."""
+
+    def __init__(self, raw, conn, key, url):
+        self._raw = raw
+        self._conn = conn
+        self._key = key
+        self.url = url
+        self.status = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers
+        encoding = (raw.getheader("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._decoder = zlib.decompressobj()
+        else:
+            self._decoder = None
+        self._buffer = b""
+        self._released = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def getcode(self):
+        return self.status
+
+    def read(self, amt=None):
+        """Read up to ``amt`` decoded bytes (everything when ``amt`` is None)."""
+        if self._decoder is None:
+            data = self._raw.read() if amt is None else self._raw.read(amt)
+        else:
+            while (amt is None or len(self._buffer) < amt) and not self._raw.isclosed():
+                chunk = self._raw.read(_READ_CHUNK)
+                if not chunk:
+                    self._buffer += self._decoder.flush()
+                    break
+                self._buffer += self._decoder.decompress(chunk)
+            if amt is None:
+                data, self._buffer = self._buffer, b""
+            else:
+                data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        if self._raw.isclosed():
+            self.close()
+        return data
+
+    def text(self, amt=None, errors="ignore"):
+        data = self.read(amt)
+        charset = self.headers.get_content_charset() or "utf-8"
+        try:
+            return data.decode(charset, errors=errors)
+        except LookupError:
+            return data.decode("utf-8", errors=errors)
+
+    def json(self):
+        return json.loads(self.read().decode("utf-8"))
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            self.close()
+            raise HTTPError(self.status, self.url, self.reason)
+        return self
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        if not self._raw.isclosed() and self._raw.length == 0:
+            self._raw.read()  # HEAD / 204 / 304: no body, but the response must be finalised
+        if self._raw.isclosed() and not self._raw.will_close:
+            _checkin(self._key, self._conn)
+        else:
+            self._conn.close()
+
+
+def _send(method, parts, headers, body, timeout):
+    key = _pool_key(parts)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    for attempt in (0, 1):
+        conn, reused = _checkout(key, timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            return conn, key, conn.getresponse()
+        except _STALE_ERRORS:
+            conn.close()
+            if not reused or attempt:
+                raise
+            logger.info(json.dumps({"event": "http_pool_stale_retry", "host": parts.hostname}))
+        except Exception:
+            conn.close()
+            raise
+
+
+def request(method, url, *, headers=None, body=None, timeout=10, max_redirects=5):
+    """Issue one HTTP request over a pooled keep-alive connection.
+
+    ``body`` may be bytes, str, or a dict/list (sent as JSON with the matching
+    Content-Type). Returns a ``Response``; the caller must read or close it."""
+    send_headers = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+    send_headers.update(headers or {})
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode("utf-8")
+        send_headers.setdefault("Content-Type", "application/json")
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+
+    for _ in range(max_redirects + 1):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported URL: {url[:120]}")
+        conn, key, raw = _send(method, parts, send_headers, body, timeout)
+        resp = Response(raw, conn, key, url)
+        location = raw.getheader("Location")
+        if raw.status not in _REDIRECT_STATUSES or not location:
+            return resp
+        # Redirect bodies are tiny; draining them keeps the connection poolable.
+        if method != "HEAD":
+            resp.read(64 * 1024)
+        resp.close()
+        url = urllib.parse.urljoin(url, location)
+        if raw.status == 303 or (raw.status in (301, 302) and method == "POST"):
+            method, body = "GET", None
+            send_headers.pop("Content-Type", None)
+    raise HTTPError(raw.status, url, "too many redirects")
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post_json(url, payload, *, headers=None, timeout=10):
+    """POST ``payload`` as JSON and return the decoded JSON reply (raises
+    ``HTTPError`` on a 4xx/5xx status)."""
+    with request("POST", url, headers=headers, body=payload, timeout=timeout) as resp:
+        return resp.raise_for_status().json()
@@ -4,8 +4,16 @@ Single source of truth for the bits that were previously copy-pasted (and had
 already drifted) between the Research and Draft handlers:
 
   * the configured ``bedrock-runtime`` client,
-  * the plain ``invoke_model`` text-generation call,
+  * the plain ``invoke_model`` text-generation call, including structured
+    system/content blocks with prompt-cache breakpoints (``text_block``),
+  * the streaming ``stream_model`` / ``invoke_model_stream`` variants, which
+    surface text deltas as they arrive and can checkpoint partial output,
   * the Opus -> Sonnet fallback wrapper used by the two heavy creative passes,
+  * the content-addressed response cache that lets deterministic
+    (temperature-0) passes replay instantly on retries and reruns,
+  * the per-call token / latency / cost ledger (``usage_summary``,
+    ``flush_usage_metrics``) that every call above reports into,
+  * the per-model adaptive (AIMD) concurrency limiter every call passes through,
   * the CloudWatch ``OpusModelFallback`` metric emitter.
 
 This module is VENDORED into each Lambda deployment package at build time by
@@ -20,10 +28,14 @@ Keeping it self-contained (no imports from sibling Lambda code) is what lets the
 Lambda import root.
 """
 
+import hashlib
 import json
 import logging
 import os
+import threading
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
 
 import boto3
 from botocore.config import Config
@@ -58,30 +70,510 @@ def emit_opus_fallback_metric(model_id):
         logger.warning(json.dumps({"event": "metric_emit_failed", "error": str(metric_err)[:100]}))
 
 
-def invoke_model(prompt, *, model_id, temperature=0.8, max_tokens=8192):
-    """Single-shot text generation via Bedrock ``invoke_model``.
+# --- Response cache -----------------------------------------------------------
+# Byte-identical requests (same model, temperature, max_tokens and prompt) return
+# the same answer from a temperature-0 pass, so Step Functions retries, revision
+# loops and CLI reruns replay them from the cache instead of paying for Bedrock
+# again. Two tiers: a per-container LRU (bounded by LLM_CACHE_MEMORY_ENTRIES,
+# least-recently-used evicted first) in front of S3 objects under llm-cache/ in the
+# drafts bucket. S3 entries are TTL-checked on read and expired by the bucket's
+# lifecycle rule; responses above LLM_CACHE_MAX_ENTRY_BYTES are never stored.
+# Non-deterministic passes are not cached unless a caller opts in explicitly.
+_CACHE_ENABLED = os.environ.get("LLM_CACHE", "1") != "0"
+_CACHE_BUCKET = os.environ.get("DRAFTS_BUCKET", "")
+_CACHE_PREFIX = "llm-cache/"
+_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+_CACHE_MAX_ENTRY_BYTES = int(os.environ.get("LLM_CACHE_MAX_ENTRY_BYTES", str(256 * 1024)))
+_CACHE_MEMORY_ENTRIES = int(os.environ.get("LLM_CACHE_MEMORY_ENTRIES", "64"))
 
-    Pass ``temperature=None`` to omit the parameter entirely (required for the
-    Opus model, which rejects an explicit temperature)."""
+_memory_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Lazy S3 client — only created when a cacheable call actually happens.
+_s3 = None
+
+
+def _get_s3():
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client("s3", region_name=AWS_REGION)
+    return _s3
+
+
+def cache_key(prompt, *, model_id, temperature, max_tokens, system=None, thinking_budget=None):
+    """Content address for a request: sha256 over everything that determines the
+    response."""
+    parts = [model_id, temperature, max_tokens, prompt]
+    if system:
+        parts.append(system)
+    if thinking_budget:
+        parts.append({"thinking_budget": thinking_budget})
+    material = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _cache_wanted(cache, temperature):
+    """``cache=None`` (the default) caches only deterministic temperature-0 calls;
+    True/False force the decision either way for a single call."""
+    if not _CACHE_ENABLED:
+        return False
+    if cache is None:
+        return temperature is not None and temperature == 0
+    return bool(cache)
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+    if not _CACHE_BUCKET:
+        return None
+    try:
+        obj = _get_s3().get_object(Bucket=_CACHE_BUCKET, Key=f"{_CACHE_PREFIX}{key}.json")
+        entry = json.loads(obj["Body"].read())
+    except Exception as e:
+        if "NoSuchKey" not in str(e) and "NoSuchKey" not in type(e).__name__:
+            logger.warning(json.dumps({"event": "llm_cache_read_failed", "error": str(e)[:200]}))
+        return None
+    if time.time() - entry.get("created", 0) > _CACHE_TTL_SECONDS:
+        return None
+    text = entry.get("text")
+    if text is not None:
+        _cache_remember(key, text)
+    return text
+
+
+def _cache_remember(key, text):
+    with _cache_lock:
+        _memory_cache[key] = text
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > _CACHE_MEMORY_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def _cache_put(key, text, model_id):
+    body = json.dumps({"created": int(time.time()), "model_id": model_id, "text": text}).encode("utf-8")
+    if len(body) > _CACHE_MAX_ENTRY_BYTES:
+        logger.info(json.dumps({"event": "llm_cache_skip_oversize", "bytes": len(body)}))
+        return
+    _cache_remember(key, text)
+    if not _CACHE_BUCKET:
+        return
+    try:
+        _get_s3().put_object(Bucket=_CACHE_BUCKET, Key=f"{_CACHE_PREFIX}{key}.json", Body=body,
+                             ContentType="application/json")
+    except Exception as e:
+        logger.warning(json.dumps({"event": "llm_cache_write_failed", "error": str(e)[:200]}))
+
+
+# --- Usage accounting ---------------------------------------------------------
+# Every Bedrock call appends one record (label, model, tokens, latency, stop
+# reason) to a per-invocation ledger. Each record is logged as an ``llm_call``
+# event immediately; ``flush_usage_metrics`` turns the ledger into one batched
+# CloudWatch EMF document per label at the end of the handler, and
+# ``usage_summary`` is returned in the Lambda output so Notify can show where a
+# run's time and money went. Handlers call ``reset_usage`` on entry because warm
+# containers keep module state between invocations.
+_USAGE_NAMESPACE = "BlogAgent/LLM"
+
+# USD per 1M tokens (input, output), matched by model-family substring.
+_PRICING = {
+    "opus": (5.0, 25.0),
+    "sonnet": (3.0, 15.0),
+    "haiku": (1.0, 5.0),
+}
+# Prompt-cache multipliers on the input price: reads are billed at a tenth,
+# writes (the first call that populates a breakpoint) at a 25% premium.
+_CACHE_READ_PRICE_FACTOR = 0.1
+_CACHE_WRITE_PRICE_FACTOR = 1.25
+
+_usage_records = []
+_usage_lock = threading.Lock()
+
+
+def _estimate_cost(model_id, input_tokens, output_tokens, cache_read_tokens=0, cache_write_tokens=0):
+    for family, (price_in, price_out) in _PRICING.items():
+        if family in model_id:
+            cached_in = (cache_read_tokens * _CACHE_READ_PRICE_FACTOR
+                         + cache_write_tokens * _CACHE_WRITE_PRICE_FACTOR)
+            return ((input_tokens + cached_in) * price_in + output_tokens * price_out) / 1_000_000
+    return 0.0
+
+
+def _record_cost(r):
+    return _estimate_cost(r["model"], r["input_tokens"], r["output_tokens"],
+                          r.get("cache_read_tokens", 0), r.get("cache_write_tokens", 0))
+
+
+def _header_int(response, name):
+    try:
+        return int(response["ResponseMetadata"]["HTTPHeaders"][name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _record_usage(label, model_id, *, input_tokens=0, output_tokens=0, ms=0, stop_reason=None, cached=False,
+                  queue_ms=0, cache_read_tokens=0, cache_write_tokens=0):
+    record = {
+        "label": label,
+        "model": model_id,
+        "input_tokens": int(input_tokens or 0),
+        "output_tokens": int(output_tokens or 0),
+        "cache_read_tokens": int(cache_read_tokens or 0),
+        "cache_write_tokens": int(cache_write_tokens or 0),
+        "ms": int(ms),
+        "queue_ms": int(queue_ms),
+        "stop_reason": stop_reason,
+        "cached": cached,
+    }
+    with _usage_lock:
+        _usage_records.append(record)
+    logger.info(json.dumps({"event": "llm_call", **record}))
+    if stop_reason == "max_tokens":
+        logger.warning(json.dumps({"event": "llm_output_truncated", "label": label, "model": model_id}))
+
+
+def reset_usage():
+    """Clear the usage ledger (call at handler entry)."""
+    with _usage_lock:
+        _usage_records.clear()
+
+
+def usage_summary():
+    """Aggregate the ledger: totals plus a per-label breakdown, JSON-serialisable."""
+    with _usage_lock:
+        records = list(_usage_records)
+    by_label = {}
+    for r in records:
+        agg = by_label.setdefault(r["label"], {"model": r["model"], "calls": 0, "cache_hits": 0, "input_tokens": 0,
+                                               "output_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0,
+                                               "ms": 0, "queue_ms": 0, "cost_usd": 0.0})
+        agg["calls"] += 1
+        agg["cache_hits"] += 1 if r["cached"] else 0
+        agg["input_tokens"] += r["input_tokens"]
+        agg["output_tokens"] += r["output_tokens"]
+        agg["cache_read_tokens"] += r["cache_read_tokens"]
+        agg["cache_write_tokens"] += r["cache_write_tokens"]
+        agg["ms"] += r["ms"]
+        agg["queue_ms"] += r["queue_ms"]
+        agg["cost_usd"] += _record_cost(r)
+    for agg in by_label.values():
+        agg["cost_usd"] = round(agg["cost_usd"], 4)
+    return {
+        "calls": len(records),
+        "cache_hits": sum(1 for r in records if r["cached"]),
+        "input_tokens": sum(r["input_tokens"] for r in records),
+        "output_tokens": sum(r["output_tokens"] for r in records),
+        "cache_read_tokens": sum(r["cache_read_tokens"] for r in records),
+        "cache_write_tokens": sum(r["cache_write_tokens"] for r in records),
+        "ms": sum(r["ms"] for r in records),
+        "queue_ms": sum(r["queue_ms"] for r in records),
+        "cost_usd": round(sum(a["cost_usd"] for a in by_label.values()), 4),
+        "by_label": by_label,
+    }
+
+
+def flush_usage_metrics(service):
+    """Emit the ledger as CloudWatch Embedded Metric Format — one log document per
+    label, with each metric carrying the array of per-call values (EMF allows up to
+    100 values per metric), so the batch costs no PutMetricData calls at all.
+    EMF must be the raw stdout line, hence print() rather than the logger."""
+    with _usage_lock:
+        records = list(_usage_records)
+    grouped = {}
+    for r in records:
+        grouped.setdefault(r["label"], []).append(r)
+    now_ms = int(time.time() * 1000)
+    for label, rows in grouped.items():
+        rows = rows[-100:]
+        doc = {
+            "_aws": {
+                "Timestamp": now_ms,
+                "CloudWatchMetrics": [{
+                    "Namespace": _USAGE_NAMESPACE,
+                    "Dimensions": [["Service", "Label"]],
+                    "Metrics": [
+                        {"Name": "InputTokens", "Unit": "Count"},
+                        {"Name": "OutputTokens", "Unit": "Count"},
+                        {"Name": "CacheReadTokens", "Unit": "Count"},
+                        {"Name": "LatencyMs", "Unit": "Milliseconds"},
+                        {"Name": "QueueWaitMs", "Unit": "Milliseconds"},
+                        {"Name": "CostUSD", "Unit": "None"},
+                    ],
+                }],
+            },
+            "Service": service,
+            "Label": label,
+            "Model": rows[-1]["model"],
+            "InputTokens": [r["input_tokens"] for r in rows],
+            "OutputTokens": [r["output_tokens"] for r in rows],
+            "CacheReadTokens": [r["cache_read_tokens"] for r in rows],
+            "LatencyMs": [r["ms"] for r in rows],
+            "QueueWaitMs": [r["queue_ms"] for r in rows],
+            "CostUSD": [round(_record_cost(r), 6) for r in rows],
+        }
+        print(json.dumps(doc), flush=True)
+
+
+# --- Adaptive concurrency -----------------------------------------------------
+# Research and Draft fan Bedrock calls out from several thread pools at once, and
+# nothing else coordinates them against per-model TPM/RPM quotas. Every call
+# takes a slot from its model's AIMD window first: the window grows by 1/window
+# per success (about +1 per full window of calls) and halves on a throttle,
+# between 1 and BEDROCK_CONCURRENCY_MAX. Windows are per model and shared by all
+# threads in the container. Time spent waiting for a slot is recorded as
+# queue_ms in the usage ledger (QueueWaitMs metric).
+_LIMITER_INITIAL = float(os.environ.get("BEDROCK_CONCURRENCY_INITIAL", "4"))
+_LIMITER_MAX = float(os.environ.get("BEDROCK_CONCURRENCY_MAX", "8"))
+
+
+def _is_throttle(exc):
+    err_str = str(exc)
+    return "ThrottlingException" in err_str or "Too many tokens" in err_str
+
+
+class _AimdLimiter:
+    """Additive-increase / multiplicative-decrease concurrency window for one model."""
+
+    def __init__(self, model_id, initial=None, maximum=None):
+        self.model_id = model_id
+        self.maximum = max(1.0, maximum if maximum is not None else _LIMITER_MAX)
+        self.limit = min(self.maximum, max(1.0, initial if initial is not None else _LIMITER_INITIAL))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until a slot is free; returns the queue wait in ms."""
+        start = time.monotonic()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return (time.monotonic() - start) * 1000
+
+    def release(self, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)
+                logger.warning(json.dumps({"event": "llm_concurrency_backoff", "model": self.model_id,
+                                           "limit": round(self.limit, 2)}))
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter(model_id):
+    with _limiters_lock:
+        if model_id not in _limiters:
+            _limiters[model_id] = _AimdLimiter(model_id)
+        return _limiters[model_id]
+
+
+@contextmanager
+def _concurrency_slot(model_id):
+    """Hold one slot of ``model_id``'s window for the duration of a Bedrock call.
+    Yields a dict carrying the queue wait (``queue_ms``)."""
+    limiter = _limiter(model_id)
+    slot = {"queue_ms": limiter.acquire()}
+    if slot["queue_ms"] >= 1000:
+        logger.info(json.dumps({"event": "llm_queue_wait", "model": model_id, "queue_ms": int(slot["queue_ms"])}))
+    throttled = False
+    try:
+        yield slot
+    except Exception as e:
+        throttled = _is_throttle(e)
+        raise
+    finally:
+        limiter.release(throttled=throttled)
+
+
+# --- Prompt caching -----------------------------------------------------------
+# Passes that share a long, stable prefix (the Draft audits all re-read the same
+# research notes and voice profile) send it as a content block carrying a
+# cache_control breakpoint. Bedrock caches everything up to the breakpoint for a
+# few minutes, so the second and later passes in a run read the prefix at a
+# tenth of the input price and skip most of its time-to-first-token. Prefixes
+# below the model's minimum cacheable length are simply processed uncached.
+def text_block(text, cache=False):
+    """One ``{"type": "text"}`` content block; ``cache=True`` makes it a prompt-cache
+    breakpoint. Usable in both ``prompt`` and ``system`` lists."""
+    block = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def _request_body(prompt, temperature, max_tokens, thinking_budget=None, system=None):
     body_dict = {
         "anthropic_version": "bedrock-2023-05-31",
         "max_tokens": max_tokens,
         "messages": [{"role": "user", "content": prompt}],
     }
+    if system:
+        body_dict["system"] = system
     if temperature is not None:
         body_dict["temperature"] = temperature
-    response = bedrock.invoke_model(
-        modelId=model_id,
-        contentType="application/json",
-        accept="application/json",
-        body=json.dumps(body_dict),
+    if thinking_budget:
+        body_dict["thinking"] = {"type": "enabled", "budget_tokens": thinking_budget}
+    return json.dumps(body_dict)
+
+
+def invoke_model(prompt, *, model_id, temperature=0.8, max_tokens=8192, cache=None, label="llm",
+                 thinking_budget=None, system=None):
+    """Single-shot text generation via Bedrock ``invoke_model``.
+
+    ``prompt`` is the user turn: a string, or a list of content blocks (see
+    ``text_block``) when part of it should be a prompt-cache breakpoint.
+    ``system`` is an optional system prompt in the same two forms.
+
+    Pass ``temperature=None`` to omit the parameter entirely (required for the
+    Opus model, which rejects an explicit temperature). ``thinking_budget``
+    enables extended thinking; only the text blocks of the reply are returned.
+    ``label`` names the pass in the usage ledger (e.g. "draft.citations").
+
+    Temperature-0 calls are served from / written to the response cache (truncated
+    replies are not written); pass ``cache=False`` to opt a call out (or
+    ``cache=True`` to opt one in)."""
+    key = None
+    if _cache_wanted(cache, temperature):
+        key = cache_key(prompt, model_id=model_id, temperature=temperature, max_tokens=max_tokens, system=system,
+                        thinking_budget=thinking_budget)
+        cached = _cache_get(key)
+        if cached is not None:
+            logger.info(json.dumps({"event": "llm_cache_hit", "model": model_id, "key": key[:16]}))
+            _record_usage(label, model_id, cached=True)
+            return cached
+    with _concurrency_slot(model_id) as slot:
+        start = time.monotonic()
+        response = bedrock.invoke_model(
+            modelId=model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=_request_body(prompt, temperature, max_tokens, thinking_budget, system),
+        )
+        result = json.loads(response["body"].read())
+        elapsed_ms = (time.monotonic() - start) * 1000
+    usage = result.get("usage") or {}
+    _record_usage(
+        label, model_id,
+        input_tokens=usage.get("input_tokens", _header_int(response, "x-amzn-bedrock-input-token-count")),
+        output_tokens=usage.get("output_tokens", _header_int(response, "x-amzn-bedrock-output-token-count")),
+        cache_read_tokens=usage.get("cache_read_input_tokens",
+                                    _header_int(response, "x-amzn-bedrock-cache-read-input-token-count")),
+        cache_write_tokens=usage.get("cache_creation_input_tokens",
+                                     _header_int(response, "x-amzn-bedrock-cache-write-input-token-count")),
+        ms=_header_int(response, "x-amzn-bedrock-invocation-latency") or elapsed_ms,
+        stop_reason=result.get("stop_reason"),
+        queue_ms=slot["queue_ms"],
     )
-    result = json.loads(response["body"].read())
-    return result["content"][0]["text"]
+    text = "\n".join(b["text"] for b in result["content"] if b.get("type", "text") == "text")
+    if thinking_budget:
+        text = text.strip()
+    # A reply cut off at max_tokens is served to this caller, never replayed to a retry.
+    if key is not None and result.get("stop_reason") != "max_tokens":
+        _cache_put(key, text, model_id)
+    return text
+
+
+# Bedrock only reports exact output usage in the final stream event, so checkpoint
+# cadence is driven by a chars-per-token estimate of the text received so far.
+_CHARS_PER_TOKEN = 4
+
+
+def stream_model(prompt, *, model_id, temperature=0.8, max_tokens=8192, label="llm"):
+    """Streaming text generation via Bedrock ``invoke_model_with_response_stream``.
+
+    Yields text deltas as they arrive. When the stream completes, logs a
+    ``{label}_stream_complete`` event with time-to-first-token, total latency,
+    output tokens and tokens/sec. In-stream error events (throttling, model
+    errors) are raised with the Bedrock exception name in the message so the
+    caller's throttle/unavailable detection works exactly as for ``invoke_model``."""
+    with _concurrency_slot(model_id) as slot:
+        start = time.monotonic()
+        response = bedrock.invoke_model_with_response_stream(
+            modelId=model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=_request_body(prompt, temperature, max_tokens),
+        )
+        first_token_at = None
+        input_tokens = 0
+        output_tokens = 0
+        chars = 0
+        stop_reason = None
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if chunk is None:
+                for name, detail in event.items():
+                    if name.endswith("Exception"):
+                        message = detail.get("message", "") if isinstance(detail, dict) else str(detail)
+                        raise RuntimeError(f"{name[0].upper()}{name[1:]}: {message}")
+                continue
+            data = json.loads(chunk["bytes"])
+            kind = data.get("type")
+            if kind == "content_block_delta" and data.get("delta", {}).get("type") == "text_delta":
+                text = data["delta"].get("text", "")
+                if not text:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                chars += len(text)
+                yield text
+            elif kind == "message_start":
+                input_tokens = data.get("message", {}).get("usage", {}).get("input_tokens", 0)
+            elif kind == "message_delta":
+                stop_reason = data.get("delta", {}).get("stop_reason") or stop_reason
+                output_tokens = data.get("usage", {}).get("output_tokens", output_tokens)
+    total_s = time.monotonic() - start
+    if not output_tokens:
+        output_tokens = chars // _CHARS_PER_TOKEN
+    ttft_s = (first_token_at - start) if first_token_at is not None else total_s
+    gen_s = max(total_s - ttft_s, 1e-6)
+    logger.info(json.dumps({
+        "event": f"{label}_stream_complete",
+        "model": model_id,
+        "ttft_ms": int(ttft_s * 1000),
+        "total_ms": int(total_s * 1000),
+        "output_tokens": output_tokens,
+        "tokens_per_sec": round(output_tokens / gen_s, 1),
+        "stop_reason": stop_reason,
+    }))
+    _record_usage(label, model_id, input_tokens=input_tokens, output_tokens=output_tokens,
+                  ms=total_s * 1000, stop_reason=stop_reason, queue_ms=slot["queue_ms"])
+
+
+def invoke_model_stream(prompt, *, model_id, temperature=0.8, max_tokens=8192, label="llm",
+                        on_checkpoint=None, checkpoint_every=500):
+    """Streaming equivalent of ``invoke_model``: returns the full text, but calls
+    ``on_checkpoint(text_so_far)`` roughly every ``checkpoint_every`` output tokens
+    so the caller can persist partial output while a long generation is in flight.
+
+    Checkpoint callbacks are best-effort — a failing callback is logged and the
+    generation continues."""
+    parts = []
+    chars = 0
+    next_checkpoint = checkpoint_every * _CHARS_PER_TOKEN
+    for delta in stream_model(prompt, model_id=model_id, temperature=temperature,
+                              max_tokens=max_tokens, label=label):
+        parts.append(delta)
+        chars += len(delta)
+        if on_checkpoint is not None and chars >= next_checkpoint:
+            next_checkpoint = chars + checkpoint_every * _CHARS_PER_TOKEN
+            try:
+                on_checkpoint("".join(parts))
+            except Exception as e:
+                logger.warning(json.dumps({"event": f"{label}_stream_checkpoint_failed", "error": str(e)[:200]}))
+    return "".join(parts)
 
 
 def invoke_with_opus_fallback(prompt, *, primary_model_id, fallback_model_id, label,
-                              max_tokens=8192, temperature=None):
+                              max_tokens=8192, temperature=None, on_checkpoint=None, checkpoint_every=500):
     """Invoke the primary (Opus) model, falling back to ``fallback_model_id``
     (Sonnet) on throttle or access errors.
 
@@ -92,17 +584,27 @@ def invoke_with_opus_fallback(prompt, *, primary_model_id, fallback_model_id, la
     every second of the Lambda budget. Set ``OPUS_OUTER_RETRY_DELAYS`` (e.g.
     "45,90") to restore the longer-wait behaviour once Opus quota is healthy.
 
-    ``label`` namespaces the structured log events (e.g. "draft", "synthesis")."""
+    ``label`` namespaces the structured log events (e.g. "draft", "synthesis").
+
+    Passing ``on_checkpoint`` switches both the primary and fallback calls to the
+    streaming path (see ``invoke_model_stream``), so partial output is surfaced to
+    the caller while the generation runs. A fallback restarts generation from
+    scratch; its checkpoints overwrite whatever the primary model had produced."""
+    def _call(model_id):
+        if on_checkpoint is not None:
+            return invoke_model_stream(prompt, model_id=model_id, temperature=temperature, max_tokens=max_tokens,
+                                       label=label, on_checkpoint=on_checkpoint, checkpoint_every=checkpoint_every)
+        return invoke_model(prompt, model_id=model_id, temperature=temperature, max_tokens=max_tokens, label=label)
+
     delays_env = os.environ.get("OPUS_OUTER_RETRY_DELAYS", "")
     delays = [int(x) for x in delays_env.split(",") if x.strip().isdigit()] if delays_env else []
     last_exc = None
     for attempt in range(len(delays) + 1):
         try:
-            return invoke_model(prompt, model_id=primary_model_id, temperature=temperature, max_tokens=max_tokens)
+            return _call(primary_model_id)
         except Exception as e:
-            err_str = str(e)
-            is_throttle = "ThrottlingException" in err_str or "Too many tokens" in err_str
-            is_unavailable = "AccessDeniedException" in err_str
+            is_throttle = _is_throttle(e)
+            is_unavailable = "AccessDeniedException" in str(e)
             if is_throttle and attempt < len(delays):
                 wait = delays[attempt]
                 last_exc = e
@@ -113,7 +615,7 @@ def invoke_with_opus_fallback(prompt, *, primary_model_id, fallback_model_id, la
                 logger.warning(json.dumps({"event": f"{label}_fallback_sonnet", "reason": reason, "fallback_model": fallback_model_id}))
                 if is_unavailable:
                     emit_opus_fallback_metric(primary_model_id)
-                return invoke_model(prompt, model_id=fallback_model_id, temperature=temperature, max_tokens=max_tokens)
+                return _call(fallback_model_id)
             else:
                 raise
     raise last_exc
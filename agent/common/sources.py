@@ -0,0 +1,263 @@
+"""Sources index — the structured companion to Research's markdown notes.
+
+Research used to hand every later stage one flattened ``research`` string, and
+each stage re-parsed it with its own scan: Draft checked for ``"- Data point:"``
+before the chart placeholder pass, Chart re-extracted the data-point blocks, and
+Verify carried the whole string in its payload without reading it. Research now
+also writes one JSON object per execution to ``sources/{key}.json`` in the drafts
+bucket and returns only ``sources_key``; the later stages load and query it:
+
+    {
+      "version": 1,
+      "sources": [{"id": "S1", "url", "title", "tier", "excerpt", "content_hash",
+                   "claims": [{"text", "status"?}]}],
+      "data_points": [{"description", "values": [[label, number], ...], "source", "chart_type"}]
+    }
+
+``tier`` is the authority tier Research already weights sources by
+(``academic``, ``vendor``, ``industry`` or ``standard``). ``claims`` are the
+synthesis sentences that cite the source, plus any cross-reference fact-check
+claim that names it (with its SUPPORTED/UNVERIFIED/UNSUPPORTED status).
+``data_points`` are the chart-ready blocks, parsed once with the same rules Chart
+has always used.
+
+Vendored into each Lambda package via ``.common-deps`` (see ``llm.py``); boto3 and
+the standard library only. S3 is best-effort: a missing or unreadable index makes
+``load`` return None and the caller falls back to what it did before.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+
+import boto3
+
+logger = logging.getLogger()
+
+VERSION = 1
+_BUCKET = os.environ.get("DRAFTS_BUCKET", "")
+_PREFIX = "sources/"
+_EXCERPT_CHARS = 1500
+_MAX_CLAIMS_PER_SOURCE = 6
+_MAX_CLAIM_CHARS = 300
+_LOADED_ENTRIES = 4
+
+_TIER_DOMAINS = (
+    ("academic", (".gov", "ieee.org", "acm.org", "arxiv.org", "nist.gov", "ietf.org", "w3.org")),
+    ("vendor", ("aws.amazon.com", "cloud.google.com", "learn.microsoft.com", "docs.github.com")),
+    ("industry", ("gartner.com", "mckinsey.com", "forrester.com", "deloitte.com")),
+)
+_LINK_RE = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[\"“(\[*_]*[A-Z0-9])")
+_FACT_CHECK_RE = re.compile(r"CLAIM:\s*(.+?)\s*\n\s*STATUS:\s*([A-Z]+)\s*\n\s*SOURCE:\s*(.+)")
+
+_s3 = None
+_loaded = OrderedDict()  # key -> SourcesIndex, the last few loaded in this container
+
+
+def _get_s3():
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client("s3", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+    return _s3
+
+
+def authority_tier(url):
+    """``academic`` / ``vendor`` / ``industry`` for the HIGH-authority domains, else ``standard``."""
+    url_lower = url.lower()
+    for tier, domains in _TIER_DOMAINS:
+        if any(d in url_lower for d in domains):
+            return tier
+    return "standard"
+
+
+def parse_values(values_str):
+    """Parse 'label: value, label: value' into list of (label, value) tuples.
+    Handles formats like:
+      - "Label1: 45%, Label2: 30%"
+      - "2021: 45%, 2022: 75%, 2023: 82%"
+      - "Manual: 6.5hrs, Automated: 1.8hrs"
+      - "60, 40" (bare numbers — labels generated as Item 1, Item 2)
+    """
+    pairs = []
+    # Split on comma followed by optional space — handles both alpha and numeric labels
+    for pair in re.split(r",\s*", values_str):
+        if ":" in pair:
+            label, val = pair.split(":", 1)
+            label = label.strip()
+            # Strip common suffixes: %, hrs, h, ms, s, x
+            val = val.strip()
+            val = re.sub(r'(hrs|hr|h|ms|s|x|%|\$)$', '', val, flags=re.IGNORECASE).strip()
+            try:
+                pairs.append((label, float(val)))
+            except ValueError:
+                continue
+        else:
+            # Bare number without a label — try to parse it
+            val = pair.strip()
+            val = re.sub(r'(hrs|hr|h|ms|s|x|%|\$)$', '', val, flags=re.IGNORECASE).strip()
+            try:
+                pairs.append((f"Item {len(pairs) + 1}", float(val)))
+            except ValueError:
+                continue
+    return pairs
+
+
+def parse_data_points(research):
+    """
+    Extract structured data points from research notes.
+    Looks for the format:
+      - Data point: [description]
+      - Values: [label: value, label: value, ...]
+      - Source: [citation]
+      - Chart type: [bar|line|pie|comparison]
+    """
+    data_points = []
+    current = {}
+
+    for line in research.split("\n"):
+        line = line.strip()
+        line_lower = line.lower()
+
+        # Support ### headings as data point section markers
+        if line_lower.startswith("###") and current.get("description"):
+            # A new ### heading after we already have a data point means new section
+            if current:
+                data_points.append(current)
+            current = {}
+
+        if line_lower.startswith("- data point:") or line_lower.startswith("data point:"):
+            if current and current.get("description"):
+                data_points.append(current)
+            current = {"description": line.split(":", 1)[1].strip()}
+        elif line_lower.startswith("- values:") or line_lower.startswith("values:"):
+            # Values line may have multiple colons (e.g., "Values: 2021: 45%, 2022: 75%")
+            # Split only on the FIRST colon after "Values"
+            values_str = line.split(":", 1)[1].strip()
+            current["values"] = parse_values(values_str)
+        elif line_lower.startswith("- source:") or line_lower.startswith("source:"):
+            current["source"] = line.split(":", 1)[1].strip()
+        elif line_lower.startswith("- chart type:") or line_lower.startswith("chart type:"):
+            current["chart_type"] = line.split(":", 1)[1].strip().lower()
+
+    if current and current.get("description"):
+        data_points.append(current)
+
+    return data_points
+
+
+def cited_claims(markdown):
+    """url -> the sentences of ``markdown`` that cite it, link markup reduced to its text."""
+    claims = {}
+    for line in markdown.splitlines():
+        if "](http" not in line:
+            continue
+        for sentence in _SENTENCE_SPLIT_RE.split(line.strip()):
+            urls = [m.group(2) for m in _LINK_RE.finditer(sentence)]
+            if not urls:
+                continue
+            text = _LINK_RE.sub(lambda m: m.group(1), sentence).lstrip("-*# ").strip()[:_MAX_CLAIM_CHARS]
+            for url in dict.fromkeys(urls):
+                claims.setdefault(url, []).append(text)
+    return claims
+
+
+def build_index(candidates, research):
+    """The index for ``candidates`` (dicts with url, title and content — the sources
+    Research offered the synthesis) and the final research notes. A URL the notes
+    cite that is not among the candidates still gets an entry, without an excerpt."""
+    claims = cited_claims(research)
+    entries = {}
+    for c in candidates:
+        url = c.get("url", "")
+        if url and url not in entries:
+            content = c.get("content", "") or ""
+            entries[url] = {
+                "url": url,
+                "title": c.get("title", "") or "",
+                "tier": authority_tier(url),
+                "excerpt": content[:_EXCERPT_CHARS],
+                "content_hash": hashlib.sha256(content.encode("utf-8", errors="ignore")).hexdigest() if content else "",
+            }
+    for url in claims:
+        entries.setdefault(url, {"url": url, "title": "", "tier": authority_tier(url), "excerpt": "",
+                                 "content_hash": ""})
+
+    sources = []
+    for n, entry in enumerate(entries.values(), start=1):
+        entry = {"id": f"S{n}", **entry,
+                 "claims": [{"text": t} for t in claims.get(entry["url"], [])[:_MAX_CLAIMS_PER_SOURCE]]}
+        sources.append(entry)
+    for claim, status, named in _FACT_CHECK_RE.findall(research):
+        named_lower = named.strip().lower()
+        for entry in sources:
+            if entry["url"] in named or (entry["title"] and entry["title"].lower() in named_lower):
+                if len(entry["claims"]) < _MAX_CLAIMS_PER_SOURCE * 2:
+                    entry["claims"].append({"text": claim[:_MAX_CLAIM_CHARS], "status": status})
+                break
+    return {"version": VERSION, "sources": sources, "data_points": parse_data_points(research)}
+
+
+def key_for(execution_id, research):
+    """``sources/{execution_id}.json``, or a content-addressed key outside Step Functions."""
+    name = (execution_id or "").replace("/", "_")[:80]
+    if not name:
+        name = hashlib.sha256(research.encode("utf-8")).hexdigest()[:32]
+    return f"{_PREFIX}{name}.json"
+
+
+def save(key, index):
+    """Write the index; returns ``key``, or "" when it could not be stored."""
+    if not (_BUCKET and key):
+        return ""
+    try:
+        _get_s3().put_object(Bucket=_BUCKET, Key=key, Body=json.dumps(index).encode("utf-8"),
+                             ContentType="application/json")
+        return key
+    except Exception as e:
+        logger.warning(json.dumps({"event": "sources_index_save_failed", "error": str(e)[:200]}))
+        return ""
+
+
+def load(key):
+    """The ``SourcesIndex`` stored under ``key``, memoised for the last few keys in this
+    container; None when there is no key, no bucket, or the object cannot be read."""
+    if not (_BUCKET and key):
+        return None
+    if key not in _loaded:
+        try:
+            obj = _get_s3().get_object(Bucket=_BUCKET, Key=key)
+            _loaded[key] = SourcesIndex(json.loads(obj["Body"].read()))
+        except Exception as e:
+            logger.warning(json.dumps({"event": "sources_index_load_failed", "key": key, "error": str(e)[:200]}))
+            return None
+        while len(_loaded) > _LOADED_ENTRIES:
+            _loaded.popitem(last=False)
+    _loaded.move_to_end(key)
+    return _loaded[key]
+
+
+class SourcesIndex:
+    """Query side of the index."""
+
+    def __init__(self, data):
+        self.sources = data.get("sources", [])
+        self._by_url = {s["url"]: s for s in self.sources}
+        # JSON turns the (label, value) tuples into lists; the renderers expect tuples.
+        self.data_points = [{**dp, "values": [tuple(v) for v in dp.get("values", [])]}
+                            for dp in data.get("data_points", [])]
+
+    def by_url(self, url):
+        return self._by_url.get(url)
+
+    def data_points_block(self):
+        """The data points in the notes' "- Data point:" format, for prompts."""
+        blocks = []
+        for dp in self.data_points:
+            values = ", ".join(f"{label}: {value:g}" for label, value in dp["values"])
+            blocks.append(f"- Data point: {dp.get('description', '')}\n- Values: {values}\n"
+                          f"- Source: {dp.get('source', '')}\n- Chart type: {dp.get('chart_type', 'bar')}")
+        return "\n\n".join(blocks)
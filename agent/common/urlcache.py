@@ -0,0 +1,183 @@
+"""Shared URL-status cache for the Blog Agent link checkers.
+
+Research (``verify_url`` — used directly, by the Perplexity citation filter and by
+the tool canonical-URL search) and Verify (``_fetch_page_meta``) re-check the same
+URLs within one execution, again on every revision loop, and again for the next
+post that cites the same docs page. Each check records one entry here:
+
+    {"url", "status", "ok", "final_url", "canonical", "title", "content_hash", "excerpt", "checked_at"}
+
+Entries live in a per-container dict in front of ``url-cache/`` objects in the
+drafts bucket (expired by the bucket lifecycle rule), and are considered fresh
+for a TTL chosen by outcome:
+
+  * 2xx/3xx              — ``URL_CACHE_OK_TTL_SECONDS`` (default 7 days)
+  * 404 / 410            — 1 day (dead links rarely come back)
+  * other 4xx            — 1 hour
+  * 5xx, timeouts (0)    — 10 minutes (transient; worth retrying soon)
+
+A 403 also writes a negative entry for the whole host: sites behind bot
+protection refuse every page, so further URLs on a known-403 domain are answered
+from the cache without touching the network for ``URL_CACHE_BLOCKED_TTL_SECONDS``.
+
+``excerpt`` is only stored by callers that extract page text (Verify). A lookup
+with ``need_excerpt=True`` therefore treats an OK entry without one as a miss,
+while failures are reusable by everyone.
+
+Vendored into each Lambda package via ``.common-deps`` (see ``llm.py``) and
+self-contained: boto3 and the standard library only. Every S3 operation is
+best-effort — a cache outage degrades to live checks, never to a failure.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+
+import boto3
+
+logger = logging.getLogger()
+
+_ENABLED = os.environ.get("URL_CACHE", "1") != "0"
+_BUCKET = os.environ.get("DRAFTS_BUCKET", "")
+_PREFIX = "url-cache/"
+_OK_TTL_SECONDS = int(os.environ.get("URL_CACHE_OK_TTL_SECONDS", str(7 * 24 * 3600)))
+_GONE_TTL_SECONDS = 24 * 3600
+_CLIENT_ERROR_TTL_SECONDS = 3600
+_TRANSIENT_TTL_SECONDS = 600
+_BLOCKED_TTL_SECONDS = int(os.environ.get("URL_CACHE_BLOCKED_TTL_SECONDS", str(24 * 3600)))
+_MAX_EXCERPT_CHARS = 2000
+
+_memory = {}
+_lock = threading.Lock()
+_s3 = None
+
+
+def _get_s3():
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client("s3", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+    return _s3
+
+
+def ttl_for(status):
+    """Freshness window for an outcome, in seconds."""
+    if 200 <= status < 400:
+        return _OK_TTL_SECONDS
+    if status in (404, 410):
+        return _GONE_TTL_SECONDS
+    if 400 <= status < 500:
+        return _CLIENT_ERROR_TTL_SECONDS
+    return _TRANSIENT_TTL_SECONDS
+
+
+def content_hash(data):
+    """sha256 of fetched bytes/text, so callers can tell a changed page from a stale entry."""
+    if isinstance(data, str):
+        data = data.encode("utf-8", errors="ignore")
+    return hashlib.sha256(data).hexdigest() if data else ""
+
+
+def _host(url):
+    return (urllib.parse.urlsplit(url).hostname or "").lower()
+
+
+def _url_key(url):
+    return f"{_PREFIX}{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+
+def _domain_key(host):
+    return f"{_PREFIX}domains/{host}.json"
+
+
+def _fresh(entry, ttl):
+    return entry is not None and time.time() - entry.get("checked_at", 0) <= ttl
+
+
+def _read(key):
+    with _lock:
+        if key in _memory:
+            return _memory[key]
+    if not _BUCKET:
+        return None
+    try:
+        obj = _get_s3().get_object(Bucket=_BUCKET, Key=key)
+        entry = json.loads(obj["Body"].read())
+    except Exception as e:
+        if "NoSuchKey" not in str(e) and "NoSuchKey" not in type(e).__name__:
+            logger.warning(json.dumps({"event": "url_cache_read_failed", "error": str(e)[:200]}))
+        return None
+    with _lock:
+        _memory[key] = entry
+    return entry
+
+
+def _write(key, entry):
+    with _lock:
+        _memory[key] = entry
+    if not _BUCKET:
+        return
+    try:
+        _get_s3().put_object(Bucket=_BUCKET, Key=key, Body=json.dumps(entry).encode("utf-8"),
+                             ContentType="application/json")
+    except Exception as e:
+        logger.warning(json.dumps({"event": "url_cache_write_failed", "error": str(e)[:200]}))
+
+
+def lookup(url, *, need_excerpt=False):
+    """Return a fresh entry for ``url`` (or a negative entry for its blocked host),
+    or None when the caller has to check the network."""
+    if not _ENABLED or not url:
+        return None
+    host = _host(url)
+    if host:
+        blocked = _read(_domain_key(host))
+        if _fresh(blocked, _BLOCKED_TTL_SECONDS):
+            return {"url": url, "status": 403, "ok": False, "final_url": url, "title": "", "content_hash": "",
+                    "excerpt": "", "checked_at": blocked["checked_at"], "blocked_domain": True}
+    entry = _read(_url_key(url))
+    if not _fresh(entry, ttl_for(entry.get("status", 0)) if entry else 0):
+        return None
+    if need_excerpt and entry.get("ok") and entry.get("excerpt") is None:
+        return None
+    return entry
+
+
+def store(url, *, status, ok, final_url="", title="", body=None, excerpt=None, canonical=""):
+    """Record the outcome of one check. ``body`` (bytes or text actually read) is
+    hashed, not stored; ``excerpt`` is kept (capped) for callers that need page text.
+    An entry that already carries an excerpt keeps it when a lighter check (no
+    excerpt) refreshes the same URL."""
+    if not _ENABLED or not url:
+        return
+    if excerpt is None:
+        previous = _read(_url_key(url))
+        if previous and previous.get("ok") and ok and previous.get("excerpt") is not None:
+            excerpt = previous["excerpt"]
+            title = title or previous.get("title", "")
+            canonical = canonical or previous.get("canonical", "")
+    entry = {
+        "url": url,
+        "status": int(status or 0),
+        "ok": bool(ok),
+        "final_url": final_url or url,
+        "canonical": canonical or "",
+        "title": title or "",
+        "content_hash": content_hash(body) if body else "",
+        "excerpt": excerpt[:_MAX_EXCERPT_CHARS] if excerpt is not None else None,
+        "checked_at": int(time.time()),
+    }
+    _write(_url_key(url), entry)
+    host = _host(url)
+    if status == 403 and host:
+        _write(_domain_key(host), {"host": host, "status": 403, "checked_at": entry["checked_at"]})
+        logger.info(json.dumps({"event": "url_cache_domain_blocked", "host": host}))
+
+
+def clear_memory():
+    """Drop the in-container tier (tests; the S3 tier is unaffected)."""
+    with _lock:
+        _memory.clear()
@@ -5,6 +5,8 @@ are the skeleton; the AI polishes, structures, and enriches — never replaces.
 
 LLM passes (in order):
   Pass 1 — Sonnet + extended thinking (_thinking_plan): produces a drafting or revision plan.
+             For a first draft it usually already exists: the mode="plan" branch builds it from
+             Research's streamed sections while Research is still running (_plan_from_handoff).
   Pass 2 — Opus (_invoke_model, DRAFT_MODEL_ID): full draft generation, plan injected.
   Pass 2b— Sonnet (_audit_structure): checks TL;DR, headings, Next Steps, closing italic.
              Runs BEFORE chart/diagram placeholders so CHART/DIAGRAM HTML comments are never
@@ -12,9 +14,11 @@ LLM passes (in order):
   Pass 3 — Sonnet (_invoke_model): chart placeholder insertion — editorial judgment on what's worth visualising.
   Pass 4 — Sonnet (_invoke_model): diagram placeholder insertion — chooses type and placement.
   Pass 5 — Sonnet 8192 tokens (_audit_citations): verifies every link maps to a research source.
-             Rewrites the full draft with corrections. Never truncates (8192 token budget).
+             Returns an edit script of exact-match patches (_patch_audit); falls back to rewriting the
+             full draft with corrections (8192 token budget) only when a patch does not apply.
   Pass 6 — Sonnet 8192 tokens (_audit_voice_profile): enforces voice/style rules from voice-profile.md.
-             Always rewrites the draft with fixes applied, regardless of post length.
+             Always applies fixes, regardless of post length — as an edit script, or a full rewrite
+             when the script does not apply.
              No annotation-only mode. Never skips.
   Pass 7 — Annotation audits, run CONCURRENTLY (_audit_annotations), then merged. Skipped in revision mode:
              • _audit_insight (Sonnet 8192) — flags generic paragraphs with <!-- ⚡ INSIGHT: --> annotations.
@@ -23,10 +27,26 @@ LLM passes (in order):
              Both are annotation-only (no prose rewrite) and independent, so they run in parallel and
              their comments are merged onto the shared base — saving one full Sonnet pass of wall-clock.
 
+Scheduling:
+  Passes 2b-7 (plus category inference and the meta description) form a dependency graph
+  (_Pass / _run_passes): each declares what it reads and writes, and passes with no conflict
+  run concurrently. Chart/diagram placeholders and categories read the post-structure prose,
+  so they run alongside Passes 5-6; their comments are merged onto the final prose
+  (_collect_annotations / _apply_annotations). Each node is checkpointed on its own.
+
 Resilience:
   • Resume-on-retry: every pass above is wrapped in a checkpoint (see _DraftCheckpoint). On a Step
     Functions retry of this Task, completed passes replay from S3 instead of re-invoking Bedrock —
     a transient failure in a late audit never forces a costly re-run from the Opus pass.
+  • Streaming generation: the Opus pass streams its output (llm.invoke_model_stream) and persists
+    the partial text to the checkpoint every DRAFT_STREAM_CHECKPOINT_TOKENS tokens. A retry
+    continues an interrupted draft from its last complete section (_continue_draft).
+  • Section-sharded audits: on long posts Passes 5-6 split the draft on H2 headings and audit
+    the sections concurrently (_sectioned_audit), each citation section against only the
+    research relevant to it, then stitch; a dropped section falls back to the whole-draft pass.
+  • Prompt caching: Passes 5-7 share one byte-identical system prefix (site context, voice
+    profile, full research — see _audit_system) marked as a prompt-cache breakpoint, so only
+    the first audit pays full input price and latency for it.
 
 Haiku reserved for: _infer_categories only (64-token structured label pick — genuinely mechanical).
 
@@ -36,17 +56,22 @@ are stripped by Publish Lambda before committing to GitHub.
 The voice profile is loaded from S3 at runtime and injected into every Draft prompt.
 """
 
+import difflib
 import hashlib
 import json
 import logging
 import os
 import re
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import UTC, datetime
 
 import boto3
-from llm import bedrock, invoke_with_opus_fallback
+from claimcheck import hydrate, offload
+from llm import flush_usage_metrics, invoke_with_opus_fallback, reset_usage, text_block, usage_summary
 from llm import invoke_model as _llm_invoke_model
+from sources import load as load_sources_index
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -70,7 +95,7 @@ def _heartbeat(task_token):
     except Exception as hb_err:
         logger.warning(json.dumps({"event": "heartbeat_failed", "error": str(hb_err)[:100]}))
 
-def _invoke_draft_with_backoff(prompt):
+def _invoke_draft_with_backoff(prompt, on_checkpoint=None):
     """Opus draft generation with immediate Sonnet fallback on throttle/access errors.
 
     The retry/fallback contract lives in llm.invoke_with_opus_fallback (shared with
@@ -78,6 +103,10 @@ def _invoke_draft_with_backoff(prompt):
     accommodate long author drafts with many inline citation URLs (URL tokens are ~2.5x
     more expensive than prose tokens, so a 4000-word post with 30+ citations can easily
     exceed the old 8192-token limit and silently truncate the last few sections).
+
+    When ``on_checkpoint`` is given (and DRAFT_STREAMING is on) the generation is
+    streamed and ``on_checkpoint(partial_text)`` fires every _STREAM_CHECKPOINT_TOKENS
+    output tokens, so a multi-minute Opus pass leaves partial output behind in S3.
     Returns (text, actual_model_id) so callers can log which model was actually used."""
     try:
         text = invoke_with_opus_fallback(
@@ -86,6 +115,8 @@ def _invoke_draft_with_backoff(prompt):
             fallback_model_id=MODEL_ID,
             label="draft",
             max_tokens=16000,
+            on_checkpoint=on_checkpoint if _STREAMING else None,
+            checkpoint_every=_STREAM_CHECKPOINT_TOKENS,
         )
     except Exception:
         raise
@@ -99,6 +130,78 @@ def _invoke_draft_with_backoff(prompt):
 
 s3 = boto3.client("s3")
 
+# Continuation. A retry that finds a partial Opus draft in the checkpoint continues it
+# from the last complete section rather than regenerating all ~16000 tokens; below this
+# many chars of finished sections a fresh generation is cheaper than the risk of a seam.
+_CONTINUATION_MIN_CHARS = int(os.environ.get("DRAFT_CONTINUATION_MIN_CHARS", "1500"))
+
+
+def _resume_point(partial_text):
+    """The partial draft cut back to its last section boundary: everything before the
+    final "\n## " heading, whose section may still have been mid-sentence. Empty when
+    there is no boundary or too little finished text to be worth continuing."""
+    idx = partial_text.rfind("\n## ")
+    if idx < 0:
+        return ""
+    head = partial_text[:idx].rstrip()
+    return head if len(head) >= _CONTINUATION_MIN_CHARS else ""
+
+
+def _continuation_prompt(prompt, resume_text):
+    return f"""{prompt}
+
+=== DRAFT SO FAR (generation was interrupted; these sections are final) ===
+{resume_text}
+=== END DRAFT SO FAR ===
+
+Continue the post from exactly where the draft above stops. Output ONLY the remaining
+sections, starting with the next "## " heading. Do NOT repeat, summarise or rewrite any
+text above, and keep following every instruction and the writing plan given earlier."""
+
+
+def _join_continuation(resume_text, continuation):
+    """resume_text + continuation, or None when the seam is not clean: the continuation
+    must open with a new H2 heading that the finished sections don't already have, and
+    must not re-emit the finished text (frontmatter, or the draft's first paragraph)."""
+    cont = continuation.strip()
+    if not cont.startswith("## "):
+        return None
+    done_headings = {ln.strip().lower() for ln in resume_text.split("\n") if ln.startswith("## ")}
+    cont_headings = [ln.strip().lower() for ln in cont.split("\n") if ln.startswith("## ")]
+    if done_headings & set(cont_headings):
+        return None
+    opening = next((ln.strip() for ln in resume_text.split("\n") if ln.strip() and not ln.startswith("#")), "")
+    if opening and opening[:80] in cont:
+        return None
+    return f"{resume_text}\n\n{cont}"
+
+
+def _continue_draft(prompt, resume_text, on_checkpoint=None):
+    """Generate the rest of an interrupted draft from ``resume_text``. Returns the joined
+    draft, or None (logged) when the call fails or the seam is rejected — the caller then
+    regenerates from scratch. Streaming checkpoints report the whole draft so far, so a
+    second interruption resumes from the furthest point reached."""
+    try:
+        continuation, _ = _invoke_draft_with_backoff(
+            _continuation_prompt(prompt, resume_text),
+            on_checkpoint=(lambda text: on_checkpoint(f"{resume_text}\n\n{text}")) if on_checkpoint else None)
+    except Exception as e:
+        logger.warning(json.dumps({"event": "draft_continuation_failed", "error": str(e)[:200]}))
+        return None
+    joined = _join_continuation(resume_text, continuation)
+    if joined is None:
+        logger.warning(json.dumps({"event": "draft_continuation_rejected", "resume_chars": len(resume_text),
+                                   "continuation_head": continuation.strip()[:80]}))
+        return None
+    logger.info(json.dumps({"event": "draft_continued", "resume_chars": len(resume_text),
+                            "continued_chars": len(joined) - len(resume_text)}))
+    return joined
+
+# Stream the Opus generation pass so partial output is checkpointed while it runs
+# (see _DraftCheckpoint.save_partial). DRAFT_STREAMING=0 restores the single-shot call.
+_STREAMING = os.environ.get("DRAFT_STREAMING", "1") != "0"
+_STREAM_CHECKPOINT_TOKENS = int(os.environ.get("DRAFT_STREAM_CHECKPOINT_TOKENS", "1000"))
+
 # Lambda context captured at handler entry so audit passes can check remaining budget
 # without threading `context` through every function. Each audit pass takes ~90-130s of
 # Sonnet time; with 7+ sequential passes a 15-min Lambda regularly hits the wall. Polish
@@ -277,7 +380,7 @@ Think carefully, then output a concise revision plan (max 300 words):
         if avoid:
             think_prompt += f"\nAvoid in this revision: {avoid[:200]}"
     else:
-        research_excerpt = research[:800] if research else "None provided"
+        research_excerpt = research[:_PLAN_RESEARCH_CHARS] if research else "None provided"
         think_prompt = f"""You are planning a technical blog post by Khaled Zaky.
 
 Topic: {topic[:300]}
@@ -301,53 +404,97 @@ Think carefully, then output a concise writing plan (max 300 words):
         if analogies:
             think_prompt += f"\nOptional analogies to consider: {analogies[:200]}"
 
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": THINKING_BUDGET + 1500,  # must exceed budget_tokens; 1500 for the plan text itself
-        "temperature": 1,
-        "thinking": {"type": "enabled", "budget_tokens": THINKING_BUDGET},
-        "messages": [{"role": "user", "content": think_prompt}],
-    })
-    response = bedrock.invoke_model(
-        modelId=MODEL_ID,
-        contentType="application/json",
-        accept="application/json",
-        body=body,
+    return _llm_invoke_model(
+        think_prompt,
+        model_id=MODEL_ID,
+        temperature=1,
+        max_tokens=THINKING_BUDGET + 1500,  # must exceed budget_tokens; 1500 for the plan text itself
+        thinking_budget=THINKING_BUDGET,
+        label="draft.thinking_plan",
     )
-    result = json.loads(response["body"].read())
-    text_parts = [
-        block["text"]
-        for block in result["content"]
-        if block.get("type") == "text"
-    ]
-    return "\n".join(text_parts).strip()
 
 
-def _invoke_model(prompt, temperature=0.8, max_tokens=8192, model_id=None):
+# Plan branch: Step Functions runs Draft with mode="plan" in parallel with Research.
+# It polls the stable synthesis sections Research publishes to handoff/{execution_id}.json
+# and, as soon as the research excerpt the thinking plan reads is stable (or the
+# synthesis is complete), writes the first-draft plan to handoff/{execution_id}-plan.json.
+# The main Draft run reuses it when its research still starts with that excerpt, and
+# plans for itself otherwise (no plan yet, a Research retry, a fallback restart).
+_PLAN_RESEARCH_CHARS = 800  # the research excerpt _thinking_plan reads
+_PLAN_WAIT_SECONDS = float(os.environ.get("DRAFT_PLAN_WAIT_SECONDS", "480"))
+_PLAN_POLL_SECONDS = 5
+
+
+def _handoff_keys(event):
+    execution_id = (event.get("execution_id") or "").replace("/", "_")[:80]
+    if not execution_id or not DRAFTS_BUCKET:
+        return None, None
+    return f"handoff/{execution_id}.json", f"handoff/{execution_id}-plan.json"
+
+
+def _load_json(key):
+    """Best-effort S3 JSON read: {} when the object is missing or unreadable."""
+    try:
+        return json.loads(s3.get_object(Bucket=DRAFTS_BUCKET, Key=key)["Body"].read())
+    except Exception as e:
+        if "NoSuchKey" not in str(e) and "NoSuchKey" not in type(e).__name__:
+            logger.warning(json.dumps({"event": "handoff_load_failed", "key": key, "error": str(e)[:200]}))
+        return {}
+
+
+def _plan_from_handoff(event):
+    """mode="plan": wait for enough stable research, then store the thinking plan."""
+    handoff_key, plan_key = _handoff_keys(event)
+    if not handoff_key:
+        return {"planned": False}
+    reset_usage()
+    deadline = time.monotonic() + _PLAN_WAIT_SECONDS
+    while True:
+        handoff = _load_json(handoff_key)
+        research = "".join(s.get("text", "") for s in handoff.get("sections", []))
+        if handoff.get("status") == "complete" or len(research) >= _PLAN_RESEARCH_CHARS:
+            break
+        if handoff.get("status") == "failed" or time.monotonic() >= deadline:
+            logger.info(json.dumps({"event": "plan_handoff_abandoned", "status": handoff.get("status", "missing")}))
+            return {"planned": False}
+        time.sleep(_PLAN_POLL_SECONDS)
+
+    plan = _thinking_plan(handoff.get("topic", ""), handoff.get("author_content", ""), research=research,
+                          voice_profile=_load_voice_profile(), goal=handoff.get("goal", ""),
+                          avoid=handoff.get("avoid", ""), analogies=handoff.get("analogies", ""))
+    s3.put_object(Bucket=DRAFTS_BUCKET, Key=plan_key, ContentType="application/json",
+                  Body=json.dumps({"plan": plan, "research": research[:_PLAN_RESEARCH_CHARS]}).encode("utf-8"))
+    logger.info(json.dumps({"event": "plan_handoff_stored", "chars": len(plan), "research_chars": len(research)}))
+    flush_usage_metrics("draft")
+    return {"planned": True}
+
+
+def _handoff_plan(event, research):
+    """The plan-branch plan for this execution, or None when there is none or it was
+    made from research that differs from ``research``."""
+    _, plan_key = _handoff_keys(event)
+    stored = _load_json(plan_key) if plan_key else {}
+    if not stored.get("plan") or not research.startswith(stored.get("research", "")):
+        return None
+    return stored["plan"]
+
+
+def _invoke_model(prompt, temperature=0.8, max_tokens=8192, model_id=None, label="draft", system=None):
     """Module-local default-model wrapper around the shared Bedrock invoke.
 
     The audit/insertion passes call this without a model_id, defaulting to MODEL_ID
     (Sonnet). The actual request building lives in llm.invoke_model (single source of
-    truth). Pass temperature=None to omit the parameter (required for the Opus model)."""
-    return _llm_invoke_model(prompt, model_id=model_id or MODEL_ID, temperature=temperature, max_tokens=max_tokens)
+    truth). Pass temperature=None to omit the parameter (required for the Opus model).
+    ``label`` names the pass in the per-run usage summary; ``system`` carries the
+    shared audit prefix (see _audit_system)."""
+    return _llm_invoke_model(prompt, model_id=model_id or MODEL_ID, temperature=temperature, max_tokens=max_tokens,
+                             label=label, system=system)
 
 
-def _invoke_haiku(prompt, max_tokens=2048, temperature=0.0):
+def _invoke_haiku(prompt, max_tokens=2048, temperature=0.0, label="draft.haiku"):
     """Deterministic structured passes via Haiku (fast, cheap, no quality loss)."""
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": max_tokens,
-        "temperature": temperature,
-        "messages": [{"role": "user", "content": prompt}],
-    })
-    response = bedrock.invoke_model(
-        modelId=HAIKU_MODEL_ID,
-        contentType="application/json",
-        accept="application/json",
-        body=body,
-    )
-    result = json.loads(response["body"].read())
-    return result["content"][0]["text"]
+    return _llm_invoke_model(prompt, model_id=HAIKU_MODEL_ID, temperature=temperature, max_tokens=max_tokens,
+                             label=label)
 
 
 def _infer_categories(title, post_body, explicit_categories):
@@ -383,7 +530,7 @@ Rules:
 Categories:"""
 
     try:
-        result = _invoke_haiku(prompt, max_tokens=64, temperature=0.0).strip()
+        result = _invoke_haiku(prompt, max_tokens=64, temperature=0.0, label="draft.categories").strip()
         match = re.search(r'\[.*?\]', result, re.DOTALL)
         if match:
             parsed = json.loads(match.group(0))
@@ -432,7 +579,7 @@ def _generate_description(post_body):
         f"POST (first 2000 chars):\n{body[:2000]}"
     )
     try:
-        desc = _invoke_haiku(prompt, max_tokens=120, temperature=0.0).strip()
+        desc = _invoke_haiku(prompt, max_tokens=120, temperature=0.0, label="draft.description").strip()
         desc = re.sub(r'^["\u2018\u2019\u201c\u201d`]|["\u2018\u2019\u201c\u201d`]$', '', desc).strip()
         logger.info(json.dumps({"event": "description_generated", "words": len(desc.split()), "preview": desc[:80]}))
         return desc
@@ -519,13 +666,17 @@ def _strip_haiku_wrapper(text):
     return text
 
 
-def _insert_chart_placeholders(post_body, research):
+def _insert_chart_placeholders(post_body, research, index=None):
     """
     Second LLM pass: scan the draft for quantitative claims that have matching
     data in the research, and insert <!-- CHART: description --> placeholders.
     Only inserts placeholders if the research contains structured data points.
+    With a sources ``index`` the prompt carries just its parsed data points (the
+    exact blocks Chart will match against) instead of the whole research notes.
     """
-    if "- Data point:" not in research:
+    fallback = research if "- Data point:" in research else ""
+    data_points = index.data_points_block() if index is not None else fallback
+    if not data_points:
         logger.info("No structured data points in research — skipping chart placeholder insertion")
         return post_body
 
@@ -536,7 +687,7 @@ BLOG POST DRAFT:
 {post_body}
 
 RESEARCH DATA POINTS (look for "Data point:" entries):
-{research}
+{data_points}
 
 Instructions:
 1. Find places in the draft where a chart would strengthen the argument — ONLY for hard numeric data (percentages, dollar amounts, time comparisons, adoption rates, survey results)
@@ -550,7 +701,7 @@ Instructions:
 If the research data points do not contain clear numeric values, or the post is primarily conceptual/opinion-based, output the draft UNCHANGED — not every post needs a chart."""
 
     try:
-        updated = _invoke_model(insertion_prompt, temperature=0.0, max_tokens=4096)
+        updated = _invoke_model(insertion_prompt, temperature=0.0, max_tokens=4096, label="draft.chart_placeholders")
         updated = updated.strip()
         updated = _strip_haiku_wrapper(updated)
 
@@ -630,7 +781,7 @@ Instructions:
 If the post does not contain concepts that benefit from a diagram, output the draft UNCHANGED."""
 
     try:
-        updated = _invoke_model(insertion_prompt, temperature=0.0, max_tokens=4096)
+        updated = _invoke_model(insertion_prompt, temperature=0.0, max_tokens=4096, label="draft.diagram_placeholders")
         updated = updated.strip()
         updated = _strip_haiku_wrapper(updated)
 
@@ -683,21 +834,161 @@ def _strip_footnotes(post_body):
     return cleaned
 
 
-def _audit_citations(post_body, research):
+_PROMPT_CACHE = os.environ.get("DRAFT_PROMPT_CACHE", "1") != "0"
+
+
+def _audit_system(research, voice_profile=None):
+    """Shared system prefix for the research/voice audits (Passes 5-7).
+
+    Citations, voice, insight and named-entity audits all read the same reference
+    material, so it is sent once as a system block that is byte-identical across the
+    four calls and marked as a prompt-cache breakpoint: the first audit writes the
+    cache and the rest read it. Anything pass-specific (instructions, the draft)
+    belongs in the user turn, after the breakpoint — changing a single byte here
+    would turn every later read into a fresh write. Set DRAFT_PROMPT_CACHE=0 to send
+    the same prefix without the breakpoint."""
+    if voice_profile is None:
+        voice_profile = _voice_profile_cache or ""
+    sections = [_build_site_context()]
+    if voice_profile:
+        sections.append(f"=== VOICE & STYLE GUIDE ===\n{voice_profile}\n=== END VOICE GUIDE ===")
+    if research:
+        sections.append(f"=== RESEARCH NOTES ===\n{research}\n=== END RESEARCH NOTES ===")
+    prefix = ("Reference material for auditing a draft of a technical blog post on khaledzaky.com. "
+              "The task and the draft follow in the user message.\n\n" + "\n\n".join(sections))
+    return [text_block(prefix, cache=_PROMPT_CACHE)]
+
+
+# Edit-script mode for the rewrite audits (Passes 5-6). Most drafts need a handful of
+# link or phrase fixes, yet a full rewrite re-emits the whole post — up to 8192 output
+# tokens, which dominates each pass's wall-clock. The model instead returns a JSON list
+# of {"find", "replace"} edits that _apply_edit_script applies only when every anchor
+# matches exactly once; anything else falls back to the full-rewrite prompt.
+# Set DRAFT_PATCH_AUDITS=0 to always rewrite.
+_PATCH_AUDITS = os.environ.get("DRAFT_PATCH_AUDITS", "1") != "0"
+_PATCH_MAX_TOKENS = int(os.environ.get("DRAFT_PATCH_MAX_TOKENS", "2048"))
+
+
+def _full_rewrite_rules(summary, unchanged_when):
+    return f"""- Output the COMPLETE draft with corrections. Nothing else.
+- If {unchanged_when}, output the draft UNCHANGED.
+
+After the draft, on a new line, output a summary line:
+{summary}
+"""
+
+
+def _edit_script_rules(summary):
+    return f"""- Do NOT output the draft. Output ONLY an edit script: a JSON array of edits, then the summary line.
+- Each edit is {{"find": "<text copied verbatim from the draft>", "replace": "<the corrected text>"}}.
+- "find" must match the draft character for character and occur EXACTLY ONCE in it: include enough
+  surrounding words to make it unique, but keep it to one sentence or list item. Edits must not overlap.
+- To add an annotation comment, replace a sentence with that sentence followed by the comment.
+  To delete text, use "replace": "".
+- If nothing needs fixing, output [] as the edit script.
+
+After the edit script, on a new line, output a summary line:
+{summary}
+"""
+
+
+def _parse_edit_script(text):
+    """The [{"find", "replace"}, ...] array at the start of a model reply (code fences
+    tolerated) as (find, replace) pairs, or None if it is missing or malformed."""
+    start = text.find("[")
+    if start < 0:
+        return None
+    try:
+        edits, _ = json.JSONDecoder().raw_decode(text[start:])
+    except ValueError:
+        return None
+    if not isinstance(edits, list):
+        return None
+    pairs = []
+    for edit in edits:
+        if not (isinstance(edit, dict) and isinstance(edit.get("find"), str) and edit["find"]
+                and isinstance(edit.get("replace"), str)):
+            return None
+        pairs.append((edit["find"], edit["replace"]))
+    return pairs
+
+
+def _apply_edit_script(post_body, edits):
+    """Apply (find, replace) edits to ``post_body`` in one pass. All-or-nothing: returns
+    None if any anchor is missing, ambiguous (matches more than once) or overlaps
+    another edit, so a partially applicable script never half-edits the draft."""
+    spans = []
+    for find, replace in edits:
+        if post_body.count(find) != 1:
+            return None
+        start = post_body.index(find)
+        spans.append((start, start + len(find), replace))
+    spans.sort()
+    out, pos = [], 0
+    for start, end, replace in spans:
+        if start < pos:
+            return None
+        out.append(post_body[pos:start])
+        out.append(replace)
+        pos = end
+    out.append(post_body[pos:])
+    return "".join(out)
+
+
+def _patch_audit(prompt, post_body, label, system):
+    """Run an audit in edit-script mode. Returns the patched draft (the original when
+    the script is empty), or None when the caller should fall back to a full rewrite."""
+    try:
+        reply = _invoke_model(prompt, temperature=0.0, max_tokens=_PATCH_MAX_TOKENS,
+                              label=f"{label}.patch", system=system)
+    except Exception as e:
+        logger.warning(json.dumps({"event": "patch_audit_failed", "audit": label, "error": str(e)[:200]}))
+        return None
+    edits = _parse_edit_script(reply)
+    if edits is None:
+        logger.info(json.dumps({"event": "patch_audit_fallback", "audit": label, "reason": "unparseable"}))
+        return None
+    if not edits:
+        logger.info(json.dumps({"event": "patch_audit_applied", "audit": label, "edits": 0}))
+        return post_body
+    patched = _apply_edit_script(post_body, edits)
+    if patched is None:
+        logger.info(json.dumps({"event": "patch_audit_fallback", "audit": label, "reason": "anchor_mismatch",
+                                "edits": len(edits)}))
+        return None
+    logger.info(json.dumps({"event": "patch_audit_applied", "audit": label, "edits": len(edits)}))
+    return patched.strip()
+
+
+def _placeholders_preserved(before, after):
+    """False (and logged) if a rewrite dropped any CHART/DIAGRAM placeholder comment."""
+    _bc = len(re.findall(r'<!--\s*CHART:', before))
+    _bd = len(re.findall(r'<!--\s*DIAGRAM:', before))
+    _ac = len(re.findall(r'<!--\s*CHART:', after))
+    _ad = len(re.findall(r'<!--\s*DIAGRAM:', after))
+    if (_bc > 0 and _ac < _bc) or (_bd > 0 and _ad < _bd):
+        logger.warning(
+            "Voice audit: placeholder count changed (%d→%d charts, %d→%d diagrams) "
+            "— returning original",
+            _bc, _ac, _bd, _ad,
+        )
+        return False
+    return True
+
+
+def _audit_citations(post_body, research, section=None, focus=""):
     """
     Fourth LLM pass: audit every inline citation in the draft.
     Checks that (1) the URL exists in the research sources, (2) the link text
     accurately describes what the source says, and (3) no claims from different
     sources are merged into a single link. Returns corrected draft.
+    ``section`` is set when auditing a single section (see _audit_citations_by_section),
+    with ``focus`` holding the research blocks relevant to it. ``research`` itself
+    always goes whole into the shared system prefix so every call reads one cache entry.
     """
-    audit_prompt = f"""You are a citation auditor for a technical blog post. Your ONLY job is to verify
-that every inline markdown link in the draft correctly maps to a source from the research notes.
-
-BLOG POST DRAFT:
-{post_body}
-
-RESEARCH SOURCES (look for "URL:" entries and "Verified:" confirmations):
-{research}
+    audit_prompt = """You are a citation auditor for a technical blog post. Your ONLY job is to verify
+that every inline markdown link in the draft correctly maps to a source from the RESEARCH NOTES
+in the system context (look for "URL:" entries and "Verified:" confirmations).
 
 FOOTNOTE CHECK (do this first):
 - If the draft contains ANY footnote syntax ([^1], [^2], [^1]: url, etc.), REMOVE all of it:
@@ -715,9 +1006,7 @@ For EACH inline markdown link [text](url) in the draft, check:
    <!-- CITATION FAIL: [url] - figure "[N]" not found in source excerpt -->
 5. For regulatory citations (EU AI Act articles, NIST sections, RFC numbers), verify the article/section number matches the excerpt in the research. If you cannot confirm, add a comment: <!-- VERIFY: [url] - could not confirm article number -->
 6. For arxiv papers, verify the paper ID appears in the research with a matching title/abstract. If not, REMOVE the link.
-7. INTERNAL LINKS: For any link pointing to khaledzaky.com, verify the exact URL appears in this known-good list. If it does not, REMOVE the link entirely (keep the text as plain prose) — do NOT attempt to fix or guess the correct slug.
-   Known valid khaledzaky.com URLs:
-{chr(10).join(f'   - {SITE_BASE_URL}/blog/{s}/' for s in KNOWN_POST_SLUGS if s)}
+7. INTERNAL LINKS: For any link pointing to khaledzaky.com, verify the exact URL appears in the known-good list of existing posts in the SITE CONTEXT. If it does not, REMOVE the link entirely (keep the text as plain prose) — do NOT attempt to fix or guess the correct slug.
 
 CHART CAPTION SOURCE VERIFICATION:
 After checking inline links, scan for image tags followed by a caption line matching `*Source: ...*`.
@@ -732,14 +1021,22 @@ Rules:
 - Do NOT add new citations that are not in the research
 - Do NOT remove citations that are correct
 - If a URL is not in the research sources but the claim is the author's own opinion, remove the link and keep the text
-- Output the COMPLETE draft with corrections. Nothing else.
-- If all citations are correct, output the draft UNCHANGED.
-
-After the draft, on a new line, output a summary line:
-<!-- CITATION_AUDIT: X checked, Y fixed, Z removed -->"""
-
+"""
+    summary = "<!-- CITATION_AUDIT: X checked, Y fixed, Z removed -->"
+    system = _audit_system(research)
+
+    if _PATCH_AUDITS:
+        patched = _patch_audit(audit_prompt + _edit_script_rules(summary)
+                               + _draft_block(post_body, section, edit_script=True, focus=focus),
+                               post_body, label="draft.citations", system=system)
+        if patched is not None:
+            return patched
+
+    audit_prompt += (_full_rewrite_rules(summary, "all citations are correct")
+                     + _draft_block(post_body, section, edit_script=False, focus=focus))
     try:
-        updated = _invoke_model(audit_prompt, temperature=0.0, max_tokens=8192)
+        updated = _invoke_model(audit_prompt, temperature=0.0, max_tokens=8192, label="draft.citations",
+                                system=system)
         updated = updated.strip()
 
         # Check if audit made changes
@@ -770,12 +1067,14 @@ After the draft, on a new line, output a summary line:
         return post_body
 
 
-def _audit_voice_profile(post_body, voice_profile, feedback=""):
+def _audit_voice_profile(post_body, voice_profile, feedback="", research="", section=None):
     """
     Fifth LLM pass: audit the draft for voice profile compliance.
     Uses Sonnet at 8192 tokens so it can rewrite drafts of any length in one pass.
     Checks contractions, punctuation rules, paragraph length, opening/closing
-    style, forbidden phrases, and formatting conventions.
+    style, forbidden phrases, and formatting conventions. ``research`` only feeds the
+    shared audit prefix (_audit_system) so this pass reads the same prompt cache.
+    ``section`` is set when auditing a single section (see _audit_voice_by_section).
     """
     if not voice_profile:
         return post_body
@@ -784,13 +1083,8 @@ def _audit_voice_profile(post_body, voice_profile, feedback=""):
     logger.info("Voice audit: draft is %d words — rewriting with Sonnet", word_count)
 
     audit_prompt = f"""You are a voice profile auditor for a technical blog. Your ONLY job is to ensure
-the draft strictly follows the voice and style guide below.
-
-VOICE & STYLE GUIDE:
-{voice_profile}
-
-BLOG POST DRAFT:
-{post_body}
+the draft strictly follows the VOICE & STYLE GUIDE in the system context. The research notes
+there are background only — do not use them to change facts or claims.
 
 Check and fix the following:
 1. **Contractions:** The voice profile uses contractions naturally (don't, can't, it's, that's, I'm, I've, they're, we're, it's, doesn't, isn't, wasn't, weren't, haven't, hadn't, won't, wouldn't, couldn't, shouldn't). Fix any "do not", "cannot", "it is", "that is", "I am", "I have", "does not", "is not", "was not", "were not", "have not", "had not", "will not", "would not", "could not", "should not" to contractions where they appear in conversational prose. Do NOT change contractions inside formal definitions, quoted text, or inline code.
@@ -817,14 +1111,22 @@ Check and fix the following:
 - Do NOT change the author's arguments, opinions, or structure
 - Do NOT add or remove sections
 - CRITICAL: Every HTML comment block (<!-- CHART: ... -->, <!-- DIAGRAM: ... -->, <!-- ⚡ INSIGHT: ... -->, <!-- 🔍 ENTITY CHECK: ... -->, <!-- ⚠️ STRUCTURE: ... -->) MUST be preserved EXACTLY as written, in its original position. Do NOT remove, reorder, or alter any HTML comment block.
-- Output the COMPLETE draft with corrections. Nothing else.
-- If the draft already complies, output it UNCHANGED.
-
-After the draft, on a new line, output a summary:
-<!-- VOICE_AUDIT: X issues fixed -->"""
-
+"""
+    summary = "<!-- VOICE_AUDIT: X issues fixed -->"
+    system = _audit_system(research, voice_profile)
+
+    if _PATCH_AUDITS:
+        patched = _patch_audit(audit_prompt + _edit_script_rules(summary)
+                               + _draft_block(post_body, section, edit_script=True),
+                               post_body, label="draft.voice", system=system)
+        if patched is not None and _placeholders_preserved(post_body, patched):
+            return patched
+
+    audit_prompt += (_full_rewrite_rules(summary, "the draft already complies")
+                     + _draft_block(post_body, section, edit_script=False))
     try:
-        updated = _invoke_model(audit_prompt, temperature=0.0, max_tokens=8192)
+        updated = _invoke_model(audit_prompt, temperature=0.0, max_tokens=8192, label="draft.voice",
+                                system=system)
         updated = updated.strip()
 
         audit_match = re.search(r"<!--\s*VOICE_AUDIT:\s*(\d+)\s*issues?\s*fixed", updated)
@@ -838,16 +1140,7 @@ After the draft, on a new line, output a summary:
                 # pattern missed, causing scaffolding to leak into published posts.
                 updated = re.sub(r"\n*<!--\s*VOICE_AUDIT:.*", "", updated, flags=re.DOTALL).strip()
                 # Placeholder guard: reject rewrite if chart/diagram HTML comments were stripped
-                _bc = len(re.findall(r'<!--\s*CHART:', post_body))
-                _bd = len(re.findall(r'<!--\s*DIAGRAM:', post_body))
-                _ac = len(re.findall(r'<!--\s*CHART:', updated))
-                _ad = len(re.findall(r'<!--\s*DIAGRAM:', updated))
-                if (_bc > 0 and _ac < _bc) or (_bd > 0 and _ad < _bd):
-                    logger.warning(
-                        "Voice audit: placeholder count changed (%d\u2192%d charts, %d\u2192%d diagrams) "
-                        "\u2014 returning original",
-                        _bc, _ac, _bd, _ad,
-                    )
+                if not _placeholders_preserved(post_body, updated):
                     return post_body
                 # Safety guard: if the rewritten output is less than 50% of the original,
                 # the model likely only regenerated part of the post before the audit marker.
@@ -878,6 +1171,165 @@ After the draft, on a new line, output a summary:
         return post_body
 
 
+# Section-sharded audits. Passes 5-6 rewrite the whole post in one 8192-token call, so
+# their latency grows with post length and a long post can hit the output cap. Above
+# DRAFT_SECTION_AUDIT_MIN_CHARS the post is split on H2 boundaries and each section is
+# audited concurrently, then stitched back; any sign of a dropped or merged section
+# falls back to the whole-document pass. Set DRAFT_SECTION_AUDITS=0 to disable.
+_SECTION_AUDITS = os.environ.get("DRAFT_SECTION_AUDITS", "1") != "0"
+_SECTION_AUDIT_MIN_CHARS = int(os.environ.get("DRAFT_SECTION_AUDIT_MIN_CHARS", "6000"))
+_SECTION_AUDIT_WORKERS = int(os.environ.get("DRAFT_SECTION_AUDIT_WORKERS", "4"))
+_SECTION_RESEARCH_CHARS = 12000  # research focus budget per section (citation audit user turn)
+_SECTION_WORD_RE = re.compile(r"[a-z][a-z0-9-]{4,}")
+_SECTION_URL_RE = re.compile(r"https?://[^\s)\]>\"']+")
+
+
+def _split_h2_sections(post_body):
+    """Split a draft into [preamble, "## A ...", "## B ...", ...] on H2 headings outside
+    code fences. The preamble (TL;DR, intro) is omitted when empty; joining the parts
+    reproduces the input exactly."""
+    parts, current, in_fence = [], [], False
+    for line in post_body.splitlines(keepends=True):
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        elif not in_fence and line.startswith("## ") and current:
+            parts.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        parts.append("".join(current))
+    return [p for p in parts if p.strip()]
+
+
+def _h2_count(text):
+    return sum(1 for part in _split_h2_sections(text) if part.startswith("## "))
+
+
+def _research_for_section(research, section):
+    """The research blocks (blank-line separated) relevant to one section: every block
+    holding a URL the section cites, then the blocks sharing the most keywords with it,
+    in original order, up to _SECTION_RESEARCH_CHARS. Short research, or a section that
+    matches nothing, gets the full notes."""
+    if len(research) <= _SECTION_RESEARCH_CHARS:
+        return research
+    blocks = [b for b in re.split(r"\n\s*\n", research) if b.strip()]
+    urls = {u.rstrip(".,;") for u in _SECTION_URL_RE.findall(section)}
+    words = set(_SECTION_WORD_RE.findall(section.lower()))
+    scored = []
+    for i, block in enumerate(blocks):
+        cited = any(u in block for u in urls)
+        overlap = len(words & set(_SECTION_WORD_RE.findall(block.lower())))
+        if cited or overlap >= 3:
+            scored.append((not cited, -overlap, i))
+    chosen, used = [], 0
+    for _, _, i in sorted(scored):
+        if used + len(blocks[i]) > _SECTION_RESEARCH_CHARS and chosen:
+            continue
+        chosen.append(i)
+        used += len(blocks[i]) + 2
+    if not chosen:
+        return research
+    return "\n\n".join(blocks[i] for i in sorted(chosen))
+
+
+def _section_scope(index, total, extra="", edit_script=False):
+    """Scope note for a section audit. In edit-script mode it must not ask for the
+    section back — that contradicts _edit_script_rules and the reply would not parse."""
+    position = "the first" if index == 0 else "the last" if index == total - 1 else "a middle"
+    if edit_script:
+        task = "Audit ONLY this section; every edit must anchor on text inside it. "
+    else:
+        task = ("Audit and output ONLY this section, starting with its heading line exactly as given. "
+                "Do not add a title, TL;DR, closing or any other section. ")
+    return (f"SECTION SCOPE: The draft below is section {index + 1} of {total} ({position} section) of a "
+            f"longer post; the other sections are audited separately. {task}{extra}").strip()
+
+
+def _draft_block(post_body, section=None, edit_script=False, focus=""):
+    """The user-turn tail of an audit prompt: the section scope (``section`` is an
+    (index, total, extra) tuple), any research focus, then the draft."""
+    scope = _section_scope(*section, edit_script=edit_script) if section else ""
+    return f"""{f'''
+{scope}
+''' if scope else ''}{f'''
+RESEARCH MOST RELEVANT TO THIS SECTION (excerpted from the research notes in the system context; check these first):
+{focus}
+''' if focus else ''}
+BLOG POST DRAFT:
+{post_body}"""
+
+
+def _sectioned_audit(post_body, label, audit_section, whole_document):
+    """Run ``audit_section(index, section, total)`` over every H2 section concurrently and
+    stitch the results. A section whose result lost or gained an H2 heading keeps its
+    original text; if the stitched draft does not have the original H2 count, or the
+    executor fails, the whole-document audit runs instead. Short or single-section posts
+    go straight to ``whole_document()``."""
+    sections = _split_h2_sections(post_body)
+    if not _SECTION_AUDITS or len(sections) < 2 or len(post_body) < _SECTION_AUDIT_MIN_CHARS:
+        return whole_document()
+
+    total = len(sections)
+    try:
+        with ThreadPoolExecutor(max_workers=min(total, _SECTION_AUDIT_WORKERS)) as ex:
+            results = list(ex.map(lambda i: audit_section(i, sections[i], total), range(total)))
+    except Exception as e:
+        logger.warning(json.dumps({"event": "section_audit_failed", "audit": label, "error": str(e)[:200]}))
+        return whole_document()
+
+    stitched, rejected = [], 0
+    for section, result in zip(sections, results, strict=True):
+        result = (result or "").strip()
+        is_h2 = section.startswith("## ")
+        if not result or result.startswith("## ") != is_h2 or _h2_count(result) != int(is_h2):
+            rejected += 1
+            result = section.strip()
+        stitched.append(result)
+    merged = "\n\n".join(stitched)
+    if _h2_count(merged) != _h2_count(post_body):
+        logger.warning(json.dumps({"event": "section_audit_stitch_invalid", "audit": label, "sections": total}))
+        return whole_document()
+    logger.info(json.dumps({"event": "section_audit_complete", "audit": label, "sections": total,
+                            "rejected": rejected}))
+    return merged
+
+
+def _audit_citations_by_section(post_body, research):
+    """Pass 5, section-sharded. The full research stays in the system prefix, so every
+    section reads the same prompt-cache entry; the blocks relevant to a section are
+    repeated in its user turn to point the audit at them. Sections with no links or
+    chart source captions skip the LLM entirely."""
+    def _one(index, section, total):
+        if "](http" not in section and "*Source:" not in section:
+            return section
+        focus = _research_for_section(research, section)
+        return _audit_citations(section, research, section=(index, total, ""),
+                                focus=focus if focus != research else "")
+
+    return _sectioned_audit(post_body, "citations", _one, lambda: _audit_citations(post_body, research))
+
+
+def _audit_voice_by_section(post_body, voice_profile, feedback="", research=""):
+    """Pass 6, section-sharded. The opening/closing rules are scoped to the first and
+    last sections. The full research stays in the system prefix — it is background
+    only here, and keeping it byte-identical lets every section (and Pass 7) share
+    one prompt-cache entry."""
+    if not voice_profile:
+        return post_body
+
+    def _one(index, section, total):
+        extra = "Rule 9 (description frontmatter) does not apply."
+        if index != 0:
+            extra += " Rule 7 (opening style) does not apply to this section."
+        if index != total - 1:
+            extra += " Rule 6 (closing style) does not apply to this section."
+        return _audit_voice_profile(section, voice_profile, feedback=feedback, research=research,
+                                    section=(index, total, extra))
+
+    return _sectioned_audit(post_body, "voice", _one,
+                            lambda: _audit_voice_profile(post_body, voice_profile, feedback=feedback, research=research))
+
+
 # Deterministic anti-slop patterns. Pass 6 (_audit_voice_profile) is an LLM judge at
 # temperature zero, so it anchors on its examples and misses variants — the exact failure
 # mode this blog argues LLM judges have. _lint_slop runs after it as a deterministic net:
@@ -941,12 +1393,12 @@ def _audit_insight(post_body, research):
     as HTML comments for human review. Strong drafts are returned unchanged.
     Uses 8192 token budget so no length limit — runs on all posts.
     Annotations are stripped by Publish Lambda before committing to GitHub.
+    Reads the full research from the shared, prompt-cached audit prefix.
     """
     word_count = len(post_body.split())
     if word_count < 300:
         return post_body
 
-    research_snippet = research[:3000] if research else ""
     audit_prompt = f"""You are an editorial insight auditor for a technical blog. Your job is to identify
 paragraphs that are generic, obvious, or lack a strong editorial perspective, and annotate them.
 
@@ -982,15 +1434,14 @@ RULES:
 - Frontmatter (the ---...--- block at the top) is exempt -- do not annotate it
 - HTML comment placeholders `<!-- CHART: ... -->` and `<!-- DIAGRAM: ... -->` are exempt -- preserve them EXACTLY as-is, do not annotate or duplicate them
 - Output the full draft with annotations inserted, nothing else
-
-RESEARCH (for suggesting specific improvements):
-{research_snippet}
+- Use the RESEARCH NOTES in the system context for suggesting specific improvements
 
 DRAFT:
 {post_body}"""
 
     try:
-        updated = _invoke_model(audit_prompt, temperature=0.0, max_tokens=8192)
+        updated = _invoke_model(audit_prompt, temperature=0.0, max_tokens=8192, label="draft.insight",
+                                system=_audit_system(research))
         updated = updated.strip()
 
         # Guard: Haiku sometimes prefixes its response with a task acknowledgment preamble
@@ -1082,7 +1533,7 @@ POST BODY:
 {_audit_body}"""
 
     try:
-        result = _invoke_model(prompt, temperature=0.0, max_tokens=8192)
+        result = _invoke_model(prompt, temperature=0.0, max_tokens=8192, label="draft.structure")
         result = result.strip()
 
         audit_match = re.search(r'<!--\s*STRUCTURE_AUDIT:\s*(.*?)\s*-->', result, re.DOTALL)
@@ -1163,10 +1614,9 @@ def _audit_named_entities(post_body, research):
     if not research:
         return post_body
 
-    research_snippet = research[:4000]
     prompt = f"""You are a fact-checking assistant for a technical blog.
 
-TASK: Extract all specific named entities from the DRAFT that could be subtly wrong, then check each against the RESEARCH NOTES.
+TASK: Extract all specific named entities from the DRAFT that could be subtly wrong, then check each against the RESEARCH NOTES in the system context.
 
 Entities to check:
 - Regulation document identifiers (e.g. "SR 26-2", "E-23", "Article 14", "NIST SP 800-218")
@@ -1187,14 +1637,12 @@ RULES:
 - If all entities are verified or hyperlinked, return the draft UNCHANGED
 - Output the complete draft with any annotations inserted, nothing else
 
-RESEARCH NOTES:
-{research_snippet}
-
 DRAFT:
 {post_body}"""
 
     try:
-        result = _invoke_model(prompt, temperature=0.0, max_tokens=8192)
+        result = _invoke_model(prompt, temperature=0.0, max_tokens=8192, label="draft.named_entities",
+                               system=_audit_system(research))
         result = result.strip()
 
         original_start = next((ln.strip() for ln in post_body.split("\n") if ln.strip()), "")
@@ -1247,20 +1695,71 @@ def _collect_annotations(result, marker):
     return pairs
 
 
+_ANCHOR_MIN_SIMILARITY = 0.75
+
+
+def _anchor_index(lines, anchor):
+    """Index of the line `anchor` was taken from: an exact match, else — when a later
+    rewrite pass touched the line (a contraction, a fixed link) — the most similar prose
+    line at or above _ANCHOR_MIN_SIMILARITY. None when nothing is close enough."""
+    stripped_lines = [ln.strip() for ln in lines]
+    if anchor in stripped_lines:
+        return stripped_lines.index(anchor)
+    best, best_ratio = None, _ANCHOR_MIN_SIMILARITY
+    for i, stripped in enumerate(stripped_lines):
+        if not stripped or stripped.startswith("<!--"):
+            continue
+        matcher = difflib.SequenceMatcher(None, anchor, stripped, autojunk=False)
+        if matcher.real_quick_ratio() >= best_ratio and matcher.quick_ratio() >= best_ratio:
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = i, ratio
+    return best
+
+
+_PLACEHOLDER_MARKERS = ("<!-- CHART:", "<!-- DIAGRAM:")
+
+
+def _section_end_near(lines, anchor):
+    """Where to put a placeholder whose anchor line no longer matches: the end of the
+    section (under its nearest heading) holding the line most similar to the anchor,
+    before any blank lines that precede the next heading."""
+    best, best_ratio = None, -1.0
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if anchor and stripped and not stripped.startswith(("<!--", "#")):
+            ratio = difflib.SequenceMatcher(None, anchor, stripped, autojunk=False).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = i, ratio
+    end = len(lines)
+    if best is not None:
+        end = next((j for j in range(best + 1, len(lines)) if lines[j].startswith("#")), len(lines))
+    while end > 0 and not lines[end - 1].strip():
+        end -= 1
+    return end
+
+
 def _apply_annotations(base, pairs):
     """Insert each (anchor, annotation) pair into `base` immediately after the anchor
-    line. Order-independent and idempotent: an annotation already present is skipped,
-    and a missing anchor drops the annotation rather than corrupting the draft."""
+    line. Order-independent and idempotent: an annotation already present is skipped.
+    A review comment whose anchor has no exact or near match is dropped rather than
+    corrupting the draft; a CHART/DIAGRAM placeholder is never dropped — it is logged
+    and appended to the section under the nearest heading instead."""
     lines = base.split("\n")
     existing = set(lines)
     for anchor, annotation in pairs:
-        if anchor is None or annotation in existing:
+        if annotation in existing:
             continue
-        for i, ln in enumerate(lines):
-            if ln.strip() == anchor:
-                lines.insert(i + 1, annotation)
-                existing.add(annotation)
-                break
+        i = _anchor_index(lines, anchor) if anchor is not None else None
+        if i is not None:
+            lines.insert(i + 1, annotation)
+            existing.add(annotation)
+        elif annotation.strip().startswith(_PLACEHOLDER_MARKERS):
+            end = _section_end_near(lines, anchor)
+            logger.warning(json.dumps({"event": "placeholder_anchor_lost", "placeholder": annotation.strip()[:80],
+                                       "anchor": (anchor or "")[:80], "line": end}))
+            lines.insert(end, annotation)
+            existing.add(annotation)
     return "\n".join(lines)
 
 
@@ -1273,17 +1772,18 @@ def _audit_annotations(post_body, research):
     other's output, so running them in parallel removes one full ~90-130s Sonnet
     pass from the Draft Lambda's wall-clock. The merge re-applies each pass's
     annotations to the shared base, so a hiccup in one never discards the other.
-    Set DRAFT_PARALLEL_AUDITS=0 to fall back to sequential execution."""
+    This is the smallest pass graph (_run_passes): two annotation nodes with no
+    dependency between them. Set DRAFT_PARALLEL_AUDITS=0 to fall back to sequential execution."""
     if not _PARALLEL_AUDITS:
         body = _audit_insight(post_body, research)
         return _audit_named_entities(body, research)
 
+    passes = [
+        _Pass("insight", lambda body: _audit_insight(body, research), markers=("⚡ INSIGHT:",)),
+        _Pass("entities", lambda body: _audit_named_entities(body, research), markers=("\U0001f50d ENTITY CHECK:",)),
+    ]
     try:
-        with ThreadPoolExecutor(max_workers=2) as ex:
-            f_insight = ex.submit(_audit_insight, post_body, research)
-            f_entities = ex.submit(_audit_named_entities, post_body, research)
-            r_insight = f_insight.result()
-            r_entities = f_entities.result()
+        merged, _ = _run_passes(passes, post_body)
     except Exception as e:
         # Defensive: the audit functions already swallow their own errors, but if the
         # executor itself fails, fall back to sequential rather than losing the passes.
@@ -1291,11 +1791,9 @@ def _audit_annotations(post_body, research):
         body = _audit_insight(post_body, research)
         return _audit_named_entities(body, research)
 
-    pairs = _collect_annotations(r_insight, "⚡ INSIGHT:") + _collect_annotations(r_entities, "\U0001f50d ENTITY CHECK:")
-    if not pairs:
-        return post_body
-    merged = _apply_annotations(post_body, pairs)
-    logger.info(json.dumps({"event": "parallel_audits_merged", "annotations": len(pairs)}))
+    if merged != post_body:
+        logger.info(json.dumps({"event": "parallel_audits_merged",
+                                "annotations": len(merged.split("\n")) - len(post_body.split("\n"))}))
     return merged
 
 
@@ -1327,6 +1825,16 @@ class _DraftCheckpoint:
     from S3 instead of re-invoking Bedrock — so a transient failure in a late audit
     no longer forces a full, expensive re-generation from the Opus pass.
 
+    A stage that streams its output (the Opus pass) can also persist its partial
+    text mid-generation via ``save_partial``; the partial is cleared as soon as the
+    stage completes. Given the generation prompt, the partial also records it and the
+    text up to the last complete section (``resume``), so a retry can continue the
+    draft from that boundary (_continue_draft) instead of regenerating it.
+
+    Passes scheduled by _run_passes run concurrently and do not form a linear chain,
+    so each one is checkpointed as a node via ``run_node``: its own output (a body,
+    a list of annotation pairs, or a value) is stored under ``nodes[name]``.
+
     All S3 access is best-effort: any failure disables resume for the rest of the
     run and is logged, never raised. Checkpointing must never break a pipeline that
     would otherwise succeed.
@@ -1337,7 +1845,10 @@ class _DraftCheckpoint:
         self.key = key
         self.enabled = bool(bucket and key and _CHECKPOINTS_ENABLED)
         self.completed = []
+        self.nodes = {}
         self._body = None
+        self.partial = None
+        self._lock = threading.Lock()
 
     def load(self):
         """Read any prior checkpoint for this key. Missing object = fresh start."""
@@ -1348,14 +1859,20 @@ class _DraftCheckpoint:
             data = json.loads(obj["Body"].read())
             self.completed = data.get("completed", [])
             self._body = data.get("post_body")
-            if self.completed:
-                logger.info(json.dumps({"event": "checkpoint_resumed", "key": self.key, "stages": self.completed}))
+            self.partial = data.get("partial")
+            self.nodes = data.get("nodes", {})
+            if self.completed or self.nodes:
+                logger.info(json.dumps({"event": "checkpoint_resumed", "key": self.key,
+                                        "stages": self.completed + list(self.nodes)}))
+            if self.partial:
+                logger.info(json.dumps({"event": "checkpoint_partial_found", "stage": self.partial.get("stage"),
+                                        "chars": len(self.partial.get("text", ""))}))
         except Exception as e:
             if "NoSuchKey" not in str(e) and "NoSuchKey" not in type(e).__name__:
                 logger.warning(json.dumps({"event": "checkpoint_load_failed", "error": str(e)[:200]}))
 
     def has(self, stage):
-        return self.enabled and stage in self.completed
+        return self.enabled and (stage in self.completed or stage in self.nodes)
 
     def run(self, stage, fn):
         """Replay `stage` from the checkpoint if already done, else run fn(), persist its
@@ -1365,19 +1882,48 @@ class _DraftCheckpoint:
             return self._body
         result = fn()
         self._body = result
+        self.partial = None
         if stage not in self.completed:
             self.completed.append(stage)
         self._save(stage)
         return result
 
+    def run_node(self, name, fn):
+        """Replay node `name` from the checkpoint if already done, else run fn() and
+        persist its output. Safe to call from concurrent scheduler threads."""
+        if self.enabled and name in self.nodes:
+            logger.info(json.dumps({"event": "checkpoint_skip", "stage": name}))
+            return self.nodes[name]
+        result = fn()
+        with self._lock:
+            self.nodes[name] = result
+            self._save(name)
+        return result
+
+    def save_partial(self, stage, text, prompt=None):
+        """Persist in-flight output for `stage` (called from a streaming generation's
+        checkpoint callback). Completed stages are left untouched."""
+        if not self.enabled:
+            return
+        self.partial = {"stage": stage, "text": text}
+        resume = _resume_point(text)
+        if prompt and resume:
+            self.partial.update(prompt=prompt, resume=resume)
+        self._save(stage)
+
     def _save(self, stage):
         if not self.enabled:
             return
+        data = {"completed": self.completed, "post_body": self._body}
+        if self.partial:
+            data["partial"] = self.partial
+        if self.nodes:
+            data["nodes"] = self.nodes
         try:
             s3.put_object(
                 Bucket=self.bucket,
                 Key=self.key,
-                Body=json.dumps({"completed": self.completed, "post_body": self._body}).encode("utf-8"),
+                Body=json.dumps(data).encode("utf-8"),
                 ContentType="application/json",
             )
         except Exception as e:
@@ -1395,6 +1941,117 @@ class _DraftCheckpoint:
             logger.warning(json.dumps({"event": "checkpoint_cleanup_failed", "error": str(e)[:200]}))
 
 
+# Pass graph. Every pass after the Opus generation is a node that declares which parts
+# of the draft it reads and writes: PROSE (the text itself — a pass that writes it
+# returns a new body) or a named annotation/metadata concern. A node depends on every
+# earlier-declared node that writes something it reads or writes, so declaration order
+# fixes which version of the prose each node sees, and nodes with no such conflict run
+# concurrently. Set DRAFT_PARALLEL_AUDITS=0 to run the graph one node at a time.
+_PROSE = "prose"
+_PASS_WORKERS = 4
+
+
+class _Pass:
+    """One node of the Draft pass graph.
+
+    ``fn(body)`` receives the prose as left by the node's latest PROSE-writing
+    dependency, plus the annotations of any annotation dependency it reads. Its
+    result is interpreted by what the node writes:
+
+      * writes PROSE         -> the new body
+      * ``markers`` given    -> an annotated body; only the comment lines containing
+                                a marker are kept (_collect_annotations) and merged
+                                into the final draft (_apply_annotations)
+      * anything else        -> a value, returned from _run_passes by node name
+
+    ``gate`` (optional) is checked when the node becomes ready; a False gate skips
+    the node unless its output is already checkpointed.
+    """
+
+    def __init__(self, name, fn, reads=(_PROSE,), writes=(), markers=(), gate=None):
+        self.name = name
+        self.fn = fn
+        self.reads = frozenset(reads)
+        # An annotation node's comments are a concern of their own, named after the node.
+        self.writes = frozenset(writes) | (frozenset([name]) if markers else frozenset())
+        self.markers = tuple(markers)
+        self.gate = gate
+
+
+def _pass_dependencies(passes):
+    return {p.name: [q for q in passes[:i] if q.writes & (p.reads | p.writes)] for i, p in enumerate(passes)}
+
+
+def _run_passes(passes, post_body, ckpt=None, on_complete=None):
+    """Run a pass graph over ``post_body`` and return (final_body, values).
+
+    Ready nodes (all dependencies finished) run on a thread pool; each node's output
+    goes through ``ckpt.run_node`` when a checkpoint is given, so a retry replays
+    finished nodes. The final body is the last PROSE write with every annotation
+    node's comments applied on top. ``on_complete(name)`` runs on the calling thread
+    after each node (the handler's Step Functions heartbeat). A node that raises
+    fails the whole run, like a pass in the sequential chain would."""
+    deps = _pass_dependencies(passes)
+    prose_after = {}   # node name -> prose it left behind
+    pairs_of = {}      # annotation node name -> [(anchor, annotation), ...]
+    values = {}
+
+    def _input(p):
+        prose = post_body
+        for q in deps[p.name]:
+            if _PROSE in q.writes:
+                prose = prose_after[q.name]
+        pairs = [pair for q in deps[p.name] if q.markers and q.writes & p.reads for pair in pairs_of[q.name]]
+        return _apply_annotations(prose, pairs) if pairs else prose
+
+    def _execute(p, body):
+        if p.gate is not None and not (ckpt and ckpt.has(p.name)) and not p.gate():
+            logger.warning(json.dumps({"event": "audit_skipped_budget", "audit": p.name,
+                                       "remaining_s": _remaining_seconds()}))
+            return None
+
+        def _effect():
+            result = p.fn(body)
+            if p.markers:
+                return [pair for marker in p.markers for pair in _collect_annotations(result, marker)]
+            return result
+
+        return ckpt.run_node(p.name, _effect) if ckpt else _effect()
+
+    def _record(p, body, effect):
+        prose_after[p.name] = body
+        if effect is None:
+            pairs_of[p.name] = []
+        elif _PROSE in p.writes:
+            prose_after[p.name] = effect
+        elif p.markers:
+            pairs_of[p.name] = [tuple(pair) for pair in effect]
+        else:
+            values[p.name] = effect
+
+    pending = list(passes)
+    running = {}
+    with ThreadPoolExecutor(max_workers=_PASS_WORKERS if _PARALLEL_AUDITS else 1) as ex:
+        while pending or running:
+            for p in [p for p in pending if all(q.name in prose_after for q in deps[p.name])]:
+                pending.remove(p)
+                body = _input(p)
+                running[ex.submit(_execute, p, body)] = (p, body)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                p, body = running.pop(future)
+                _record(p, body, future.result())
+                if on_complete:
+                    on_complete(p.name)
+
+    final = post_body
+    for p in passes:
+        if _PROSE in p.writes:
+            final = prose_after[p.name]
+    pairs = [pair for p in passes if p.markers for pair in pairs_of[p.name]]
+    return (_apply_annotations(final, pairs) if pairs else final), values
+
+
 def handler(event, context):
     """
     Input event:
@@ -1409,7 +2066,10 @@ def handler(event, context):
         "avoid": "optional — comma-separated things to avoid",
         "analogies": "optional — seed analogies to weave in",
         "suggested_title": "...",
-        "suggested_description": "..."
+        "suggested_description": "...",
+        "execution_id": "$$.Execution.Name",
+        "sources_key": "the Research sources index (common/sources.py)",
+        "mode": "optional — \"plan\" runs only the plan branch (see _plan_from_handoff)"
     }
 
     Output:
@@ -1422,8 +2082,14 @@ def handler(event, context):
         "date": "YYYY-MM-DD"
     }
     """
+    # research, author_content and previous_draft may arrive as claim-check pointers.
+    event = hydrate(event)
+    if event.get("mode") == "plan":
+        return _plan_from_handoff(event)
+
     # Capture Lambda context for budget-aware audit gating in the post-generation chain.
     _lambda_context[0] = context
+    reset_usage()
 
     # waitForTaskToken: SFN injects the token so we can send heartbeats and the
     # final success/failure signal ourselves. Falls back gracefully to None for
@@ -1443,6 +2109,7 @@ def handler(event, context):
     previous_draft = event.get("previous_draft", "")
     feedback = event.get("feedback", "")
     draft_body_for_revision = ""
+    sources_index = load_sources_index(event.get("sources_key", ""))
 
     if not research and not previous_draft and not author_content:
         raise ValueError("No research notes, author content, or previous draft provided")
@@ -1629,23 +2296,39 @@ Start directly with the content."""
     ckpt = _DraftCheckpoint(DRAFTS_BUCKET, _checkpoint_key(event, is_revision))
     ckpt.load()
 
+    # A partial Opus draft left by an interrupted attempt is continued from its last
+    # complete section, with the exact prompt (writing plan included) it was started with.
+    partial = ckpt.partial if ckpt.partial and ckpt.partial.get("stage") == "opus_draft" else {}
+    resume = partial.get("resume", "") if not ckpt.has("opus_draft") and partial.get("prompt") else ""
+    if resume:
+        prompt = partial["prompt"]
+
     # The thinking plan only feeds the Opus generation prompt, so skip it entirely when
-    # the Opus stage is already checkpointed (we won't be regenerating).
-    if not ckpt.has("opus_draft"):
+    # the Opus stage is already checkpointed (we won't be regenerating) or being continued.
+    # A first draft reuses the plan the plan branch made while Research was still running.
+    if not ckpt.has("opus_draft") and not resume:
         try:
-            plan = _thinking_plan(topic, author_content, is_revision=is_revision, feedback=feedback, research=research, voice_profile=voice_profile, goal=goal, avoid=avoid, analogies=analogies)
-            logger.info(json.dumps({"event": "thinking_plan_generated", "chars": len(plan), "request_id": request_id}))
+            plan = None if is_revision else _handoff_plan(event, research)
+            reused = plan is not None
+            if not reused:
+                plan = _thinking_plan(topic, author_content, is_revision=is_revision, feedback=feedback, research=research, voice_profile=voice_profile, goal=goal, avoid=avoid, analogies=analogies)
+            logger.info(json.dumps({"event": "thinking_plan_generated", "chars": len(plan), "reused": reused, "request_id": request_id}))
             prompt += f"\n\n=== WRITING PLAN (from extended thinking) ===\n{plan}\n=== END PLAN ==="
         except Exception as e:
             logger.warning(json.dumps({"event": "thinking_plan_failed", "error": str(e)[:200], "request_id": request_id}))
 
     def _generate():
-        try:
-            body, actual_model = _invoke_draft_with_backoff(prompt)
-            logger.info(json.dumps({"event": "draft_generated", "chars": len(body), "model": actual_model, "request_id": request_id}))
-        except Exception as e:
-            logger.error(json.dumps({"event": "draft_failed", "error": str(e)[:200]}))
-            raise RuntimeError(f"Draft generation failed: {e}") from e
+        def _save_partial(text):
+            ckpt.save_partial("opus_draft", text, prompt=prompt)
+
+        body = _continue_draft(prompt, resume, on_checkpoint=_save_partial) if resume else None
+        if body is None:
+            try:
+                body, actual_model = _invoke_draft_with_backoff(prompt, on_checkpoint=_save_partial)
+                logger.info(json.dumps({"event": "draft_generated", "chars": len(body), "model": actual_model, "request_id": request_id}))
+            except Exception as e:
+                logger.error(json.dumps({"event": "draft_failed", "error": str(e)[:200]}))
+                raise RuntimeError(f"Draft generation failed: {e}") from e
 
         # Size regression guard: catch stubs and content loss in revision mode. Raised
         # before the stage is checkpointed, so a bad generation is never cached.
@@ -1677,61 +2360,66 @@ Start directly with the content."""
     post_body = ckpt.run("opus_draft", _generate)
     _heartbeat(task_token)
 
-    # --- Second pass: structural completeness — TL;DR, headings, Next Steps, closing italic ---
-    # Runs HERE, before chart/diagram placeholders, so CHART/DIAGRAM HTML comments are not
-    # yet in the draft. The placeholder guard in _audit_structure can never trip at this
-    # stage, and the tokenization workaround becomes unnecessary (though harmless).
-    if _budget_ok() or ckpt.has("structure"):
-        post_body = ckpt.run("structure", lambda: _audit_structure(post_body, has_author_content=has_author_content))
+    # --- Passes 2b-7: the pass graph (see _Pass / _run_passes) ---
+    # Each pass declares what it reads and writes. Declaration order fixes which
+    # version of the prose a pass sees:
+    #   structure -> citations -> voice           rewrite the prose, in that order
+    #   charts, diagrams, categories               read the post-structure prose only,
+    #                                              so they run alongside citations/voice
+    #   annotations, description                   read the post-voice prose, concurrently
+    # Placeholder and review comments are merged onto the final prose at the end.
+    # Structure and annotations are budget-gated; a checkpointed node always replays.
+    _desc_word_count = len(suggested_description.split()) if suggested_description else 0
+    if _desc_word_count > 0 and _desc_word_count < 20:
+        logger.warning(json.dumps({"event": "description_too_short", "words": _desc_word_count, "description": suggested_description[:120]}))
+    needs_description = not suggested_description or not suggested_description.strip() or _desc_word_count < 20
+
+    def _voice(body):
+        body = _audit_voice_by_section(body, voice_profile, feedback=feedback, research=research)
+        # Deterministic anti-slop net: hard-fixes stray em/en dashes and flags forbidden
+        # phrases / antithesis mic-drops that the probabilistic voice audit can miss.
+        return _lint_slop(body)[0]
+
+    passes = [
+        # Structural completeness (TL;DR, headings, Next Steps, closing italic). Runs
+        # before anything inserts CHART/DIAGRAM comments, so its placeholder guard
+        # can never trip.
+        _Pass("structure", lambda body: _audit_structure(body, has_author_content=has_author_content),
+              writes=(_PROSE,), gate=_budget_ok),
+    ]
+    if is_revision and draft_body_for_revision:
+        # Restore the exact placeholders from the approved previous draft to prevent
+        # non-deterministic type changes across revision rounds.
+        passes.append(_Pass("placeholders", lambda body: _restore_placeholders(body, draft_body_for_revision),
+                            markers=_PLACEHOLDER_MARKERS))
     else:
-        logger.warning(json.dumps({"event": "audit_skipped_budget", "audit": "structure", "remaining_s": _remaining_seconds()}))
-    _heartbeat(task_token)
-
-    # --- Third + Fourth pass: chart and diagram placeholders ---
-    # In revision mode, restore the exact placeholders from the approved previous draft
-    # to prevent non-deterministic type changes across revision rounds.
-    def _placeholders():
-        if is_revision and draft_body_for_revision:
-            return _restore_placeholders(post_body, draft_body_for_revision)
-        body = _insert_chart_placeholders(post_body, research)
-        return _insert_diagram_placeholders(body)
-
-    post_body = ckpt.run("placeholders", _placeholders)
-    _heartbeat(task_token)
-
-    # --- Fourth pass: strip footnotes (deterministic), then audit inline citations ---
-    post_body = ckpt.run("citations", lambda: _audit_citations(_strip_footnotes(post_body), research))
-    _heartbeat(task_token)
-
-    # --- Fifth pass: audit voice profile compliance ---
-    # Voice audit is UNCONDITIONAL — voice/style is the whole point of the agent
-    # and a post in someone else's voice is worse than a post that runs slightly
-    # over polish. Only the lower-value audits below are budget-gated.
-    post_body = ckpt.run("voice", lambda: _audit_voice_profile(post_body, voice_profile, feedback=feedback))
-    # Deterministic anti-slop net: hard-fixes stray em/en dashes and flags forbidden
-    # phrases / antithesis mic-drops that the probabilistic voice audit can miss.
-    post_body, _ = _lint_slop(post_body)
-    _heartbeat(task_token)
+        passes += [
+            _Pass("charts", lambda body: _insert_chart_placeholders(body, research, sources_index), markers=("<!-- CHART:",)),
+            _Pass("diagrams", _insert_diagram_placeholders, markers=("<!-- DIAGRAM:",)),
+        ]
+    passes += [
+        _Pass("categories", lambda body: _infer_categories(suggested_title, body, categories), writes=("categories",)),
+        # Strip footnotes (deterministic), then audit inline citations.
+        _Pass("citations", lambda body: _audit_citations_by_section(_strip_footnotes(body), research), writes=(_PROSE,)),
+        # Voice audit is UNCONDITIONAL — voice/style is the whole point of the agent
+        # and a post in someone else's voice is worse than a post that runs slightly
+        # over polish. Only structure and the annotation audits are budget-gated.
+        _Pass("voice", _voice, writes=(_PROSE,)),
+    ]
+    if not is_revision:
+        # Insight + named-entity review comments; skipped in revision mode (the user is
+        # giving specific edits, not asking for new suggestions).
+        passes.append(_Pass("annotations", lambda body: _audit_annotations(body, research),
+                            markers=("⚡ INSIGHT:", "\U0001f50d ENTITY CHECK:"), gate=_budget_ok))
+    if needs_description:
+        # Haiku 25-40 word meta description from the final prose.
+        passes.append(_Pass("description", _generate_description, writes=("description",)))
 
-    # --- Seventh pass: independent annotation audits (insight + named entities) ---
-    # Both are annotation-only and mutually independent, so they run concurrently and
-    # their review comments are merged (see _audit_annotations). Together they replace
-    # what were two sequential ~90-130s Sonnet passes. Skipped in revision mode (the
-    # user is giving specific edits, not asking for new suggestions). A checkpointed
-    # stage is always replayed — replay is free.
-    if not is_revision and (_budget_ok() or ckpt.has("annotations")):
-        post_body = ckpt.run("annotations", lambda: _audit_annotations(post_body, research))
-    elif not is_revision:
-        logger.warning(json.dumps({"event": "audit_skipped_budget", "audit": "annotations", "remaining_s": _remaining_seconds()}))
-    _heartbeat(task_token)
+    post_body, pass_values = _run_passes(passes, post_body, ckpt=ckpt, on_complete=lambda _: _heartbeat(task_token))
 
     # --- Frontmatter validation: ensure description is populated and meets 20-word minimum ---
-    _desc_word_count = len(suggested_description.split()) if suggested_description else 0
-    if _desc_word_count > 0 and _desc_word_count < 20:
-        logger.warning(json.dumps({"event": "description_too_short", "words": _desc_word_count, "description": suggested_description[:120]}))
-    if not suggested_description or not suggested_description.strip() or _desc_word_count < 20:
-        # Use Haiku to generate a proper 25-40 word meta description
-        suggested_description = _generate_description(post_body)
+    if needs_description:
+        suggested_description = pass_values.get("description", "")
         if not suggested_description:
             # Last-resort fallback: first meaningful sentence from post body
             for line in post_body.split("\n"):
@@ -1767,8 +2455,9 @@ Start directly with the content."""
     safe_desc = safe_desc.strip('"').strip()
     safe_desc = safe_desc.replace('"', '\\"')
 
-    # Infer categories from content if not explicitly provided; never fall back to "tech"
-    final_categories = _infer_categories(suggested_title, post_body, categories)
+    # Categories were inferred in the pass graph (explicit ones pass straight through);
+    # never fall back to "tech"
+    final_categories = pass_values["categories"]
 
     # Normalize — handle double-serialized strings from upstream
     normalized_cats = []
@@ -1800,14 +2489,16 @@ draft: true
     # execution never resumes stale state (the S3 lifecycle rule is the backstop).
     ckpt.done()
 
-    result = {
+    result = offload({
         "title": suggested_title,
         "slug": slug,
         "categories": final_categories,
         "description": suggested_description,
         "markdown": markdown,
         "date": today,
-    }
+        "llm_usage": usage_summary(),
+    })
+    flush_usage_metrics("draft")
     if task_token:
         try:
             _get_sfn().send_task_success(taskToken=task_token, output=json.dumps(result))
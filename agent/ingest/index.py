@@ -75,6 +75,7 @@ def handler(event, context):
         categories = []  # Draft Lambda infers from content if not specified via directive
         tone = ""
         hero = False
+        refresh = False
         goal = ""
         avoid = ""
         analogies = ""
@@ -93,6 +94,9 @@ def handler(event, context):
             elif line_lower.startswith("hero:"):
                 hero = line.split(":", 1)[1].strip().lower() in ("yes", "true", "1")
                 directive_lines.append(line)
+            elif line_lower.startswith("refresh:"):
+                refresh = line.split(":", 1)[1].strip().lower() in ("yes", "true", "1")
+                directive_lines.append(line)
             elif line_lower.startswith("goal:"):
                 goal = line.split(":", 1)[1].strip()
                 directive_lines.append(line)
@@ -118,6 +122,8 @@ def handler(event, context):
             sfn_input["tone"] = tone
         if hero:
             sfn_input["generate_hero"] = True
+        if refresh:
+            sfn_input["refresh_research"] = True
         if goal:
             sfn_input["goal"] = goal
         if avoid:
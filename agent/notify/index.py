@@ -10,13 +10,14 @@ import re
 import urllib.parse
 
 import boto3
+from claimcheck import hydrate
+from llm import flush_usage_metrics, invoke_model, reset_usage, usage_summary
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 sns = boto3.client("sns")
 s3 = boto3.client("s3")
-bedrock = boto3.client("bedrock-runtime", region_name=os.environ.get("AWS_REGION", "us-east-1"))
 cloudwatch = boto3.client("cloudwatch", region_name=os.environ.get("AWS_REGION", "us-east-1"))
 
 SNS_TOPIC_ARN = os.environ.get("SNS_TOPIC_ARN", "")
@@ -66,18 +67,8 @@ def _check_author_intent(author_content, markdown):
     )
 
     try:
-        response = bedrock.invoke_model(
-            modelId=HAIKU_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 512,
-                "temperature": 0.0,
-                "messages": [{"role": "user", "content": prompt}],
-            }),
-        )
-        raw = json.loads(response["body"].read())["content"][0]["text"].strip()
+        raw = invoke_model(prompt, model_id=HAIKU_MODEL_ID, temperature=0.0, max_tokens=512,
+                           label="notify.intent_check").strip()
         raw = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw, flags=re.MULTILINE).strip()
         result = json.loads(raw)
         score = max(0, min(10, int(result.get("score", 0))))
@@ -114,6 +105,36 @@ def _emit_pipeline_metrics(quality_pct, word_count):
         logger.warning(json.dumps({"event": "pipeline_metrics_failed", "error": str(e)[:200]}))
 
 
+def _format_usage_block(llm_usage):
+    """Render the per-stage LLM cost/time breakdown for the review email.
+
+    `llm_usage` maps stage name -> llm.usage_summary() dict (as returned in each
+    Lambda's output). Returns an empty string when no usage data is available."""
+    stages = {name: u for name, u in (llm_usage or {}).items() if isinstance(u, dict) and u.get("calls")}
+    if not stages:
+        return ""
+    lines = []
+    passes = []
+    for name, u in stages.items():
+        lines.append(
+            f"  {name:<9} {u.get('calls', 0):>3} calls  "
+            f"{u.get('input_tokens', 0):>8,} in / {u.get('output_tokens', 0):>7,} out  "
+            f"{u.get('ms', 0) / 1000:>6.1f}s  ${u.get('cost_usd', 0):.3f}"
+        )
+        for label, agg in (u.get("by_label") or {}).items():
+            passes.append((agg.get("ms", 0), label, agg.get("cost_usd", 0)))
+    total_cost = sum(u.get("cost_usd", 0) for u in stages.values())
+    total_s = sum(u.get("ms", 0) for u in stages.values()) / 1000
+    slowest = sorted(passes, reverse=True)[:5]
+    return (
+        f"\n--- LLM COST & TIME (est. ${total_cost:.2f}, {total_s:.0f}s model time) ---\n"
+        + "\n".join(lines)
+        + ("\nSlowest passes:\n" + "\n".join(f"  {label}: {ms / 1000:.1f}s (${cost:.3f})" for ms, label, cost in slowest)
+           if slowest else "")
+        + "\n---\n"
+    )
+
+
 def handler(event, context):
     """
     Input event:
@@ -126,12 +147,14 @@ def handler(event, context):
         "date": "YYYY-MM-DD",
         "charts": [{"filename": "...", "s3_key": "...", "public_path": "..."}],
         "author_content": "author's original draft/bullets (may be empty string)",
+        "llm_usage": {"research": {...}, "draft": {...}, "verify": {...}},  # llm.usage_summary() per stage
         "taskToken": "Step Functions task token for callback"
     }
 
     Stores draft in S3 and sends SNS notification with citation quality summary,
     author intent check, and one-click approval/revision/rejection links.
     """
+    event = hydrate(event)
     title = event.get("title", "Untitled")
     slug = event.get("slug", "untitled")
     markdown = event.get("markdown", "")
@@ -140,6 +163,8 @@ def handler(event, context):
     verification = event.get("verification", {})
     author_content = event.get("author_content", "")
     charts = event.get("charts", [])
+    llm_usage = dict(event.get("llm_usage") or {})
+    reset_usage()
 
     if not DRAFTS_BUCKET:
         raise RuntimeError("DRAFTS_BUCKET not configured — cannot store draft")
@@ -246,8 +271,9 @@ def handler(event, context):
         warnings = verification.get("warnings", 0)
         failures = verification.get("failures", 0)
         unreachable = verification.get("unreachable", 0)
+        unverified = verification.get("unverified", 0)
         if total > 0:
-            reachable = total - unreachable
+            reachable = total - unreachable - unverified
             quality_pct = round(100 * (passed + repaired) / reachable) if reachable else 0
             status_icon = "✅" if failures == 0 else "⚠️"
             verification_block = (
@@ -257,7 +283,9 @@ def handler(event, context):
                 f"Auto-repaired: {repaired}  |  "
                 f"Warnings: {warnings}  |  "
                 f"Failures: {failures}  |  "
-                f"Unreachable: {unreachable}\n"
+                f"Unreachable: {unreachable}"
+                + (f"  |  Unverified (time budget): {unverified}" if unverified else "")
+                + "\n"
                 f"Quality score: {quality_pct}%"
                 + (f"\n⚠️  {failures} citation(s) flagged as FAIL — search for '<!-- ⚠️ CITATION FAIL' in the draft below." if failures > 0 else "")
                 + (f"\n⚡  {repaired} citation(s) were auto-repaired (URLs swapped silently)." if repaired > 0 else "")
@@ -322,6 +350,11 @@ def handler(event, context):
     # Emit CloudWatch quality metrics (always — word count regardless of citation data)
     _emit_pipeline_metrics(quality_pct, _count_words(markdown))
 
+    # Per-stage LLM cost/time breakdown (each upstream Lambda returns its llm_usage summary)
+    llm_usage["notify"] = usage_summary()
+    flush_usage_metrics("notify")
+    usage_block = _format_usage_block(llm_usage)
+
     # Send SNS notification with full post if small enough, summary + download link otherwise.
     # SNS email limit is 256KB. Overhead for action links is ~2KB; guard at 200KB for markdown.
     _SNS_MARKDOWN_LIMIT = 200 * 1024
@@ -338,7 +371,7 @@ def handler(event, context):
 
 Title: {title}
 Date: {date}
-{warnings_block}{verification_block}{intent_block}
+{warnings_block}{verification_block}{intent_block}{usage_block}
 {draft_body}
 
 Download as .md file:
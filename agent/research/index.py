@@ -7,57 +7,85 @@ Architecture:
 - Perplexity reshape:    Haiku (reformulates keyword queries into natural-language questions
                          for Perplexity sonar-pro; runs inside the search executor, overlapping
                          with in-flight Tavily requests)
-- Web search (parallel, both run simultaneously via ThreadPoolExecutor):
-    Tavily     — all 5-8 queries, 8 results each (breadth, structured snippets)
-    Perplexity — first 2 reshaped queries via sonar-pro (synthesis + citation URLs, independent index)
-- Source merge:          deduplicate Tavily results by URL; append Perplexity synthesis block
-                         + any net-new citation URLs not already returned by Tavily
-- Post-search (parallel, both run concurrently via ThreadPoolExecutor):
+- Gather pipeline (_gather_research): one asyncio loop over a bounded executor, ordered by data
+  dependencies rather than stage barriers, capped by RESEARCH_GATHER_DEADLINE_SECONDS:
+    Thinking plan    — Sonnet invoke_model+thinking (_thinking_plan): frames research angles
+                       and suggested post structure. Injected as a RESEARCH PLAN block.
+                       Starts immediately (with tool-URL collection), overlapping the search.
+    Tavily           — all 5-8 queries, 8 results each (breadth, structured snippets). Each result
+                       is URL-verified as soon as it arrives; an all-blocked query is retried at once.
+    Perplexity       — first 2 reshaped queries via sonar-pro (synthesis + citation URLs, independent
+                       index); citations are verified as each answer lands.
     Editorial hooks  — Sonnet (_extract_editorial_hooks): surfaces contradictions, surprises,
                        and expert tensions from Perplexity synthesis + Tavily snippets.
                        Injected into the synthesis prompt as an EDITORIAL HOOKS block.
-    Thinking plan    — Sonnet invoke_model+thinking (_thinking_plan): frames research angles
-                       and suggested post structure. Injected as a RESEARCH PLAN block.
-- Research synthesis:    Opus invoke_model (full generation, hooks + plan injected; SYNTHESIS_MODEL_ID)
-- Cross-reference fact-check: Sonnet (claim verification across sources)
-- Chart data extraction: Haiku (deterministic structured extraction)
+                       Starts once search completes, overlapping the tail of verification.
+- Source merge:          deduplicate Tavily results by URL; append Perplexity synthesis block
+                         + any net-new citation URLs not already returned by Tavily
+- Source verification:   top-3 full-text fetches (format_sources_for_prompt) reuse the pipeline's
+                         verification results; source order stays deterministic
+- Research synthesis:    Opus, streamed (full generation, hooks + plan injected; SYNTHESIS_MODEL_ID)
+                         and split on its "## " section headings as it arrives (_SectionStream)
+- Cross-reference fact-check: Sonnet (claim verification across sources), per section as it completes
+- Chart data extraction: Haiku (deterministic structured extraction), per data section as it completes
+- Handoff (_Handoff):    stable sections published to handoff/{execution_id}.json for the Draft
+                         plan branch that runs alongside Research
+- Sources index:         sources/{execution_id}.json (common/sources.py) — sources, tiers, excerpts,
+                         supported claims and parsed data points; only its key travels downstream
+
+Research cache (_ResearchCache): the gather output, the Opus synthesis and the fact-check/chart-data
+passes are stored per topic fingerprint under research-cache/ with per-component TTLs; a re-run of the
+same topic (or a reworded variant with the same author content) serves fresh components and refreshes
+only the stale ones.
 
 Graceful degradation: if either search key is missing or the call fails, that engine
 is skipped silently — the pipeline always continues with whatever sources are available.
 """
 
-import html
+import asyncio
+import functools
+import hashlib
 import json
 import logging
 import os
 import re
-import urllib.parse
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
 import boto3
-from llm import bedrock, invoke_with_opus_fallback
+import htmltext
+import http_pool
+import pdftext
+import sources
+import urlcache
+from claimcheck import offload
+from llm import flush_usage_metrics, invoke_model, invoke_with_opus_fallback, reset_usage, usage_summary
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
-def _invoke_synthesis_with_backoff(prompt):
+def _invoke_synthesis_with_backoff(prompt, on_checkpoint=None):
     """Opus research synthesis with immediate Sonnet fallback on throttle/access errors.
 
     The retry/fallback contract lives in llm.invoke_with_opus_fallback (shared with
     Draft generation). Synthesis uses a 4096-token output budget — the cross-region
-    inference profile caps maxTokens at 4096."""
+    inference profile caps maxTokens at 4096. ``on_checkpoint`` streams the partial
+    synthesis to _SectionStream."""
     return invoke_with_opus_fallback(
         prompt,
         primary_model_id=SYNTHESIS_MODEL_ID,
         fallback_model_id=MODEL_ID,
         label="synthesis",
         max_tokens=4096,
+        on_checkpoint=on_checkpoint,
+        checkpoint_every=_SYNTHESIS_CHECKPOINT_TOKENS,
     )
 
 
 ssm = boto3.client("ssm", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+s3 = boto3.client("s3")
+DRAFTS_BUCKET = os.environ.get("DRAFTS_BUCKET", "")
 MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "us.anthropic.claude-sonnet-4-6")
 SYNTHESIS_MODEL_ID = os.environ.get("SYNTHESIS_MODEL_ID", "us.anthropic.claude-opus-4-6-v1")
 HAIKU_MODEL_ID = os.environ.get("HAIKU_MODEL_ID", "us.anthropic.claude-haiku-4-5-20251001-v1:0")
@@ -73,26 +101,12 @@ def _smoke_test_thinking():
     is intact. Logs CRITICAL if it fails so CloudWatch alarms fire before a real
     pipeline run wastes tokens on a broken thinking plan."""
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 1200,
-            "temperature": 1,
-            "thinking": {"type": "enabled", "budget_tokens": 1024},
-            "messages": [{"role": "user", "content": "Reply with one word: ready"}],
-        })
-        response = bedrock.invoke_model(
-            modelId=MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        result = json.loads(response["body"].read())
-        has_text = any(b.get("type") == "text" for b in result.get("content", []))
-        if has_text:
+        text = invoke_model("Reply with one word: ready", model_id=MODEL_ID, temperature=1, max_tokens=1200,
+                            thinking_budget=1024, label="research.smoke_test")
+        if text:
             logger.info(json.dumps({"event": "thinking_smoke_test", "status": "ok", "model": MODEL_ID}))
         else:
-            logger.critical(json.dumps({"event": "thinking_smoke_test", "status": "no_text_output",
-                                        "model": MODEL_ID, "content_types": [b.get("type") for b in result.get("content", [])]}))
+            logger.critical(json.dumps({"event": "thinking_smoke_test", "status": "no_text_output", "model": MODEL_ID}))
     except Exception as e:
         logger.critical(json.dumps({"event": "thinking_smoke_test", "status": "failed",
                                      "model": MODEL_ID, "error": str(e)[:300]}))
@@ -125,30 +139,23 @@ def tavily_search(query, max_results=8):
         return []
 
     try:
-        payload = json.dumps({
+        payload = {
             "query": query,
             "max_results": max_results,
             "search_depth": "advanced",
             "include_answer": False,
             "include_raw_content": True,
             "exclude_domains": ["medium.com", "reddit.com", "quora.com", "linkedin.com"],
-        }).encode("utf-8")
-
-        req = urllib.request.Request(
+        }
+        data = http_pool.post_json(
             "https://api.tavily.com/search",
-            data=payload,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-            },
-            method="POST",
+            payload,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=20,
         )
-
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            results = data.get("results", [])
-            logger.info("Tavily returned %d results for: %s", len(results), query[:80])
-            return results
+        results = data.get("results", [])
+        logger.info("Tavily returned %d results for: %s", len(results), query[:80])
+        return results
     except Exception as e:
         logger.warning("Tavily search failed: %s", e)
         return []
@@ -176,7 +183,7 @@ def perplexity_search(query):
         return None
 
     try:
-        payload = json.dumps({
+        payload = {
             "model": PERPLEXITY_MODEL,
             "messages": [
                 {"role": "system", "content": (
@@ -195,38 +202,34 @@ def perplexity_search(query):
             ],
             "max_tokens": 2048,
             "search_recency_filter": "year",
-        }).encode("utf-8")
-
-        req = urllib.request.Request(
+        }
+        data = http_pool.post_json(
             "https://api.perplexity.ai/chat/completions",
-            data=payload,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-            },
-            method="POST",
+            payload,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=30,
         )
-
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            citations = data.get("citations", [])
-            logger.info(json.dumps({
-                "event": "perplexity_search",
-                "query": query[:80],
-                "text_chars": len(text),
-                "citations": len(citations),
-            }))
-            return {"text": text, "citations": citations}
+        text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        citations = data.get("citations", [])
+        logger.info(json.dumps({
+            "event": "perplexity_search",
+            "query": query[:80],
+            "text_chars": len(text),
+            "citations": len(citations),
+        }))
+        return {"text": text, "citations": citations}
     except Exception as e:
         logger.warning(json.dumps({"event": "perplexity_search_failed", "error": str(e)[:200]}))
         return None
 
 
-def _format_perplexity_block(perplexity_results, tavily_urls):
+def _format_perplexity_block(perplexity_results, tavily_urls, prechecked=None):
     """Format Perplexity synthesis results into a prompt source block.
     Verifies citation URLs in parallel and only includes confirmed-reachable ones.
-    Only includes citation URLs that Tavily did not already return."""
+    Only includes citation URLs that Tavily did not already return.
+    ``prechecked`` maps URL -> verify_url result (or None for a check that missed the
+    gather deadline) for citations the search pipeline already verified."""
+    prechecked = prechecked or {}
     if not perplexity_results:
         return ""
 
@@ -247,10 +250,11 @@ def _format_perplexity_block(perplexity_results, tavily_urls):
         return ""
 
     # Verify citation URLs in parallel before including them in the prompt
-    new_urls = []
-    if candidate_urls:
-        with ThreadPoolExecutor(max_workers=min(len(candidate_urls), 6)) as executor:
-            futures = {executor.submit(verify_url, u): u for u in candidate_urls}
+    new_urls = [u for u in candidate_urls if prechecked.get(u) and prechecked[u][0]]
+    unchecked = [u for u in candidate_urls if u not in prechecked]
+    if unchecked:
+        with ThreadPoolExecutor(max_workers=min(len(unchecked), 6)) as executor:
+            futures = {executor.submit(verify_url, u): u for u in unchecked}
             for future in as_completed(futures):
                 url = futures[future]
                 try:
@@ -303,20 +307,9 @@ Rewrite each as a Perplexity synthesis question that will elicit:
 
 Output ONLY the reshaped questions, one per line, same count as input, no numbering, no preamble."""
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 500,
-            "temperature": 0.3,
-            "messages": [{"role": "user", "content": prompt}],
-        })
-        response = bedrock.invoke_model(
-            modelId=HAIKU_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        result = json.loads(response["body"].read())
-        reshaped = [q.strip() for q in result["content"][0]["text"].strip().splitlines() if q.strip()]
+        raw = invoke_model(prompt, model_id=HAIKU_MODEL_ID, temperature=0.3, max_tokens=500,
+                           label="research.perplexity_reshape")
+        reshaped = [q.strip() for q in raw.strip().splitlines() if q.strip()]
         reshaped = reshaped[:len(keyword_queries)]
         if len(reshaped) == len(keyword_queries):
             logger.info(json.dumps({"event": "perplexity_queries_reshaped", "count": len(reshaped)}))
@@ -366,20 +359,8 @@ Do not pad with generics. Only output what is genuinely non-obvious.
 SOURCES:
 {input_text}"""
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 2048,
-            "temperature": 0.3,
-            "messages": [{"role": "user", "content": prompt}],
-        })
-        response = bedrock.invoke_model(
-            modelId=MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        result = json.loads(response["body"].read())
-        hooks = result["content"][0]["text"].strip()
+        hooks = invoke_model(prompt, model_id=MODEL_ID, temperature=0.3, max_tokens=2048,
+                             label="research.editorial_hooks").strip()
         if hooks:
             logger.info(json.dumps({"event": "editorial_hooks_extracted", "chars": len(hooks)}))
             return f"\n\n=== EDITORIAL HOOKS (contradictions, surprises, tensions from research) ===\n{hooks}\n=== END HOOKS ==="
@@ -413,26 +394,8 @@ Think carefully, then output a concise research plan (max 400 words):
         think_prompt += f"\nOptional analogy seeds to consider: {analogies[:200]}"
 
     _plan_budget = min(THINKING_BUDGET, 1500)  # budget_tokens must be < max_tokens (2500)
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 2500,
-        "temperature": 1,
-        "thinking": {"type": "enabled", "budget_tokens": _plan_budget},
-        "messages": [{"role": "user", "content": think_prompt}],
-    })
-    response = bedrock.invoke_model(
-        modelId=MODEL_ID,
-        contentType="application/json",
-        accept="application/json",
-        body=body,
-    )
-    result = json.loads(response["body"].read())
-    text_parts = [
-        block["text"]
-        for block in result["content"]
-        if block.get("type") == "text"
-    ]
-    return "\n".join(text_parts).strip()
+    return invoke_model(think_prompt, model_id=MODEL_ID, temperature=1, max_tokens=2500,
+                        thinking_budget=_plan_budget, label="research.thinking_plan")
 
 
 def build_search_queries(topic, author_content):
@@ -448,20 +411,8 @@ Rules:
 - Output ONLY the queries, one per line, no numbering, no extra text"""
 
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 300,
-            "temperature": 0.3,
-            "messages": [{"role": "user", "content": prompt}],
-        })
-        response = bedrock.invoke_model(
-            modelId=HAIKU_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        result = json.loads(response["body"].read())
-        queries = [q.strip() for q in result["content"][0]["text"].strip().splitlines() if q.strip()]
+        raw = invoke_model(prompt, model_id=HAIKU_MODEL_ID, temperature=0.3, max_tokens=300, label="research.queries")
+        queries = [q.strip() for q in raw.strip().splitlines() if q.strip()]
         queries = queries[:8]
         logger.info(json.dumps({"event": "queries_generated", "count": len(queries)}))
         return queries
@@ -471,81 +422,178 @@ Rules:
 
 
 def verify_url(url, timeout=10):
-    """Verify a URL resolves with HTTP HEAD (falls back to GET). Returns (ok, status, title)."""
+    """Verify a URL resolves with HTTP HEAD (falls back to GET). Returns (ok, status, title).
+
+    Outcomes are shared through urlcache (per-status TTLs, negative entries for 403
+    domains), so a URL already checked this run, by Verify, or by a recent post is
+    answered without a request."""
+    cached = urlcache.lookup(url)
+    if cached is not None:
+        return cached["ok"], cached["status"], cached.get("title", "")
+    ok, status, title, final_url, chunk = _check_url(url, timeout)
+    urlcache.store(url, status=status, ok=ok, final_url=final_url, title=title, body=chunk)
+    return ok, status, title
+
+
+def _check_url(url, timeout):
+    """Network half of verify_url. Returns (ok, status, title, final_url, body_read)."""
     for method in ("HEAD", "GET"):
         try:
-            req = urllib.request.Request(
-                url,
-                method=method,
-                headers={"User-Agent": "BlogAgent/1.0 (link-checker)"},
-            )
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
+            with http_pool.request(method, url, headers={"User-Agent": "BlogAgent/1.0 (link-checker)"},
+                                   timeout=timeout) as resp:
                 status = resp.getcode()
+                if status >= 400:
+                    if method == "HEAD" and status in (403, 405):
+                        continue
+                    logger.warning("URL verify %s failed (%s): HTTP %d", url[:80], method, status)
+                    return False, status, "", resp.url, ""
                 title = ""
-                if method == "GET":
-                    # Try to extract <title> from first 4KB for content matching
+                chunk = ""
+                if method == "GET" and not pdftext.is_pdf(resp.headers.get("Content-Type", "")):
+                    # Parse just the <head> (capped at 16KB) for the title used in content matching
                     try:
-                        chunk = resp.read(4096).decode("utf-8", errors="ignore")
-                        m = re.search(r"<title[^>]*>([^<]+)</title>", chunk, re.IGNORECASE)
-                        if m:
-                            title = m.group(1).strip()
+                        page = htmltext.extract_response(resp, max_chars=0, max_bytes=16384)
+                        title = page.title
+                        chunk = f"{page.title}\n{page.description}\n{page.canonical}".strip()
                     except Exception:
                         pass
                 if 200 <= status < 400:
-                    return True, status, title
-        except urllib.error.HTTPError as e:
-            if method == "HEAD" and e.code in (403, 405):
-                continue
-            logger.warning("URL verify %s failed (%s): HTTP %d", url[:80], method, e.code)
-            return False, e.code, ""
+                    return True, status, title, resp.url, chunk
         except Exception as e:
             if method == "HEAD":
                 continue
             logger.warning("URL verify %s failed: %s", url[:80], e)
-            return False, 0, ""
-    return False, 0, ""
-
-
-def fetch_full_article(url, max_bytes=8192):
-    """Fetch up to max_bytes of a page and extract visible text (strip HTML tags)."""
+            return False, 0, "", url, ""
+    return False, 0, "", url, ""
+
+
+def fetch_full_article(url, max_bytes=262144, max_chars=4000):
+    """Stream a page and extract up to max_chars of visible body text (4000 — prompt
+    budget), reading no more than max_bytes. Skips script/style/nav/footer subtrees, so
+    script-heavy pages still yield article text; falls back to the meta description.
+    PDFs (reports, papers) go through pdftext on a range-bounded prefix instead."""
+    headers = {"User-Agent": "BlogAgent/1.0 (research-fetcher)"}
+    if pdftext.is_pdf("", url):
+        headers.update(pdftext.RANGE_HEADER)
     try:
-        req = urllib.request.Request(
-            url,
-            headers={"User-Agent": "BlogAgent/1.0 (research-fetcher)"},
-        )
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            raw = resp.read(max_bytes).decode("utf-8", errors="ignore")
-            # Strip scripts/styles first
-            raw = re.sub(r"<(script|style)[^>]*>.*?</(script|style)>", " ", raw, flags=re.DOTALL | re.IGNORECASE)
-            # Strip all remaining tags
-            text = re.sub(r"<[^>]+>", " ", raw)
-            text = html.unescape(text)
-            text = re.sub(r"\s+", " ", text).strip()
-            return text[:4000]  # cap at 4000 chars for prompt budget
+        with http_pool.get(url, headers=headers, timeout=15) as resp:
+            resp.raise_for_status()
+            if pdftext.is_pdf(resp.headers.get("Content-Type", ""), url):
+                return pdftext.extract_cached(resp.read(pdftext.MAX_BYTES), max_chars=max_chars).text
+            page = htmltext.extract_response(resp, max_chars=max_chars, max_bytes=max_bytes)
+            return page.text or page.description
     except Exception as e:
         logger.warning("Full article fetch failed for %s: %s", url[:80], e)
         return ""
 
 
-def format_sources_for_prompt(search_results):
+# Source verification fan-out (format_sources_for_prompt). Every deduplicated Tavily
+# result is verified concurrently on a bounded pool; anything still in flight when the
+# deadline passes is dropped as unverified rather than stalling synthesis on one slow host.
+_SOURCE_VERIFY_WORKERS = int(os.environ.get("SOURCE_VERIFY_WORKERS", "8"))
+_SOURCE_VERIFY_DEADLINE_SECONDS = float(os.environ.get("SOURCE_VERIFY_DEADLINE_SECONDS", "30"))
+_FULL_FETCH_LIMIT = 3
+
+
+def _verify_and_maybe_fetch(url, fetch):
+    """Pool task: verify ``url`` and, when ``fetch`` is set and it resolves, fetch its
+    full text in the same task. Returns (ok, status, title, body_text or None)."""
+    ok, status, title = verify_url(url)
+    body = fetch_full_article(url) if ok and fetch else None
+    return ok, status, title, body
+
+
+def _future_value(future):
+    """Result of a finished future; None if it is still running or raised."""
+    if not future.done() or future.cancelled():
+        return None
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning("Source verification task failed: %s", e)
+        return None
+
+
+_AUTHORITY_LABELS = {
+    "academic": "HIGH — academic/government",
+    "vendor": "HIGH — vendor official docs",
+    "industry": "HIGH — industry research",
+    "standard": "STANDARD",
+}
+
+
+def format_sources_for_prompt(search_results, prechecked=None, deadline=None):
     """Format Tavily search results into a sources block for the prompt.
     Verifies each URL, fetches full article text for top 3 results.
-    Returns a tuple (sources_block: str, verified_count: int)."""
+    Returns a tuple (sources_block: str, verified_count: int).
+
+    Verification and full-text fetches run concurrently (SOURCE_VERIFY_WORKERS) under one
+    overall deadline (SOURCE_VERIFY_DEADLINE_SECONDS), but the output is identical to the
+    old serial walk: sources keep search-result order, and the full fetches go to the first
+    three verified results without Tavily raw_content. Those fetches are started optimistically
+    alongside verification for the first three candidates; if one of them fails to verify,
+    the next candidate in order is fetched afterwards.
+
+    ``prechecked`` maps URL -> verify_url result for URLs the search pipeline already
+    verified (None = missed the deadline; dropped), and ``deadline`` (time.monotonic())
+    replaces the local deadline so the pipeline's global one is honoured."""
     if not search_results:
         return "", 0
+    prechecked = prechecked or {}
 
-    sources = []
+    results = []
     seen_urls = set()
-    dropped = 0
-    full_fetch_count = 0
-
-    for _, r in enumerate(search_results):
+    for r in search_results:
         url = r.get("url", "")
         if url in seen_urls:
             continue
         seen_urls.add(url)
+        results.append(r)
 
-        ok, status, page_title = verify_url(url)
+    needs_fetch = [i for i, r in enumerate(results) if not (r.get("raw_content") or "")]
+    speculative = set(needs_fetch[:_FULL_FETCH_LIMIT])
+
+    if deadline is None:
+        deadline = time.monotonic() + _SOURCE_VERIFY_DEADLINE_SECONDS
+    executor = ThreadPoolExecutor(max_workers=max(1, min(len(results), _SOURCE_VERIFY_WORKERS)))
+    try:
+        checked = [None] * len(results)
+        futures = {}
+        for i, r in enumerate(results):
+            url = r.get("url", "")
+            if url in prechecked:
+                checked[i] = (*prechecked[url], None) if prechecked[url] is not None else None
+            else:
+                futures[i] = executor.submit(_verify_and_maybe_fetch, url, i in speculative)
+        if futures:
+            wait(list(futures.values()), timeout=max(0.0, deadline - time.monotonic()))
+        for i, future in futures.items():
+            checked[i] = _future_value(future)
+
+        # Deterministic "top 3": the first verified results without raw_content, in order.
+        fetch_targets = [i for i in needs_fetch if checked[i] and checked[i][0]][:_FULL_FETCH_LIMIT]
+        late = {i: executor.submit(fetch_full_article, results[i].get("url", ""))
+                for i in fetch_targets if checked[i][3] is None}
+        if late:
+            wait(list(late.values()), timeout=max(0.0, deadline - time.monotonic()))
+        bodies = {i: checked[i][3] for i in fetch_targets}
+        for i, future in late.items():
+            bodies[i] = _future_value(future)
+    finally:
+        # Never block on stragglers past the deadline — their results are discarded anyway.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    source_entries = []
+    dropped = 0
+    timed_out = 0
+    for i, r in enumerate(results):
+        url = r.get("url", "")
+        if checked[i] is None:
+            logger.warning("Dropping source that missed the verification deadline: %s", url[:80])
+            dropped += 1
+            timed_out += 1
+            continue
+        ok, status, page_title, _ = checked[i]
         if not ok:
             logger.warning("Dropping unverified source: %s (status=%d)", url[:80], status)
             dropped += 1
@@ -559,9 +607,8 @@ def format_sources_for_prompt(search_results):
         if raw_content:
             body_text = raw_content[:4000]
             content_label = "Full content (via Tavily)"
-        elif full_fetch_count < 3:
-            body_text = fetch_full_article(url)
-            full_fetch_count += 1
+        elif i in bodies and bodies[i] is not None:
+            body_text = bodies[i]
             content_label = "Full content (fetched)"
         else:
             body_text = snippet
@@ -569,23 +616,17 @@ def format_sources_for_prompt(search_results):
 
         verified_note = f"  Page title: {page_title}" if page_title else ""
         # Tag source authority level to help the LLM weight citations
-        authority = "STANDARD"
-        url_lower = url.lower()
-        if any(d in url_lower for d in (".gov", "ieee.org", "acm.org", "arxiv.org", "nist.gov", "ietf.org", "w3.org")):
-            authority = "HIGH — academic/government"
-        elif any(d in url_lower for d in ("aws.amazon.com", "cloud.google.com", "learn.microsoft.com", "docs.github.com")):
-            authority = "HIGH — vendor official docs"
-        elif any(d in url_lower for d in ("gartner.com", "mckinsey.com", "forrester.com", "deloitte.com")):
-            authority = "HIGH — industry research"
-        sources.append(
+        authority = _AUTHORITY_LABELS[sources.authority_tier(url)]
+        source_entries.append(
             f"- **{title}**\n  URL: {url}\n  Authority: {authority}\n  {content_label}: {body_text}\n  Verified: YES (HTTP {status}){verified_note}"
         )
 
     if dropped:
         logger.info("Dropped %d unverified source(s) from results", dropped)
-    logger.info(json.dumps({"event": "sources_verified", "verified": len(sources), "dropped": dropped}))
+    logger.info(json.dumps({"event": "sources_verified", "verified": len(source_entries), "dropped": dropped,
+                            "timed_out": timed_out}))
 
-    if not sources:
+    if not source_entries:
         return "", 0
 
     return (
@@ -597,9 +638,12 @@ def format_sources_for_prompt(search_results):
         "over STANDARD sources when multiple sources support the same claim. "
         "Do NOT fabricate or hallucinate any sources — only cite what is provided here "
         "or clearly label any additional context as coming from your training data.\n\n"
-        + "\n\n".join(sources)
+        + "\n\n".join(source_entries)
         + "\n--- END SOURCES ---\n"
-    ), len(sources)
+    ), len(source_entries)
+
+
+_CHART_DATA_HEADING = "### Quantitative Data Points (for chart generation)\n\n"
 
 
 def _extract_chart_data(research_text):
@@ -639,27 +683,16 @@ Example of correct output:
 
     try:
         # Chart extraction is deterministic/structured — use Haiku (fast, cheap, no quality loss)
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 1024,
-            "temperature": 0.0,
-            "messages": [{"role": "user", "content": extraction_prompt}],
-        })
-        response = bedrock.invoke_model(
-            modelId=HAIKU_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        result = json.loads(response["body"].read())
-        extracted = result["content"][0]["text"].strip()
+        # Temperature 0, so a retried Research Task replays this from the llm response cache.
+        extracted = invoke_model(extraction_prompt, model_id=HAIKU_MODEL_ID, temperature=0.0, max_tokens=1024,
+                                 label="research.chart_data").strip()
 
         if "NO_CHART_DATA" in extracted:
             logger.info("No chartable data found in research")
             return ""
 
         logger.info("Extracted chart data: %d chars", len(extracted))
-        return "### Quantitative Data Points (for chart generation)\n\n" + extracted
+        return _CHART_DATA_HEADING + extracted
 
     except Exception as e:
         logger.warning("Chart data extraction failed: %s", e)
@@ -681,20 +714,9 @@ TEXT:
 Output only the names, one per line, no preamble, no numbering."""
 
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 300,
-            "temperature": 0.0,
-            "messages": [{"role": "user", "content": extract_prompt}],
-        })
-        response = bedrock.invoke_model(
-            modelId=HAIKU_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        result = json.loads(response["body"].read())
-        entities = [e.strip() for e in result["content"][0]["text"].strip().splitlines() if e.strip()]
+        raw = invoke_model(extract_prompt, model_id=HAIKU_MODEL_ID, temperature=0.0, max_tokens=300,
+                           label="research.tool_entities")
+        entities = [e.strip() for e in raw.strip().splitlines() if e.strip()]
         entities = entities[:10]
         logger.info(json.dumps({"event": "tool_entities_extracted", "count": len(entities)}))
     except Exception as e:
@@ -745,15 +767,24 @@ Output only the names, one per line, no preamble, no numbering."""
 def _cross_reference_check(research_text, all_results):
     """Sonnet pass: extract key factual claims from research and verify each is
     supported by at least one source. Appends a fact-check summary section."""
-    if not all_results:
+    fact_check = _fact_check(research_text, all_results)
+    if not fact_check:
         return research_text
+    return research_text + "\n\n### Fact-Check Summary\n\n" + fact_check
+
+
+def _fact_check(research_text, all_results, claims="5-8"):
+    """The claim blocks of the cross-reference check for ``research_text`` (a whole
+    synthesis or one section of it), or "" when there are no sources or the call fails."""
+    if not all_results:
+        return ""
 
     source_urls = [r.get("url", "") for r in all_results if r.get("url")]
     source_titles = [r.get("title", "") for r in all_results if r.get("title")]
     source_list = "\n".join(f"- {t} ({u})" for t, u in zip(source_titles, source_urls, strict=False))[:2000]
 
     prompt = f"""You are a fact-checking assistant. Review the research notes below and identify
-the 5-8 most specific factual claims (statistics, percentages, dates, named studies, product
+the {claims} most specific factual claims (statistics, percentages, dates, named studies, product
 capabilities). For each claim, state whether it is:
 - SUPPORTED: directly backed by one of the provided sources
 - UNVERIFIED: plausible but not in the provided sources (from training data)
@@ -773,25 +804,463 @@ SOURCE: [source title or 'training data' or 'none']
 Be concise. Output only the structured claim blocks."""
 
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 2048,
-            "temperature": 0.0,
-            "messages": [{"role": "user", "content": prompt}],
-        })
-        response = bedrock.invoke_model(
-            modelId=MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        result = json.loads(response["body"].read())
-        fact_check = result["content"][0]["text"].strip()
+        fact_check = invoke_model(prompt, model_id=MODEL_ID, temperature=0.0, max_tokens=2048,
+                                  label="research.cross_reference").strip()
         logger.info(json.dumps({"event": "fact_check_complete", "chars": len(fact_check)}))
-        return research_text + "\n\n### Fact-Check Summary\n\n" + fact_check
+        return fact_check
     except Exception as e:
         logger.warning("Cross-reference fact-check failed: %s", e)
-        return research_text
+        return ""
+
+
+# --- Sectioned synthesis -------------------------------------------------------
+# The synthesis streams (invoke_with_opus_fallback with on_checkpoint) and is split
+# on its "## " section headings as it arrives. A section is stable once the next
+# heading starts: its post-passes start immediately on a small executor — the
+# cross-reference fact-check for sections that carry claims, chart extraction for
+# sections that carry data points — and the stable prefix is published to
+# handoff/{execution_id}.json so the Draft plan branch can start its thinking plan
+# before Research returns. When the stream ends only the last section's passes are
+# left to wait for. A synthesis with no "## " headings is checked as one section,
+# exactly as before. RESEARCH_SECTIONED_SYNTHESIS=0 restores the single blocking call.
+_SECTIONED_SYNTHESIS = os.environ.get("RESEARCH_SECTIONED_SYNTHESIS", "1") != "0"
+_SECTION_WORKERS = int(os.environ.get("RESEARCH_SECTION_WORKERS", "4"))
+_SYNTHESIS_CHECKPOINT_TOKENS = 150
+_SECTION_FACT_CHECK_MIN_CHARS = 200
+_SECTION_HEADING_RE = re.compile(r"^##[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+_DATA_SECTION_RE = re.compile(r"quantitative|data points", re.IGNORECASE)
+_META_SECTION_RE = re.compile(r"suggested (title|description|categories)", re.IGNORECASE)
+_SECTION_FORMAT_RULE = """
+SECTION FORMAT: Start each numbered section above with a level-2 markdown heading
+(e.g. "## Supporting Evidence") and use ### or lower for anything inside a section."""
+
+
+def _split_sections(text):
+    """(title, text) for each "## " section of ``text``, in order. Text before the
+    first heading is a section titled "". Joining the texts reproduces ``text``."""
+    starts = [m.start() for m in _SECTION_HEADING_RE.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(text)]
+    sections = []
+    for start, end in zip(bounds, bounds[1:], strict=False):
+        m = _SECTION_HEADING_RE.match(text, start)
+        sections.append((m.group(1).strip() if m else "", text[start:end]))
+    return [s for s in sections if s[1]]
+
+
+def _section_passes(title, text, whole):
+    """Which post-passes a section needs: ("fact_check", "chart_data") subset."""
+    passes = []
+    if _META_SECTION_RE.search(title):
+        return passes
+    if whole or (len(text.strip()) >= _SECTION_FACT_CHECK_MIN_CHARS and ("](http" in text or re.search(r"\d", text))):
+        passes.append("fact_check")
+    if whole or _DATA_SECTION_RE.search(title) or "- Data point:" in text:
+        passes.append("chart_data")
+    return passes
+
+
+class _SectionStream:
+    """Incremental section splitter for the streamed synthesis.
+
+    ``feed`` is the streaming checkpoint callback: each call receives the whole
+    synthesis so far, and every section that became stable since the last call has
+    its post-passes submitted and is reported to ``on_stable(sections)``. A fallback
+    that restarts generation (the text no longer extends what was seen) discards the
+    stale sections and their passes. ``finish`` takes the final text, runs whatever
+    is left and returns the research notes with the fact-check summary and chart data
+    appended, in section order.
+    """
+
+    def __init__(self, all_results, on_stable=None):
+        self.all_results = all_results
+        self.on_stable = on_stable
+        self.sections = []   # stable (title, text), in order
+        self.futures = {}    # (section index, pass) -> future
+        self._executor = ThreadPoolExecutor(max_workers=_SECTION_WORKERS)
+
+    def _stable_text(self):
+        return "".join(text for _, text in self.sections)
+
+    def _restart(self):
+        for future in self.futures.values():
+            future.cancel()
+        self.futures = {}
+        self.sections = []
+        logger.info(json.dumps({"event": "synthesis_stream_restarted"}))
+
+    def _submit(self, sections, whole=False):
+        for title, text in sections:
+            i = len(self.sections)
+            self.sections.append((title, text))
+            for name in _section_passes(title, text, whole):
+                if name == "fact_check":
+                    claims = "5-8" if whole else "2-4"
+                    self.futures[(i, name)] = self._executor.submit(_fact_check, text, self.all_results, claims)
+                else:
+                    self.futures[(i, name)] = self._executor.submit(_extract_chart_data, text)
+
+    def feed(self, text):
+        if not text.startswith(self._stable_text()):
+            self._restart()
+        parts = _split_sections(text)
+        fresh = parts[len(self.sections):-1]  # the last section is still being written
+        if not fresh:
+            return
+        self._submit(fresh)
+        if self.on_stable:
+            self.on_stable(self.sections, "streaming")
+
+    def finish(self, text):
+        if not text.startswith(self._stable_text()):
+            self._restart()
+        parts = _split_sections(text) if _SECTIONED_SYNTHESIS else [("", text)]
+        whole = len(parts) == 1 and not self.sections
+        self._submit(parts[len(self.sections):], whole=whole)
+        try:
+            checks, charts = [], []
+            for (i, name), future in sorted(self.futures.items()):
+                value = future.result()
+                if not value:
+                    continue
+                title = self.sections[i][0]
+                if name == "fact_check":
+                    checks.append(value if whole or not title else f"#### {title}\n\n{value}")
+                else:
+                    charts.append(value[len(_CHART_DATA_HEADING):])
+        finally:
+            self.close()
+        logger.info(json.dumps({"event": "sectioned_synthesis_checked", "sections": len(self.sections),
+                                "fact_checks": len(checks), "chart_sections": len(charts)}))
+        if checks:
+            text += "\n\n### Fact-Check Summary\n\n" + "\n\n".join(checks)
+        if charts:
+            text += "\n\n" + _CHART_DATA_HEADING + "\n\n".join(charts)
+        return text
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _Handoff:
+    """Stable synthesis sections published for the Draft plan branch.
+
+    Written to ``handoff/{execution_id}.json`` each time a section becomes stable
+    (status "streaming"), once more when the synthesis is final ("complete"), or
+    "failed" so the plan branch stops waiting. Carries the request fields the
+    thinking plan reads, since the plan branch starts from the raw pipeline input.
+    Best-effort: a failed write only means Draft plans for itself.
+    """
+
+    def __init__(self, bucket, execution_id, fields):
+        self.bucket = bucket
+        self.key = f"handoff/{execution_id.replace('/', '_')[:80]}.json" if execution_id else ""
+        self.enabled = bool(bucket and self.key and _SECTIONED_SYNTHESIS)
+        self.fields = fields
+
+    def publish(self, sections, status):
+        if not self.enabled:
+            return
+        body = {**self.fields, "status": status, "sections": [{"title": t, "text": x} for t, x in sections]}
+        try:
+            s3.put_object(Bucket=self.bucket, Key=self.key, Body=json.dumps(body).encode("utf-8"),
+                          ContentType="application/json")
+        except Exception as e:
+            logger.warning(json.dumps({"event": "handoff_publish_failed", "error": str(e)[:200]}))
+
+
+def _suggested_field(research_text, name):
+    """The value of a "Suggested Title"-style entry: the text after its colon, or the
+    first line under it when it is written as a heading."""
+    lines = research_text.split("\n")
+    value = ""
+    for n, line in enumerate(lines):
+        if name not in line.lower():
+            continue
+        if ":" in line and line.split(":", 1)[1].strip().strip("*").strip():
+            value = line.split(":", 1)[1].strip().strip("*").strip().strip('"')
+        elif line.lstrip().startswith("#"):
+            following = next((ln for ln in lines[n + 1:] if ln.strip()), "")
+            if not following.lstrip().startswith("#"):
+                value = following.strip().strip("*").strip('"')
+    return value
+
+
+# --- Search pipeline -----------------------------------------------------------
+# One asyncio event loop drives every network/LLM call of the gather stage through a
+# single bounded executor, so work flows on data dependencies instead of stage
+# barriers: the thinking plan and tool-URL collection start before the first query
+# is generated, each Tavily result is verified the moment it arrives, an all-blocked
+# query is retried as soon as it returns, and Perplexity citations are verified as
+# each Perplexity answer lands. Only editorial hooks wait for the full result set
+# (they read all of it). RESEARCH_GATHER_DEADLINE_SECONDS caps the whole stage: work
+# still in flight at the deadline is abandoned and the run continues with what it has.
+_GATHER_DEADLINE_SECONDS = float(os.environ.get("RESEARCH_GATHER_DEADLINE_SECONDS", "180"))
+_GATHER_WORKERS = int(os.environ.get("RESEARCH_GATHER_WORKERS", "16"))
+
+# Domains that consistently return 403 and will be dropped by verify_url.
+# Used to detect zero-yield queries and steer retries away from them.
+_BLOCKED_DOMAINS = ("medium.com", "reddit.com", "quora.com", "linkedin.com")
+
+
+def _all_from_blocked(results):
+    """Return True if every result URL is from a known-blocked domain."""
+    if not results:
+        return True
+    return all(any(d in r.get("url", "") for d in _BLOCKED_DOMAINS) for r in results)
+
+
+def _retry_query(original_query):
+    """Append an exclusion suffix to steer Tavily away from blocked domains."""
+    return original_query + " -site:medium.com -site:reddit.com documentation research"
+
+
+def _task_value(task, event, request_id):
+    """Result of a finished pipeline task, or None (logged) if it failed or never finished."""
+    if task is None:
+        return None
+    if not task.done():
+        task.cancel()
+        logger.warning(json.dumps({"event": f"{event}_deadline", "request_id": request_id}))
+        return None
+    if task.cancelled():
+        return None
+    if task.exception() is not None:
+        logger.warning(json.dumps({"event": f"{event}_failed", "error": str(task.exception())[:200],
+                                   "request_id": request_id}))
+        return None
+    return task.result()
+
+
+# Cross-execution research reuse. Re-submitting a topic (or a close variant) would
+# otherwise redo every search, verification and the Opus synthesis. Each component is
+# stored under research-cache/{fingerprint}.json in the drafts bucket with its own
+# freshness TTL and is refreshed on its own when stale. Set RESEARCH_CACHE=0 to disable,
+# or pass "refresh_research": true in the event to ignore (and overwrite) the stored copy.
+_RESEARCH_CACHE_ENABLED = os.environ.get("RESEARCH_CACHE", "1") != "0"
+_RESEARCH_CACHE_TTL_SECONDS = {
+    # Search results, verified sources, Perplexity synthesis, editorial hooks.
+    "gather": int(os.environ.get("RESEARCH_CACHE_SOURCES_TTL_HOURS", "24")) * 3600,
+    # Thinking plan — reused only while goal/avoid/analogies are unchanged.
+    "plan": int(os.environ.get("RESEARCH_CACHE_SOURCES_TTL_HOURS", "24")) * 3600,
+    # Opus synthesis — reused only while its exact prompt (sources + options) is unchanged.
+    "synthesis": int(os.environ.get("RESEARCH_CACHE_SYNTHESIS_TTL_HOURS", "168")) * 3600,
+    # Cross-reference fact-check + chart data points over that synthesis.
+    "factcheck": int(os.environ.get("RESEARCH_CACHE_FACTCHECK_TTL_HOURS", "168")) * 3600,
+}
+_GATHER_CACHE_FIELDS = ("all_results", "sources_block", "verified_source_count", "editorial_hooks",
+                        "tool_urls_block")
+_TOPIC_STOPWORDS = frozenset(("a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "how", "why",
+                              "what", "is", "are", "your", "my", "our", "vs", "versus"))
+
+
+def _topic_fingerprint(topic, author_content):
+    """Identity of a research request: the topic's significant words (lowercased,
+    punctuation and stopwords dropped, order-independent) plus a hash of the
+    whitespace-normalized author content."""
+    words = sorted(set(re.findall(r"[a-z0-9]+", topic.lower())) - _TOPIC_STOPWORDS)
+    content = re.sub(r"\s+", " ", author_content or "").strip()
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{' '.join(words)}\n{content_hash}".encode()).hexdigest()[:32]
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class _ResearchCache:
+    """Research artifacts for one topic fingerprint, stored as
+    ``{component: {"stored_at", "inputs", "data"}}``.
+
+    ``get`` returns a component's data only while it is younger than its TTL and was
+    built from the same ``inputs`` digest (the synthesis prompt, the synthesized
+    text), so a fresh search cascades into a fresh synthesis while a changed tone or
+    goal reuses the sources and re-synthesizes. Best-effort like the Draft
+    checkpoints: any S3 failure just means a live run, never a failed one.
+    """
+
+    def __init__(self, bucket, fingerprint, refresh=False):
+        self.bucket = bucket
+        self.key = f"research-cache/{fingerprint}.json"
+        self.enabled = bool(bucket and _RESEARCH_CACHE_ENABLED)
+        self.refresh = refresh
+        self.components = {}
+        self.status = {}
+        self._dirty = False
+
+    def load(self):
+        if not self.enabled or self.refresh:
+            return
+        try:
+            obj = s3.get_object(Bucket=self.bucket, Key=self.key)
+            self.components = json.loads(obj["Body"].read()).get("components", {})
+        except Exception as e:
+            if "NoSuchKey" not in str(e) and "NoSuchKey" not in type(e).__name__:
+                logger.warning(json.dumps({"event": "research_cache_load_failed", "error": str(e)[:200]}))
+
+    def get(self, component, inputs=""):
+        entry = self.components.get(component) if self.enabled else None
+        if not entry:
+            self.status[component] = "miss"
+            return None
+        if entry.get("inputs", "") != inputs:
+            self.status[component] = "changed"
+            return None
+        if time.time() - entry.get("stored_at", 0) > _RESEARCH_CACHE_TTL_SECONDS[component]:
+            self.status[component] = "stale"
+            return None
+        self.status[component] = "hit"
+        return entry["data"]
+
+    def put(self, component, data, inputs=""):
+        if not self.enabled:
+            return
+        self.components[component] = {"stored_at": int(time.time()), "inputs": inputs, "data": data}
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            s3.put_object(Bucket=self.bucket, Key=self.key,
+                          Body=json.dumps({"components": self.components}).encode("utf-8"),
+                          ContentType="application/json")
+        except Exception as e:
+            logger.warning(json.dumps({"event": "research_cache_save_failed", "error": str(e)[:200]}))
+
+
+async def _gather_research(topic, author_content, *, goal, avoid, analogies, has_author_content, request_id):
+    """Run the search / verification / pre-synthesis stage as one dependency-driven
+    pipeline. Returns a dict with all_results, sources_block, verified_source_count,
+    perplexity_raw, editorial_hooks, plan, tool_urls_block and deadline_hit (some work
+    was abandoned at the gather deadline)."""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=_GATHER_WORKERS)
+    started = time.monotonic()
+    deadline = started + _GATHER_DEADLINE_SECONDS
+
+    def remaining():
+        return max(0.0, deadline - time.monotonic())
+
+    def run(fn, *args, **kwargs):
+        return loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    all_results = []
+    perplexity_raw = []
+    checks = {}  # url -> verify_url future, started the moment the URL is first seen
+
+    def check(url):
+        if url and url not in checks:
+            checks[url] = run(verify_url, url)
+
+    async def tavily(query, retry_allowed=True):
+        try:
+            results = await run(tavily_search, query) or []
+        except Exception as e:
+            logger.warning("tavily query failed in thread: %s", e)
+            results = []
+        seen = {r.get("url", "") for r in all_results}
+        for r in results:
+            url = r.get("url", "")
+            if url and url not in seen:
+                seen.add(url)
+                all_results.append(r)
+                check(url)
+        # Retry queries that returned only blocked-domain results (max 1 retry each)
+        if retry_allowed and _all_from_blocked(results):
+            logger.info(json.dumps({"event": "search_retry", "query": query[:80],
+                                    "reason": "all_results_from_blocked_domains"}))
+            await tavily(_retry_query(query), retry_allowed=False)
+
+    async def perplexity(queries_future):
+        try:
+            queries = await queries_future
+        except Exception as e:
+            logger.warning("perplexity query reshape failed in thread: %s", e)
+            return
+
+        async def one(query):
+            try:
+                result = await run(perplexity_search, query)
+            except Exception as e:
+                logger.warning("perplexity query failed in thread: %s", e)
+                return
+            if result:
+                perplexity_raw.append(result)
+                for url in result.get("citations", []):
+                    check(url)
+
+        await asyncio.gather(*(one(q) for q in queries))
+
+    # Independent of search — start before the first query is even generated.
+    plan_task = asyncio.ensure_future(run(_thinking_plan, topic, author_content, goal=goal, avoid=avoid,
+                                          analogies=analogies))
+    tool_task = asyncio.ensure_future(run(_collect_tool_urls, author_content, topic)) if has_author_content else None
+
+    try:
+        # --- Web search: Tavily (breadth) + Perplexity (synthesis) in parallel ---
+        try:
+            search_queries = await asyncio.wait_for(run(build_search_queries, topic, author_content), remaining())
+        except TimeoutError:
+            search_queries = [topic]
+        # Reshape runs alongside the Tavily queries it was derived from
+        reshape = run(build_perplexity_queries, search_queries[:min(5, len(search_queries))], topic, author_content)
+        search_tasks = [asyncio.ensure_future(tavily(q)) for q in search_queries]
+        search_tasks.append(asyncio.ensure_future(perplexity(reshape)))
+        _, pending = await asyncio.wait(search_tasks, timeout=remaining())
+        for task in pending:
+            task.cancel()
+        deadline_hit = bool(pending)
+        if pending:
+            logger.warning(json.dumps({"event": "search_deadline", "abandoned": len(pending), "request_id": request_id}))
+
+        # Hooks read the complete result set; they overlap with the tail of verification.
+        hooks_task = asyncio.ensure_future(run(_extract_editorial_hooks, list(perplexity_raw), list(all_results),
+                                               topic, author_content))
+
+        if checks:
+            await asyncio.wait(list(checks.values()), timeout=remaining())
+        prechecked = {url: (f.result() if f.done() and not f.cancelled() and f.exception() is None else None)
+                      for url, f in checks.items()}
+        sources_block, verified_source_count = await run(
+            format_sources_for_prompt, all_results, prechecked=prechecked, deadline=deadline)
+
+        # Merge Perplexity synthesis block (independent index, zero-cost fallback if unavailable)
+        if perplexity_raw:
+            tavily_urls = {r.get("url", "") for r in all_results}
+            sources_block += _format_perplexity_block(perplexity_raw, tavily_urls, prechecked=prechecked)
+
+        # The plan, hooks and tool URLs are available as plain variables when the
+        # f-string prompts are evaluated in the handler.
+        await asyncio.wait([t for t in (plan_task, tool_task, hooks_task) if t is not None], timeout=remaining())
+        editorial_hooks = _task_value(hooks_task, "editorial_hooks", request_id) or ""
+        plan = _task_value(plan_task, "thinking_plan", request_id) or ""
+        tool_urls_block = _task_value(tool_task, "tool_urls", request_id) or ""
+        logger.info(json.dumps({"event": "editorial_hooks_extracted", "chars": len(editorial_hooks), "request_id": request_id}))
+        logger.info(json.dumps({"event": "thinking_plan_generated", "chars": len(plan), "request_id": request_id}))
+        if has_author_content:
+            logger.info(json.dumps({"event": "tool_urls_collected", "chars": len(tool_urls_block), "request_id": request_id}))
+        # Every wait above returns early once its work is done; an exhausted budget
+        # means at least one of them gave up on something.
+        deadline_hit = deadline_hit or remaining() <= 0
+    finally:
+        # Never block on abandoned work past the deadline.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(json.dumps({"event": "gather_complete", "results": len(all_results), "urls_checked": len(checks),
+                            "elapsed_ms": int((time.monotonic() - started) * 1000), "deadline_hit": deadline_hit,
+                            "request_id": request_id}))
+    return {
+        "all_results": all_results,
+        "sources_block": sources_block,
+        "verified_source_count": verified_source_count,
+        "perplexity_raw": perplexity_raw,
+        "editorial_hooks": editorial_hooks,
+        "plan": plan,
+        "tool_urls_block": tool_urls_block,
+        "deadline_hit": deadline_hit,
+    }
 
 
 def handler(event, context):
@@ -804,7 +1273,9 @@ def handler(event, context):
         "tone": "optional tone directive",
         "goal": "optional — what the reader should walk away understanding",
         "avoid": "optional — comma-separated things to avoid",
-        "analogies": "optional — seed analogies to weave in"
+        "analogies": "optional — seed analogies to weave in",
+        "refresh_research": "optional — true to bypass the research cache",
+        "handoff": {"execution_id": "optional — publish stable synthesis sections for the Draft plan branch"}
     }
 
     Output:
@@ -816,7 +1287,9 @@ def handler(event, context):
         "research": "structured research notes (markdown)",
         "suggested_title": "...",
         "suggested_description": "...",
-        "data_points": "structured data suitable for chart generation"
+        "data_points": "structured data suitable for chart generation",
+        "sources_key": "sources/{execution_id}.json — the sources index (common/sources.py), or \"\"",
+        "llm_usage": {"calls": N, "input_tokens": N, "output_tokens": N, "ms": N, "cost_usd": X, "by_label": {...}}
     }
     """
     topic = event.get("topic", "")
@@ -827,125 +1300,64 @@ def handler(event, context):
     avoid = event.get("avoid", "")
     analogies = event.get("analogies", "")
     generate_hero = event.get("generate_hero", False)
+    refresh_research = bool(event.get("refresh_research", False))
+    execution_id = (event.get("handoff") or {}).get("execution_id", "")
 
     request_id = getattr(context, 'aws_request_id', 'local')
     logger.info(json.dumps({"event": "research_start", "topic": topic[:100], "request_id": request_id}))
+    reset_usage()
 
     if not topic:
         raise ValueError("No topic provided")
 
     has_author_content = bool(author_content and author_content.strip())
 
-    # Domains that consistently return 403 and will be dropped by verify_url.
-    # Used to detect zero-yield queries and steer retries away from them.
-    _BLOCKED_DOMAINS = ("medium.com", "reddit.com", "quora.com", "linkedin.com")
-
-    def _all_from_blocked(results):
-        """Return True if every result URL is from a known-blocked domain."""
-        if not results:
-            return True
-        return all(any(d in r.get("url", "") for d in _BLOCKED_DOMAINS) for r in results)
-
-    def _retry_query(original_query):
-        """Append an exclusion suffix to steer Tavily away from blocked domains."""
-        return original_query + " -site:medium.com -site:reddit.com documentation research"
-
-    # --- Web search: Tavily (breadth) + Perplexity (synthesis) in parallel ---
-    search_queries = build_search_queries(topic, author_content)
-    all_results = []
-    query_results_map = {}  # query -> list of raw results
-    perplexity_raw = []  # Perplexity synthesis results
-
-    # Submit Tavily immediately, reshape Perplexity queries in parallel while Tavily runs
-    raw_perplexity = search_queries[:min(5, len(search_queries))]
-    all_futures = {}
-    max_search_workers = min(len(search_queries), 5) + min(5, len(search_queries)) + 1
-    with ThreadPoolExecutor(max_workers=max_search_workers) as executor:
-        for q in search_queries:
-            all_futures[executor.submit(tavily_search, q)] = ("tavily", q)
-        # Reshape runs in executor — Tavily already searching in parallel (~1-2s saved)
-        reshape_future = executor.submit(build_perplexity_queries, raw_perplexity, topic, author_content)
-        perplexity_queries = reshape_future.result()
-        for q in perplexity_queries:
-            all_futures[executor.submit(perplexity_search, q)] = ("perplexity", q)
-        for future in as_completed(all_futures):
-            kind, q = all_futures[future]
+    cache = _ResearchCache(DRAFTS_BUCKET, _topic_fingerprint(topic, author_content), refresh=refresh_research)
+    cache.load()
+
+    # The fingerprint covers topic and author content only; the plan also reads the
+    # goal/avoid/analogies options, so it is cached on its own against their digest.
+    plan_inputs = _digest(f"{goal}\n{avoid}\n{analogies}")
+    gathered = cache.get("gather")
+    if gathered is None:
+        gathered = asyncio.run(_gather_research(
+            topic, author_content, goal=goal, avoid=avoid, analogies=analogies,
+            has_author_content=has_author_content, request_id=request_id,
+        ))
+        plan = gathered["plan"]
+        # A degraded gather (deadline hit, nothing verified) is used for this run only,
+        # never served to the next execution of the topic.
+        if gathered["deadline_hit"] or gathered["verified_source_count"] == 0:
+            logger.warning(json.dumps({"event": "research_cache_skip", "deadline_hit": gathered["deadline_hit"],
+                                       "verified_sources": gathered["verified_source_count"],
+                                       "request_id": request_id}))
+        else:
+            cache.put("gather", {k: gathered[k] for k in _GATHER_CACHE_FIELDS})
+            if plan:
+                cache.put("plan", {"plan": plan}, plan_inputs)
+    else:
+        cached_plan = cache.get("plan", plan_inputs)
+        if cached_plan is not None:
+            plan = cached_plan["plan"]
+        else:
             try:
-                result = future.result()
-                if kind == "tavily":
-                    query_results_map[q] = result or []
-                    all_results.extend(result or [])
-                elif result:
-                    perplexity_raw.append(result)
+                plan = _thinking_plan(topic, author_content, goal=goal, avoid=avoid, analogies=analogies)
             except Exception as e:
-                logger.warning("%s query failed in thread: %s", kind, e)
-                if kind == "tavily":
-                    query_results_map[q] = []
-
-    # Retry queries that returned only blocked-domain results (max 1 retry each)
-    retry_queries = [q for q, res in query_results_map.items() if _all_from_blocked(res)]
-    if retry_queries:
-        logger.info(json.dumps({"event": "search_retry", "count": len(retry_queries),
-                                "reason": "all_results_from_blocked_domains"}))
-        retry_variants = [_retry_query(q) for q in retry_queries]
-        with ThreadPoolExecutor(max_workers=min(len(retry_variants), 5)) as executor:
-            futures = {executor.submit(tavily_search, q): q for q in retry_variants}
-            for future in as_completed(futures):
-                try:
-                    results = future.result()
-                    all_results.extend(results)
-                except Exception as e:
-                    logger.warning("Tavily retry query failed: %s", e)
-
-    # Deduplicate by URL before synthesis to avoid confusing the fact-checker
-    seen = set()
-    deduped_results = []
-    for r in all_results:
-        url = r.get("url", "")
-        if url and url not in seen:
-            seen.add(url)
-            deduped_results.append(r)
-    all_results = deduped_results
-    sources_block, verified_source_count = format_sources_for_prompt(all_results)
-
-    # Merge Perplexity synthesis block (independent index, zero-cost fallback if unavailable)
-    if perplexity_raw:
-        tavily_urls = {r.get("url", "") for r in all_results}
-        perplexity_block = _format_perplexity_block(perplexity_raw, tavily_urls)
-        if perplexity_block:
-            sources_block += perplexity_block
+                logger.warning(json.dumps({"event": "thinking_plan_failed", "error": str(e)[:200],
+                                           "request_id": request_id}))
+                plan = ""
+            if plan:
+                cache.put("plan", {"plan": plan}, plan_inputs)
+    all_results = gathered["all_results"]
+    sources_block = gathered["sources_block"]
+    verified_source_count = gathered["verified_source_count"]
+    editorial_hooks = gathered["editorial_hooks"]
 
     if verified_source_count == 0:
         logger.warning(json.dumps({"event": "no_verified_sources", "topic": topic[:100], "request_id": request_id}))
 
-    # Run editorial hooks extraction, thinking plan, and tool URL collection in PARALLEL.
-    # All three are available as plain variables when the f-string prompts are evaluated below.
-    editorial_hooks = ""
-    plan = ""
-    tool_urls_block = ""
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        hooks_future = executor.submit(_extract_editorial_hooks, perplexity_raw, all_results, topic, author_content)
-        plan_future = executor.submit(_thinking_plan, topic, author_content, goal=goal, avoid=avoid, analogies=analogies)
-        tool_future = executor.submit(_collect_tool_urls, author_content, topic) if has_author_content else None
-        try:
-            editorial_hooks = hooks_future.result()
-            logger.info(json.dumps({"event": "editorial_hooks_extracted", "chars": len(editorial_hooks), "request_id": request_id}))
-        except Exception as e:
-            logger.warning(json.dumps({"event": "editorial_hooks_failed", "error": str(e)[:200], "request_id": request_id}))
-        try:
-            plan = plan_future.result()
-            logger.info(json.dumps({"event": "thinking_plan_generated", "chars": len(plan), "request_id": request_id}))
-        except Exception as e:
-            logger.warning(json.dumps({"event": "thinking_plan_failed", "error": str(e)[:200], "request_id": request_id}))
-        if tool_future:
-            try:
-                tool_urls_block = tool_future.result()
-                logger.info(json.dumps({"event": "tool_urls_collected", "chars": len(tool_urls_block), "request_id": request_id}))
-            except Exception as e:
-                logger.warning(json.dumps({"event": "tool_urls_failed", "error": str(e)[:200], "request_id": request_id}))
-
-    if tool_urls_block:
-        sources_block += tool_urls_block
+    if gathered["tool_urls_block"]:
+        sources_block += gathered["tool_urls_block"]
 
     if has_author_content:
         prompt = f"""You are a research assistant for a technology blog written by Khaled Zaky,
@@ -993,6 +1405,7 @@ Your task:
 IMPORTANT: Do not replace the author's perspective. Your job is to find evidence that makes
 the author's arguments stronger and more credible. The author's voice and opinions are the
 foundation — you are adding supporting material.
+{_SECTION_FORMAT_RULE if _SECTIONED_SYNTHESIS else ""}
 {sources_block}{editorial_hooks}
 
 INSIGHT DIRECTIVE: Actively surface what is non-obvious. Every section should tell the reader
@@ -1048,6 +1461,7 @@ Please provide:
     stop and say "I didn't know that"? Identify at least one genuinely non-obvious insight.
 
 Format your response as structured markdown.
+{_SECTION_FORMAT_RULE if _SECTIONED_SYNTHESIS else ""}
 {sources_block}{editorial_hooks}
 
 INSIGHT DIRECTIVE: Actively surface what is non-obvious. Every section should tell the reader
@@ -1067,32 +1481,59 @@ IMPORTANT CITATION RULES:
     if plan:
         prompt += f"\n\n=== RESEARCH PLAN (from extended thinking) ===\n{plan}\n=== END PLAN ==="
 
-    try:
-        research_text = _invoke_synthesis_with_backoff(prompt)
-        logger.info(json.dumps({"event": "research_generated", "chars": len(research_text), "model": SYNTHESIS_MODEL_ID, "request_id": request_id}))
-    except Exception as e:
-        logger.error(json.dumps({"event": "research_failed", "error": str(e)[:200], "request_id": request_id}))
-        raise RuntimeError(f"Research generation failed: {e}") from e
+    handoff = _Handoff(DRAFTS_BUCKET, execution_id, {
+        "topic": topic, "author_content": author_content or "", "goal": goal or "", "avoid": avoid or "",
+        "analogies": analogies or "",
+    })
+    # Third and fourth passes (cross-reference fact-check, chart data extraction) run
+    # per section as the streamed synthesis completes them — see _SectionStream.
+    stream = _SectionStream(all_results, on_stable=handoff.publish)
+    synthesis_inputs = _digest(prompt)
+    synthesis = cache.get("synthesis", synthesis_inputs)
+    if synthesis is not None:
+        research_text = synthesis["research_text"]
+    else:
+        try:
+            research_text = _invoke_synthesis_with_backoff(prompt, on_checkpoint=stream.feed if _SECTIONED_SYNTHESIS else None)
+            logger.info(json.dumps({"event": "research_generated", "chars": len(research_text), "model": SYNTHESIS_MODEL_ID, "request_id": request_id}))
+        except Exception as e:
+            stream.close()
+            handoff.publish([], "failed")
+            logger.error(json.dumps({"event": "research_failed", "error": str(e)[:200], "request_id": request_id}))
+            raise RuntimeError(f"Research generation failed: {e}") from e
+        cache.put("synthesis", {"research_text": research_text}, synthesis_inputs)
+    handoff.publish(_split_sections(research_text), "complete")
 
     # Extract suggested title and description from the research
-    suggested_title = topic  # fallback
-    suggested_description = ""
-    for line in research_text.split("\n"):
-        if "suggested title" in line.lower() and ":" in line:
-            suggested_title = line.split(":", 1)[1].strip().strip("*").strip('"')
-        if "suggested description" in line.lower() and ":" in line:
-            suggested_description = line.split(":", 1)[1].strip().strip("*").strip('"')
-
-    # --- Third pass: cross-reference fact-check (Haiku) ---
-    research_text = _cross_reference_check(research_text, all_results)
-
-    # --- Fourth pass: extract structured data points for chart generation (Haiku) ---
-    data_points_text = _extract_chart_data(research_text)
-    if data_points_text:
-        research_text += "\n\n" + data_points_text
-
-    # Always include all fields so Step Functions $.path references don't fail
-    return {
+    suggested_title = _suggested_field(research_text, "suggested title") or topic
+    suggested_description = _suggested_field(research_text, "suggested description")
+
+    factcheck_inputs = _digest(research_text)
+    factcheck = cache.get("factcheck", factcheck_inputs)
+    if factcheck is not None:
+        stream.close()
+        research_text = factcheck["research_text"]
+    else:
+        research_text = stream.finish(research_text)
+        cache.put("factcheck", {"research_text": research_text}, factcheck_inputs)
+
+    cache.save()
+    logger.info(json.dumps({"event": "research_cache", "components": cache.status, "refresh": refresh_research,
+                            "request_id": request_id}))
+
+    # Structured sources index for Draft, Verify and Chart (common/sources.py): the
+    # verified Tavily sources offered to the synthesis, plus every URL the notes cite.
+    candidates = [{"url": r["url"], "title": r.get("title", ""), "content": r.get("raw_content") or r.get("content", "")}
+                  for r in all_results if r.get("url") and f"URL: {r['url']}\n" in sources_block]
+    index = sources.build_index(candidates, research_text)
+    sources_key = sources.save(sources.key_for(execution_id, research_text), index)
+    logger.info(json.dumps({"event": "sources_index", "key": sources_key, "sources": len(index["sources"]),
+                            "data_points": len(index["data_points"]), "request_id": request_id}))
+    flush_usage_metrics("research")
+
+    # Always include all fields so Step Functions $.path references don't fail.
+    # research and author_content leave as claim-check pointers when they are large.
+    return offload({
         "topic": topic,
         "categories": categories,
         "research": research_text,
@@ -1105,4 +1546,6 @@ IMPORTANT CITATION RULES:
         "analogies": analogies or "",
         "generate_hero": generate_hero,
         "verified_source_count": verified_source_count,
-    }
+        "sources_key": sources_key,
+        "llm_usage": usage_summary(),
+    })
@@ -6,13 +6,21 @@ These tests validate that:
 3. No missing dependencies at import time
 """
 
+import asyncio
+import gzip
 import importlib
 import inspect
+import io
+import itertools
 import json
 import shutil
 import subprocess
 import sys
 import textwrap
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from sys import version_info
 from unittest.mock import MagicMock, patch
@@ -268,18 +276,18 @@ class TestChartMatching:
         assert result["description"] == "agent deployment failure rates by platform"
 
     def test_parse_values_label_number(self):
-        """_parse_values correctly parses Label: value pairs."""
-        result = self.mod._parse_values("Success: 60, Failure: 40")
+        """parse_values correctly parses Label: value pairs."""
+        result = self.mod.sources.parse_values("Success: 60, Failure: 40")
         assert result == [("Success", 60.0), ("Failure", 40.0)]
 
     def test_parse_values_strips_percent(self):
-        """_parse_values strips trailing % signs."""
-        result = self.mod._parse_values("Yes: 75%, No: 25%")
+        """parse_values strips trailing % signs."""
+        result = self.mod.sources.parse_values("Yes: 75%, No: 25%")
         assert result == [("Yes", 75.0), ("No", 25.0)]
 
     def test_parse_values_bare_numbers_get_labels(self):
         """Bare numbers without labels get auto-generated labels."""
-        result = self.mod._parse_values("60, 40")
+        result = self.mod.sources.parse_values("60, 40")
         assert len(result) == 2
         assert result[0][1] == 60.0
         assert result[1][1] == 40.0
@@ -499,6 +507,195 @@ class TestVerifyLinkExtraction:
         assert "test link" in links[0]["link_text"]
         assert len(links[0]["context"]) <= 250
 
+    def test_context_is_enclosing_sentence_plus_neighbour(self):
+        md = ("---\ntitle: \"[fm](https://fm.example/)\"\n---\n## Limits\n"
+              "Lambda launched in 2014. It now allows [900-second timeouts](https://docs.example/a.b) for e.g. "
+              "batch jobs. Unrelated claim about pricing.\n\n"
+              "- Also in [the docs](https://docs.example/a.b).\n\n```\n[code](https://code.example/)\n```\n")
+        links = self.mod._extract_links(md)
+        assert [link["url"] for link in links] == ["https://docs.example/a.b"]
+        assert links[0]["context"].startswith("Lambda launched in 2014. It now allows [900-second")
+        assert "for e.g. batch jobs." in links[0]["context"] and "pricing" not in links[0]["context"]
+        assert links[0]["context"].endswith("… Also in [the docs](https://docs.example/a.b).")
+        assert links[0]["heading"] == "Limits" and len(links[0]["spans"]) == 2
+
+    def test_links_in_headings_are_indexed_with_the_heading_as_claim(self):
+        md = "## See [NIST SP 800-207](https://nist.gov/x) overview\n\nBody text here.\n"
+        links = self.mod._extract_links(md)
+        assert [link["url"] for link in links] == ["https://nist.gov/x"]
+        assert links[0]["context"] == "See [NIST SP 800-207](https://nist.gov/x) overview"
+
+
+class TestVerifyCitationBatches:
+    def setup_method(self):
+        self.mod = _load_module("verify")
+
+    @staticmethod
+    def _reports(n):
+        return [{"link_text": f"src {i}", "url": f"https://s{i}.example/", "context": f"claim {i}",
+                 "title": f"T{i}", "excerpt": "evidence " * 150, "status_code": 200} for i in range(n)]
+
+    def test_long_posts_are_batched_and_unanswered_citations_requeued(self):
+        reports = self._reports(40)
+        prompts = []
+        lock = threading.Lock()
+
+        def fake_invoke(prompt, **kwargs):
+            with lock:
+                prompts.append(prompt)
+            count = prompt.count("--- CITATION ")
+            # Batched calls "truncate" and drop their last verdict; single re-queues answer.
+            answered = count if count == 1 else count - 1
+            return "\n".join(f"CITATION {n}: PASS | ok" for n in range(1, answered + 1))
+
+        with patch.object(self.mod, "invoke_model", side_effect=fake_invoke):
+            verdicts = self.mod._verify_citations_with_llm(reports)
+
+        batches = [p for p in prompts if p.count("--- CITATION ") > 1]
+        assert len(batches) >= 4
+        assert all(p.count("--- CITATION ") <= self.mod._VERIFY_BATCH_MAX_CITATIONS for p in batches)
+        assert len(prompts) == 2 * len(batches)  # one single-citation retry per batch
+        assert [v["url"] for v in verdicts] == [r["url"] for r in reports]
+
+
+class TestVerifyPrefilter:
+    def setup_method(self):
+        self.mod = _load_module("verify")
+
+    @staticmethod
+    def _report(context, excerpt, reachable=True):
+        return {"link_text": "src", "url": "https://s.example/", "context": context, "reachable": reachable,
+                "status_code": 200 if reachable else 404, "title": "T", "excerpt": excerpt}
+
+    def test_figures_and_quotes_decide_without_llm(self):
+        page = "In 2025, 72% of agencies had adopted zero trust, up from 1,200 pilots."
+        verdict = self.mod._prefilter_verdict(self._report("By 2025, 72% of agencies [adopted](https://s.example/2019/1) it", page))
+        assert verdict["verdict"] == "PASS" and verdict["method"] == "deterministic"
+        assert self.mod._prefilter_verdict(self._report("Only 27% had adopted it in 2025", page)) is None
+        quoted = self._report('NIST says "zero trust is a journey, not a product"', page)
+        assert self.mod._prefilter_verdict(quoted)["verdict"] == "FAIL"
+        assert self.mod._prefilter_verdict(self._report("x", "", reachable=False))["verdict"] == "UNREACHABLE"
+
+    def test_quote_of_a_neighbouring_link_does_not_fail_this_one(self):
+        md = ('Gartner said "agentic AI will be canceled by 2027" in its [report](https://gartner.com/a). '
+              "Separately, adoption is rising per [the survey](https://example.com/survey).")
+        report, survey = self.mod._extract_links(md)
+        assert "agentic AI" in survey["context"] and "agentic AI" not in survey["claim"]
+        page = "Our survey finds adoption is rising across enterprises."
+        assert self.mod._prefilter_verdict({**survey, "reachable": True, "excerpt": page}) is None
+        assert self.mod._prefilter_verdict({**report, "reachable": True, "excerpt": page})["verdict"] == "FAIL"
+
+    def test_figures_alone_do_not_pass_without_claim_terms_or_inside_dates(self):
+        page = "Published 2025-01-30. In 2025, 72% of agencies had adopted zero trust."
+        assert self.mod._prefilter_verdict(self._report("72% of hospitals outsourced billing", page)) is None
+        assert self.mod._prefilter_verdict(self._report("Agencies adopted it for $30 per seat", page)) is None
+        assert not self.mod._figure_in("30", False, "Updated 2025-01-30 and 1/30")
+
+    def test_internal_links_resolved_against_known_slugs(self):
+        md = ("See [my post](https://khaledzaky.com/blog/agents-are-not-software/) and "
+              "[another](https://khaledzaky.com/blog/made-up-post/) and [ext](https://ext.example/a).")
+        event = {"title": "t", "slug": "new-post", "markdown": md}
+        self.mod._known_slugs_cache[0] = None
+        with patch.object(self.mod.ssm, "get_parameter",
+                          return_value={"Parameter": {"Value": "agents-are-not-software,other"}}), \
+             patch.object(self.mod, "_fetch_page_meta", return_value=(True, 200, "Ext", "unrelated page")) as fetch, \
+             patch.object(self.mod, "_llm_verdicts", return_value={}) as judge, \
+             patch.object(self.mod, "_repair_citations", side_effect=lambda v, m, r, **kw: (m, v)):
+            out = self.mod.handler(event, None)
+        self.mod._known_slugs_cache[0] = None
+        fetch.assert_called_once_with("https://ext.example/a")
+        assert judge.call_args[0][1] == [2]
+        assert [d["verdict"] for d in out["verification"]["details"]] == ["PASS", "FAIL"]
+
+    def test_revision_pass_only_rejudges_edited_citations(self):
+        store = {}
+        fake_s3 = MagicMock()
+        fake_s3.put_object.side_effect = lambda **kw: store.__setitem__(kw["Key"], kw["Body"])
+
+        def get_object(**kw):
+            if kw["Key"] not in store:
+                raise Exception("NoSuchKey")
+            return {"Body": io.BytesIO(store[kw["Key"]])}
+        fake_s3.get_object.side_effect = get_object
+
+        def judge(link_reports, indices):
+            return {i: {"url": link_reports[i]["url"], "link_text": "", "context": "", "verdict": "PASS",
+                        "reason": "ok", "method": "llm"} for i in indices}
+
+        first = "Para one cites [a](https://a.example/).\n\n" + "x " * 80 + "\n\nPara two cites [b](https://b.example/)."
+        revised = first.replace("Para two cites", "Rewritten paragraph two cites")
+        with patch.object(self.mod, "s3", fake_s3), patch.object(self.mod, "DRAFTS_BUCKET", "bucket"), \
+             patch.object(self.mod, "_fetch_page_meta", return_value=(True, 200, "T", "page")) as fetch, \
+             patch.object(self.mod, "_llm_verdicts", side_effect=judge), \
+             patch.object(self.mod, "_repair_citations", side_effect=lambda v, m, r, **kw: (m, v)):
+            self.mod.handler({"markdown": first, "execution_id": "exec-1"}, None)
+            assert fetch.call_count == 2
+            out = self.mod.handler({"markdown": revised, "execution_id": "exec-1"}, None)
+        assert fetch.call_count == 3 and fetch.call_args[0][0] == "https://b.example/"
+        assert [d["method"] for d in out["verification"]["details"]] == ["reused", "llm"]
+        assert list(store) == ["verify-state/exec-1.json"]
+
+
+class TestVerifyTimeBudget:
+    def setup_method(self):
+        self.mod = _load_module("verify")
+
+    def test_slow_fetches_become_unverified_and_repair_is_skipped(self):
+        release = threading.Event()
+
+        def fetch(url):
+            if "slow" in url:
+                release.wait(5)
+            return True, 200, "T", "page mentions 72% adoption"
+
+        ctx = MagicMock(aws_request_id="r")
+        # 1s of fetch budget, then too little left for repair searches
+        ctx.get_remaining_time_in_millis.side_effect = itertools.chain(
+            [(self.mod._FETCH_RESERVE_SECONDS + 1) * 1000], itertools.repeat((self.mod._REPAIR_MIN_SECONDS - 1) * 1000))
+        md = "Adoption is 72% per [fast](https://fast.example/).\n\nSee also [slow](https://slow.example/)."
+        with patch.object(self.mod, "_fetch_page_meta", side_effect=fetch), \
+             patch.object(self.mod, "_llm_verdicts", return_value={}), \
+             patch.object(self.mod, "_repair_citations") as repair:
+            started = time.monotonic()
+            out = self.mod.handler({"markdown": md}, ctx)
+            release.set()
+        self.mod._lambda_context[0] = None
+        assert time.monotonic() - started < 4
+        repair.assert_not_called()
+        details = out["verification"]["details"]
+        assert [d["verdict"] for d in details] == ["PASS", "UNVERIFIED"]
+        assert out["verification"]["unverified"] == 1
+
+    def test_no_links_summary_has_the_same_shape(self):
+        out = self.mod.handler({"markdown": "No citations here."}, MagicMock(aws_request_id="r"))
+        self.mod._lambda_context[0] = None
+        assert set(out["verification"]) == {"total_links", "passed", "repaired", "warnings", "failures",
+                                             "unreachable", "unverified", "details"}
+
+
+class TestVerifyRepair:
+    def setup_method(self):
+        self.mod = _load_module("verify")
+
+    def test_similar_claims_share_one_search_and_patch_every_span(self):
+        md = ("Agents need [scoped tokens](https://bad.example/1) for delegated access. "
+              "Delegated agent access needs [scoped tokens too](https://bad.example/2). "
+              "Again: [scoped](https://bad.example/1).\n\nStorage [pricing](https://bad.example/3) doubled last year.")
+        links = self.mod._extract_links(md)
+        verdicts = [{"url": link["url"], "link_text": link["link_text"], "context": link["context"],
+                     "verdict": "FAIL", "reason": "x"} for link in links]
+        verdicts[1]["context"] = verdicts[0]["context"]  # two citations, same claim
+        results = [{"url": "https://good.example/", "title": "", "content": ""}]
+        with patch.object(self.mod, "_tavily_search_for_claim", return_value=results) as search, \
+             patch.object(self.mod, "_find_replacement_url",
+                          side_effect=lambda ctx, url, res: None if url.endswith("/3") else res[0]["url"]):
+            out, repaired = self.mod._repair_citations(verdicts, md, "req",
+                                                       spans_by_url={link["url"]: link["spans"] for link in links})
+        assert search.call_count == 2
+        assert out.count("https://good.example/") == 3 and "https://bad.example/1" not in out
+        assert "[pricing](https://bad.example/3)" in out
+        assert [v["verdict"] for v in repaired] == ["REPAIRED", "REPAIRED", "FAIL"]
+
 
 # ---------------------------------------------------------------------------
 # Behavioral: draft — footnote stripping
@@ -578,6 +775,23 @@ class TestNotifyEvals:
         """_count_words returns 0 for empty string."""
         assert self.mod._count_words("") == 0
 
+    def test_usage_block_breaks_down_cost_and_time(self):
+        usage = {
+            "research": {"calls": 8, "input_tokens": 40000, "output_tokens": 6000, "ms": 95000, "cost_usd": 0.31,
+                         "by_label": {"synthesis": {"ms": 70000, "cost_usd": 0.25}}},
+            "draft": {"calls": 11, "input_tokens": 90000, "output_tokens": 30000, "ms": 610000, "cost_usd": 1.02,
+                      "by_label": {"draft": {"ms": 240000, "cost_usd": 0.6}, "draft.voice": {"ms": 120000, "cost_usd": 0.1}}},
+            "verify": {"calls": 0},
+        }
+        block = self.mod._format_usage_block(usage)
+        assert "LLM COST & TIME (est. $1.33" in block
+        assert "verify" not in block  # stages with no calls are omitted
+        assert block.index("  draft: 240.0s") < block.index("  draft.voice: 120.0s")
+
+    def test_usage_block_empty_without_data(self):
+        assert self.mod._format_usage_block({}) == ""
+        assert self.mod._format_usage_block(None) == ""
+
     def test_intent_check_skipped_when_no_content(self):
         """_check_author_intent returns None when author_content is empty."""
         result = self.mod._check_author_intent("", "some markdown")
@@ -591,7 +805,7 @@ class TestNotifyEvals:
     def test_intent_check_returns_none_on_bedrock_failure(self):
         """_check_author_intent returns None (non-fatal) when Bedrock call fails."""
         author_content = "a" * 200  # long enough to trigger the check
-        with patch.object(self.mod.bedrock, "invoke_model", side_effect=Exception("Bedrock error")):
+        with patch.object(self.mod, "invoke_model", side_effect=Exception("Bedrock error")):
             result = self.mod._check_author_intent(author_content, "some markdown")
         assert result is None
 
@@ -627,13 +841,14 @@ class TestApproveHITLMetrics:
 
 # ---------------------------------------------------------------------------
 # Shared module: llm — the single source of truth for Bedrock invocation,
-# vendored into the Research and Draft packages. Exercises the request building
+# vendored into the Research, Draft, Verify and Notify packages. Exercises the request building
 # and the Opus -> Sonnet fallback contract that both handlers now delegate to.
 # ---------------------------------------------------------------------------
 
 
-def _bedrock_response(text):
-    """Build a fake Bedrock invoke_model response carrying `text`."""
+def _bedrock_response(text, usage=None, stop_reason=None, headers=None):
+    """Build a fake Bedrock invoke_model response carrying `text` (and optionally a
+    usage block, stop_reason and response headers)."""
     class _Body:
         def __init__(self, payload):
             self._payload = payload
@@ -641,7 +856,30 @@ def _bedrock_response(text):
         def read(self):
             return self._payload
 
-    return {"body": _Body(json.dumps({"content": [{"text": text}]}))}
+    payload = {"content": [{"text": text}]}
+    if usage is not None:
+        payload["usage"] = usage
+    if stop_reason is not None:
+        payload["stop_reason"] = stop_reason
+    response = {"body": _Body(json.dumps(payload))}
+    if headers is not None:
+        response["ResponseMetadata"] = {"HTTPHeaders": headers}
+    return response
+
+
+def _bedrock_stream(*deltas, output_tokens=None, stop_reason="end_turn", error=None):
+    """Build a fake invoke_model_with_response_stream response emitting `deltas`.
+    `error` (e.g. "throttlingException") appends an in-stream exception event."""
+    events = [{"type": "message_start", "message": {"usage": {"input_tokens": 10}}}]
+    events += [{"type": "content_block_delta", "delta": {"type": "text_delta", "text": d}} for d in deltas]
+    stream = [{"chunk": {"bytes": json.dumps(e).encode()}} for e in events]
+    if error:
+        stream.append({error: {"message": "slow down"}})
+    else:
+        tail = {"type": "message_delta", "delta": {"stop_reason": stop_reason},
+                "usage": {"output_tokens": output_tokens or len(deltas)}}
+        stream.append({"chunk": {"bytes": json.dumps(tail).encode()}})
+    return {"body": iter(stream)}
 
 
 class TestSharedLLM:
@@ -649,6 +887,9 @@ class TestSharedLLM:
         self.llm = importlib.import_module("llm")
         # Each test drives bedrock.invoke_model explicitly; reset any prior state.
         self.llm.bedrock.invoke_model.reset_mock(return_value=True, side_effect=True)
+        self.llm._memory_cache.clear()
+        self.llm.reset_usage()
+        self.llm._limiters.clear()
 
     def test_invoke_model_includes_temperature(self):
         with patch.object(self.llm.bedrock, "invoke_model", return_value=_bedrock_response("hi")) as m:
@@ -731,6 +972,232 @@ class TestSharedLLM:
         assert calls == ["opus", "opus"]  # retried the primary, did not fall back
         sleep.assert_called_once_with(1)
 
+    # --- response cache -----------------------------------------------------
+    def test_temperature_zero_calls_are_cached(self):
+        with patch.object(self.llm.bedrock, "invoke_model", side_effect=lambda **kw: _bedrock_response("det")) as m:
+            a = self.llm.invoke_model("same prompt", model_id="haiku", temperature=0.0, max_tokens=100)
+            b = self.llm.invoke_model("same prompt", model_id="haiku", temperature=0.0, max_tokens=100)
+        assert a == b == "det"
+        assert m.call_count == 1
+
+    def test_cache_key_covers_all_request_parameters(self):
+        base = {"model_id": "m", "temperature": 0.0, "max_tokens": 100}
+        k = self.llm.cache_key("p", **base)
+        assert k != self.llm.cache_key("p2", **base)
+        assert k != self.llm.cache_key("p", **{**base, "model_id": "other"})
+        assert k != self.llm.cache_key("p", **{**base, "max_tokens": 200})
+        assert k != self.llm.cache_key("p", **{**base, "thinking_budget": 1024})
+
+    def test_truncated_replies_are_not_cached(self):
+        with patch.object(self.llm.bedrock, "invoke_model",
+                          side_effect=lambda **kw: _bedrock_response("cut", stop_reason="max_tokens")) as m:
+            self.llm.invoke_model("p", model_id="m", temperature=0.0)
+            self.llm.invoke_model("p", model_id="m", temperature=0.0)
+        assert m.call_count == 2
+
+    def test_non_deterministic_and_opted_out_calls_are_not_cached(self):
+        with patch.object(self.llm.bedrock, "invoke_model", side_effect=lambda **kw: _bedrock_response("x")) as m:
+            self.llm.invoke_model("p", model_id="m", temperature=0.8)
+            self.llm.invoke_model("p", model_id="m", temperature=0.8)
+            self.llm.invoke_model("q", model_id="m", temperature=0.0, cache=False)
+            self.llm.invoke_model("q", model_id="m", temperature=0.0, cache=False)
+        assert m.call_count == 4
+
+    def test_s3_tier_replays_across_containers_and_honours_ttl(self):
+        fake = _FakeS3()
+        with patch.object(self.llm, "_CACHE_BUCKET", "bucket"), patch.object(self.llm, "_s3", fake), \
+             patch.object(self.llm.bedrock, "invoke_model", side_effect=lambda **kw: _bedrock_response("v1")) as m:
+            self.llm.invoke_model("p", model_id="m", temperature=0.0)
+            assert any(k.startswith("llm-cache/") for k in fake.store)
+            self.llm._memory_cache.clear()  # a fresh container still hits S3
+            assert self.llm.invoke_model("p", model_id="m", temperature=0.0) == "v1"
+            assert m.call_count == 1
+
+            self.llm._memory_cache.clear()
+            with patch.object(self.llm, "_CACHE_TTL_SECONDS", -1):
+                self.llm.invoke_model("p", model_id="m", temperature=0.0)
+            assert m.call_count == 2  # expired entry is recomputed
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        with patch.object(self.llm, "_CACHE_MEMORY_ENTRIES", 2), \
+             patch.object(self.llm.bedrock, "invoke_model", side_effect=lambda **kw: _bedrock_response("x")) as m:
+            for p in ("a", "b", "c", "a"):
+                self.llm.invoke_model(p, model_id="m", temperature=0.0)
+        assert len(self.llm._memory_cache) == 2
+        assert m.call_count == 4  # "a" was evicted by "c" and had to be recomputed
+
+    def test_oversize_responses_are_not_cached(self):
+        with patch.object(self.llm, "_CACHE_MAX_ENTRY_BYTES", 10), \
+             patch.object(self.llm.bedrock, "invoke_model", side_effect=lambda **kw: _bedrock_response("x" * 50)) as m:
+            self.llm.invoke_model("p", model_id="m", temperature=0.0)
+            self.llm.invoke_model("p", model_id="m", temperature=0.0)
+        assert m.call_count == 2
+
+    # --- usage accounting ---------------------------------------------------
+    def test_usage_recorded_from_body_and_headers(self):
+        responses = [
+            _bedrock_response("a", usage={"input_tokens": 1000, "output_tokens": 200}, stop_reason="end_turn",
+                              headers={"x-amzn-bedrock-invocation-latency": "1500"}),
+            _bedrock_response("b", headers={"x-amzn-bedrock-input-token-count": "50",
+                                            "x-amzn-bedrock-output-token-count": "5"}),
+        ]
+        with patch.object(self.llm.bedrock, "invoke_model", side_effect=responses):
+            self.llm.invoke_model("p1", model_id="us.anthropic.claude-sonnet-4-6", label="draft.voice")
+            self.llm.invoke_model("p2", model_id="us.anthropic.claude-haiku-4-5", label="draft.categories")
+        summary = self.llm.usage_summary()
+        assert summary["calls"] == 2
+        assert summary["input_tokens"] == 1050
+        voice = summary["by_label"]["draft.voice"]
+        assert voice["ms"] == 1500
+        assert voice["cost_usd"] == round((1000 * 3 + 200 * 15) / 1_000_000, 4)
+        assert summary["by_label"]["draft.categories"]["output_tokens"] == 5
+
+    def test_system_blocks_sent_with_cache_breakpoint(self):
+        system = [self.llm.text_block("shared prefix", cache=True)]
+        with patch.object(self.llm.bedrock, "invoke_model", return_value=_bedrock_response("ok")) as m:
+            self.llm.invoke_model([self.llm.text_block("task")], model_id="m", system=system)
+        body = json.loads(m.call_args.kwargs["body"])
+        assert body["system"] == [{"type": "text", "text": "shared prefix", "cache_control": {"type": "ephemeral"}}]
+        assert body["messages"][0]["content"] == [{"type": "text", "text": "task"}]
+        assert self.llm.cache_key("p", model_id="m", temperature=0, max_tokens=1, system=system) != \
+            self.llm.cache_key("p", model_id="m", temperature=0, max_tokens=1)
+
+    def test_prompt_cache_tokens_recorded_and_priced(self):
+        usage = {"input_tokens": 100, "output_tokens": 10, "cache_read_input_tokens": 5000,
+                 "cache_creation_input_tokens": 0}
+        with patch.object(self.llm.bedrock, "invoke_model", return_value=_bedrock_response("x", usage=usage)):
+            self.llm.invoke_model("p", model_id="us.anthropic.claude-sonnet-4-6", label="draft.insight")
+        agg = self.llm.usage_summary()["by_label"]["draft.insight"]
+        assert agg["cache_read_tokens"] == 5000
+        assert agg["cost_usd"] == round((100 * 3 + 5000 * 3 * 0.1 + 10 * 15) / 1_000_000, 4)
+
+    def test_cache_hits_counted_without_tokens(self):
+        with patch.object(self.llm.bedrock, "invoke_model",
+                          side_effect=lambda **kw: _bedrock_response("x", usage={"input_tokens": 10, "output_tokens": 1})):
+            self.llm.invoke_model("p", model_id="m", temperature=0.0, label="verify.citations")
+            self.llm.invoke_model("p", model_id="m", temperature=0.0, label="verify.citations")
+        agg = self.llm.usage_summary()["by_label"]["verify.citations"]
+        assert agg["calls"] == 2 and agg["cache_hits"] == 1
+        assert agg["input_tokens"] == 10
+
+    def test_flush_usage_metrics_emits_one_emf_document_per_label(self, capsys):
+        with patch.object(self.llm.bedrock, "invoke_model",
+                          side_effect=lambda **kw: _bedrock_response("x", usage={"input_tokens": 7, "output_tokens": 3})):
+            self.llm.invoke_model("p1", model_id="m", label="research.queries")
+            self.llm.invoke_model("p2", model_id="m", label="research.queries")
+            self.llm.invoke_model("p3", model_id="m", label="research.hooks")
+        self.llm.flush_usage_metrics("research")
+        docs = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+        assert len(docs) == 2
+        queries = next(d for d in docs if d["Label"] == "research.queries")
+        assert queries["InputTokens"] == [7, 7]
+        assert queries["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["Service", "Label"]]
+
+    def test_thinking_budget_returns_text_blocks_only(self):
+        class _Body:
+            def read(self):
+                return json.dumps({"content": [{"type": "thinking", "thinking": "hmm"},
+                                               {"type": "text", "text": " plan "}]})
+
+        with patch.object(self.llm.bedrock, "invoke_model", return_value={"body": _Body()}) as m:
+            out = self.llm.invoke_model("p", model_id="m", temperature=1, thinking_budget=1024)
+        assert out == "plan"
+        assert json.loads(m.call_args.kwargs["body"])["thinking"] == {"type": "enabled", "budget_tokens": 1024}
+
+    # --- adaptive concurrency -----------------------------------------------
+    def test_limiter_halves_on_throttle_and_ramps_on_success(self):
+        lim = self.llm._AimdLimiter("m", initial=4, maximum=8)
+        lim.acquire()
+        lim.release(throttled=True)
+        assert lim.limit == 2
+        for _ in range(4):
+            lim.acquire()
+            lim.release()
+        assert 3 <= lim.limit < 4  # +1/window per success: roughly +1 per window of calls
+        lim.limit = 1
+        lim.acquire()
+        lim.release(throttled=True)
+        assert lim.limit == 1  # never drops below one slot
+
+    def test_concurrent_calls_bounded_by_model_window(self):
+        import threading
+        import time as _time
+        state = {"active": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def slow_invoke(**kw):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            _time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+            return _bedrock_response("ok")
+
+        with patch.object(self.llm, "_LIMITER_INITIAL", 2), patch.object(self.llm, "_LIMITER_MAX", 2), \
+             patch.object(self.llm.bedrock, "invoke_model", side_effect=slow_invoke):
+            threads = [threading.Thread(target=self.llm.invoke_model, args=(f"p{i}",), kwargs={"model_id": "m"})
+                       for i in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert state["peak"] == 2
+        assert self.llm.usage_summary()["queue_ms"] > 0
+
+    def test_throttle_shrinks_window_for_that_model_only(self):
+        with patch.object(self.llm.bedrock, "invoke_model", side_effect=Exception("ThrottlingException: slow")), \
+             pytest.raises(Exception, match="ThrottlingException"):
+            self.llm.invoke_model("p", model_id="opus")
+        assert self.llm._limiter("opus").limit == self.llm._LIMITER_INITIAL / 2
+        assert self.llm._limiter("sonnet").limit == self.llm._LIMITER_INITIAL
+
+    # --- streaming ----------------------------------------------------------
+    def test_stream_model_yields_text_deltas(self):
+        with patch.object(self.llm.bedrock, "invoke_model_with_response_stream",
+                          return_value=_bedrock_stream("Hel", "lo", " world")) as m:
+            deltas = list(self.llm.stream_model("p", model_id="model-x", temperature=None))
+        assert deltas == ["Hel", "lo", " world"]
+        assert m.call_args.kwargs["modelId"] == "model-x"
+        assert "temperature" not in json.loads(m.call_args.kwargs["body"])
+
+    def test_invoke_model_stream_checkpoints_partial_output(self):
+        seen = []
+        deltas = ["a" * 40] * 5  # 200 chars ~= 50 tokens
+        with patch.object(self.llm.bedrock, "invoke_model_with_response_stream",
+                          return_value=_bedrock_stream(*deltas)):
+            out = self.llm.invoke_model_stream("p", model_id="m", on_checkpoint=seen.append, checkpoint_every=20)
+        assert out == "a" * 200
+        assert seen and all(out.startswith(s) for s in seen)
+        assert [len(s) for s in seen] == sorted(len(s) for s in seen)
+
+    def test_checkpoint_callback_failure_is_non_fatal(self):
+        def _boom(_text):
+            raise RuntimeError("S3 down")
+
+        with patch.object(self.llm.bedrock, "invoke_model_with_response_stream",
+                          return_value=_bedrock_stream("x" * 100)):
+            out = self.llm.invoke_model_stream("p", model_id="m", on_checkpoint=_boom, checkpoint_every=1)
+        assert out == "x" * 100
+
+    def test_streaming_fallback_on_in_stream_throttle(self):
+        calls = []
+
+        def side_effect(**kw):
+            calls.append(kw["modelId"])
+            if len(calls) == 1:
+                return _bedrock_stream("partial", error="throttlingException")
+            return _bedrock_stream("fallback ", "text")
+
+        with patch.object(self.llm.bedrock, "invoke_model_with_response_stream", side_effect=side_effect), \
+             patch.object(self.llm, "emit_opus_fallback_metric") as emit:
+            out = self.llm.invoke_with_opus_fallback(
+                "p", primary_model_id="opus", fallback_model_id="sonnet", label="draft",
+                on_checkpoint=lambda _t: None)
+        assert out == "fallback text"
+        assert calls == ["opus", "sonnet"]
+        emit.assert_not_called()
+
     def test_emit_metric_non_fatal_on_failure(self):
         bad_cw = MagicMock()
         bad_cw.put_metric_data.side_effect = Exception("CW down")
@@ -746,6 +1213,599 @@ class TestSharedLLM:
 # ---------------------------------------------------------------------------
 
 
+def _pdf_bytes(text_ops, title="Zero Trust Architecture"):
+    content = b"BT /F1 12 Tf 72 720 Td " + text_ops + b" ET"
+    return (f"%PDF-1.7\n1 0 obj << /Title ({title}) >> endobj\n".encode()
+            + b"2 0 obj << /Filter /FlateDecode >>\nstream\n" + zlib.compress(content) + b"\nendstream\nendobj\n"
+            + b"3 0 obj << /Subtype /Image /Filter /FlateDecode >>\nstream\n"
+            + zlib.compress(b"BT (image bytes) Tj ET") + b"\nendstream\nendobj\n")
+
+
+class _PoolTestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    client_ports = []
+    range_headers = []
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        self.client_ports.append(self.client_address[1])
+        if self.path == "/gzip":
+            self._reply(200, gzip.compress(b"<title>Zipped</title>" + b"x" * 5000), {"Content-Encoding": "gzip"})
+        elif self.path == "/big":
+            self._reply(200, b"y" * 200_000)
+        elif self.path == "/report.pdf":
+            self.range_headers.append(self.headers.get("Range"))
+            self._reply(200, _pdf_bytes(b"(72\\% of agencies) Tj T* [(adopted)-300(ZTA)] TJ"),
+                        {"Content-Type": "application/pdf"})
+        elif self.path == "/moved":
+            self._reply(301, headers={"Location": "/page"})
+        elif self.path == "/no-head" and self.command == "HEAD":
+            self._reply(405)
+        elif self.path in ("/page", "/no-head"):
+            self._reply(200, b"<html><title>Real Page</title></html>", {"Content-Type": "text/html"})
+        else:
+            self._reply(404, b"missing")
+
+
+class TestHttpPool:
+    def setup_method(self):
+        import http_pool
+        import urlcache
+        self.http = http_pool
+        http_pool.close_all()
+        urlcache.clear_memory()
+        _PoolTestHandler.client_ports = []
+        _PoolTestHandler.range_headers = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _PoolTestHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def teardown_method(self):
+        self.http.close_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fully_read_responses_reuse_one_connection(self):
+        for _ in range(3):
+            with self.http.get(f"{self.base}/page") as resp:
+                assert b"Real Page" in resp.read()
+        assert len(set(_PoolTestHandler.client_ports)) == 1
+
+    def test_gzip_body_decoded(self):
+        with self.http.get(f"{self.base}/gzip") as resp:
+            assert resp.read(21) == b"<title>Zipped</title>"
+            assert resp.read() == b"x" * 5000
+
+    def test_partially_read_connection_not_pooled(self):
+        with self.http.get(f"{self.base}/big") as resp:
+            assert resp.read(10) == b"y" * 10
+        with self.http.get(f"{self.base}/page") as resp:
+            resp.read()
+        assert len(set(_PoolTestHandler.client_ports)) == 2
+
+    def test_redirects_followed_and_errors_returned(self):
+        with self.http.get(f"{self.base}/moved") as resp:
+            assert resp.status == 200 and resp.url.endswith("/page")
+        resp = self.http.get(f"{self.base}/nope")
+        assert resp.status == 404
+        with pytest.raises(self.http.HTTPError) as err:
+            resp.raise_for_status()
+        assert err.value.status == 404
+
+    def test_research_verify_url_falls_back_to_get(self):
+        research = _load_module("research")
+        assert research.verify_url(f"{self.base}/no-head") == (True, 200, "Real Page")
+        assert research.verify_url(f"{self.base}/nope") == (False, 404, "")
+
+    def test_verify_extracts_pdf_text_from_range_request(self):
+        import pdftext
+        pdftext.clear_memory()
+        verify = _load_module("verify")
+        ok, status, title, excerpt = verify._fetch_page_meta(f"{self.base}/report.pdf")
+        assert (ok, status, title) == (True, 200, "Zero Trust Architecture")
+        assert excerpt == "72% of agencies adopted ZTA"
+        assert _PoolTestHandler.range_headers == [f"bytes=0-{pdftext.MAX_BYTES - 1}"]
+
+
+class TestUrlCache:
+    def setup_method(self):
+        import urlcache
+        self.cache = urlcache
+        urlcache.clear_memory()
+        self.research = _load_module("research")
+        self.verify = _load_module("verify")
+
+    def test_ttl_depends_on_outcome(self):
+        assert self.cache.ttl_for(200) > self.cache.ttl_for(404) > self.cache.ttl_for(401) > self.cache.ttl_for(503)
+        assert self.cache.ttl_for(0) == self.cache.ttl_for(503)
+
+    def test_verify_url_served_from_cache_after_first_check(self):
+        with patch.object(self.research, "_check_url",
+                          return_value=(True, 200, "Doc", "https://d.example/final", "<title>Doc</title>")) as live:
+            assert self.research.verify_url("https://d.example/a") == (True, 200, "Doc")
+            assert self.research.verify_url("https://d.example/a") == (True, 200, "Doc")
+        assert live.call_count == 1
+        entry = self.cache.lookup("https://d.example/a")
+        assert entry["final_url"] == "https://d.example/final" and len(entry["content_hash"]) == 64
+
+    def test_expired_transient_failure_is_rechecked(self):
+        self.cache.store("https://flaky.example/", status=503, ok=False)
+        with patch.object(self.cache.time, "time", return_value=time.time() + 3600):
+            assert self.cache.lookup("https://flaky.example/") is None
+
+    def test_403_marks_whole_domain_blocked(self):
+        with patch.object(self.research, "_check_url", return_value=(False, 403, "", "https://b.example/1", "")):
+            self.research.verify_url("https://b.example/1")
+        with patch.object(self.verify, "_fetch_page_meta_live") as live:
+            assert self.verify._fetch_page_meta("https://b.example/other") == (False, 403, "", "")
+        live.assert_not_called()
+
+    def test_verify_needs_excerpt_but_reuses_it_once_stored(self):
+        self.cache.store("https://d.example/p", status=200, ok=True, title="T")
+        live_result = (True, 200, "T", "page text", "https://d.example/p", "page text", "")
+        with patch.object(self.verify, "_fetch_page_meta_live", return_value=live_result) as live:
+            assert self.verify._fetch_page_meta("https://d.example/p") == (True, 200, "T", "page text")
+            assert self.verify._fetch_page_meta("https://d.example/p") == (True, 200, "T", "page text")
+        assert live.call_count == 1
+
+
+class TestHtmlText:
+    PAGE = (
+        b"<html><head><title>Lambda  Quotas</title>"
+        b"<meta name='description' content='Limits for AWS Lambda.'>"
+        b"<link rel='canonical' href='https://docs.example/lambda/quotas'>"
+        b"<script>var tracking = 'ignore me';</script><style>p{}</style></head>"
+        b"<body><nav>Home | Docs</nav><h1>Quotas</h1><p>Timeout is 900&nbsp;seconds.</p>"
+        b"<footer>Copyright</footer></body></html>"
+    )
+
+    def setup_method(self):
+        import htmltext
+        self.mod = htmltext
+
+    def test_whitespace_between_inline_tags_separates_words(self):
+        page = self.mod.extract_text("<p><b>Zero</b> <i>trust</i> <a href=x>architecture</a>\n<span>is</span> <em>good</em></p>")
+        assert page.text == "Zero trust architecture is good"
+
+    def test_skips_boilerplate_and_captures_head_metadata(self):
+        page = self.mod.extract_text(self.PAGE.decode())
+        assert page.title == "Lambda Quotas"
+        assert page.description == "Limits for AWS Lambda."
+        assert page.canonical == "https://docs.example/lambda/quotas"
+        assert page.text == "Quotas Timeout is 900 seconds."
+
+    def test_stops_reading_once_excerpt_is_full(self):
+        body = self.PAGE.replace(b"</body>", b"<p>" + b"word " * 200_000 + b"</p></body>")
+        source = io.BytesIO(body)
+        page = self.mod.extract_stream(source.read, max_chars=500)
+        assert len(page.text) == 500 and not page.complete
+        assert page.bytes_read < 64 * 1024
+
+    def test_head_only_mode_stops_at_body(self):
+        source = io.BytesIO(self.PAGE + b"<p>" + b"x" * 500_000 + b"</p>")
+        page = self.mod.extract_stream(source.read, max_chars=0)
+        assert page.title == "Lambda Quotas" and page.text == ""
+        assert page.bytes_read <= 16384
+
+
+class TestPdfText:
+    def setup_method(self):
+        import pdftext
+        self.mod = pdftext
+        pdftext.clear_memory()
+
+    def test_truncated_stream_still_yields_leading_text(self):
+        ops = b"(Lead sentence.) Tj T* " + b" ".join(b"(word%d) Tj T*" % i for i in range(3000))
+        data = _pdf_bytes(ops)
+        doc = self.mod.extract(data[:len(data) // 3], max_chars=200)
+        assert doc.text.startswith("Lead sentence. word0 word1") and len(doc.text) <= 200
+        assert "image bytes" not in self.mod.extract(data).text
+
+    def test_cached_by_content_hash(self):
+        data = _pdf_bytes(b"(cached) Tj")
+        with patch.object(self.mod, "extract", wraps=self.mod.extract) as parse:
+            assert self.mod.extract_cached(data).text == "cached"
+            assert self.mod.extract_cached(data).text == "cached"
+        assert parse.call_count == 1
+
+
+class TestSourcesIndex:
+    NOTES = ("## Supporting Evidence\n\n"
+             "Adoption hit 40% in [the NIST survey](https://www.nist.gov/report). Most teams lag. "
+             "Vendors disagree, per [a blog](https://blog.example/post).\n\n"
+             "### Quantitative Data Points (for chart generation)\n\n"
+             "- Data point: Agent adoption\n- Values: Adopted: 40%, Not yet: 60%\n- Source: NIST 2025\n"
+             "- Chart type: pie\n\n"
+             "### Fact-Check Summary\n\n"
+             "CLAIM: Adoption hit 40%\nSTATUS: SUPPORTED\nSOURCE: NIST Report\n")
+
+    def setup_method(self):
+        import sources
+        self.sources = sources
+        sources._loaded.clear()
+
+    def _stored(self, fake):
+        index = self.sources.build_index(
+            [{"url": "https://www.nist.gov/report", "title": "NIST Report", "content": "Adoption hit 40% ..."}],
+            self.NOTES)
+        with patch.object(self.sources, "_BUCKET", "bucket"), patch.object(self.sources, "_s3", fake):
+            return self.sources.save(self.sources.key_for("exec-1", self.NOTES), index)
+
+    def test_build_index_links_sources_claims_and_data_points(self):
+        index = self.sources.build_index(
+            [{"url": "https://www.nist.gov/report", "title": "NIST Report", "content": "Adoption hit 40% ..."}],
+            self.NOTES)
+        nist, blog = index["sources"]
+        assert (nist["id"], nist["tier"], len(nist["content_hash"])) == ("S1", "academic", 64)
+        assert nist["claims"] == [{"text": "Adoption hit 40% in the NIST survey."},
+                                  {"text": "Adoption hit 40%", "status": "SUPPORTED"}]
+        assert (blog["url"], blog["tier"], blog["excerpt"]) == ("https://blog.example/post", "standard", "")
+        assert index["data_points"] == [{"description": "Agent adoption", "values": [("Adopted", 40.0), ("Not yet", 60.0)],
+                                         "source": "NIST 2025", "chart_type": "pie"}]
+
+    def test_chart_falls_back_to_research_when_the_index_was_not_saved(self):
+        chart = _load_module("chart")
+        event = {"markdown": "Text.\n\n<!-- CHART: agent adoption -->", "slug": "s", "date": "2026-01-01",
+                 "sources_key": "", "research": self.NOTES}
+        with patch.object(chart.s3, "put_object"):
+            result = chart.handler(event, _LambdaContext())
+        assert "/postimages/charts/s-chart-1.svg" in result["markdown"] and "research" not in result
+
+    def test_chart_reads_data_points_from_the_index(self):
+        fake = _FakeS3()
+        key = self._stored(fake)
+        assert key == "sources/exec-1.json"
+        chart = _load_module("chart")
+        event = {"markdown": "Text.\n\n<!-- CHART: agent adoption -->", "slug": "s", "date": "2026-01-01",
+                 "sources_key": key}
+        with patch.object(self.sources, "_BUCKET", "bucket"), patch.object(self.sources, "_s3", fake), \
+             patch.object(chart.s3, "put_object"):
+            result = chart.handler(event, _LambdaContext())
+        assert "/postimages/charts/s-chart-1.svg" in result["markdown"] and "research" not in result
+
+    def test_draft_prompts_with_index_data_points_and_verify_uses_research_excerpt(self):
+        fake = _FakeS3()
+        with patch.object(self.sources, "_BUCKET", "bucket"), patch.object(self.sources, "_s3", fake):
+            index = self.sources.load(self._stored(fake))
+        assert self.sources.parse_data_points(index.data_points_block()) == index.data_points
+
+        draft = _load_module("draft")
+        invoke = MagicMock(return_value="Body\n<!-- CHART: Agent adoption -->")
+        with patch.object(draft, "_invoke_model", invoke):
+            draft._insert_chart_placeholders("Body", "notes without data", index)
+        assert "- Values: Adopted: 40, Not yet: 60" in invoke.call_args.args[0]
+        assert "notes without data" not in invoke.call_args.args[0]
+
+        verify = _load_module("verify")
+        report = {"url": "https://www.nist.gov/report", "reachable": True, "excerpt": "[Binary content — cannot extract]"}
+        assert verify._with_research_excerpt(report, index)["excerpt"] == "Adoption hit 40% ..."
+        assert verify._with_research_excerpt({**report, "reachable": False}, index)["excerpt"].startswith("[Binary")
+
+
+class TestClaimCheck:
+    BIG = "Long research notes. " * 600  # ~12.6 KB, above the 8 KB default threshold
+
+    def setup_method(self):
+        import claimcheck
+        self.cc = claimcheck
+        claimcheck._memory.clear()
+        self.fake = _FakeS3()
+
+    def _patched(self):
+        return patch.multiple(self.cc, _BUCKET="bucket", _s3=self.fake, _ENABLED=True)
+
+    def test_offload_replaces_large_strings_with_content_addressed_pointers(self):
+        with self._patched():
+            out = self.cc.offload({"research": self.BIG, "title": "Short", "again": self.BIG})
+            assert out["title"] == "Short"
+            assert self.cc.is_pointer(out["research"]) and out["research"] == out["again"]
+            assert out["research"]["claim_check"].startswith("claims/") and self.fake.puts == 1
+            self.cc._memory.clear()
+            assert self.cc.fetch(out["research"]) == self.BIG
+
+    def test_hydrate_fetches_only_fields_that_are_read(self):
+        with self._patched():
+            pointers = self.cc.offload({"research": self.BIG, "markdown": self.BIG.upper()})
+            self.cc._memory.clear()
+            get_object = MagicMock(wraps=self.fake.get_object)
+            with patch.object(self.fake, "get_object", get_object):
+                event = self.cc.hydrate({**pointers, "slug": "s"})
+                assert event.get("markdown") == self.BIG.upper() and event["markdown"] == self.BIG.upper()
+                assert get_object.call_count == 1
+                assert {**event}["research"] == pointers["research"]
+                assert get_object.call_count == 1
+
+    def test_chart_hydrates_markdown_and_never_fetches_unused_research(self):
+        chart = _load_module("chart")
+        with self._patched():
+            event = self.cc.offload({"markdown": "Intro.\n\n" + self.BIG, "research": self.BIG, "slug": "s",
+                                     "date": "2026-01-01", "sources_key": "sources/exec-1.json"})
+            self.cc._memory.clear()
+            get_object = MagicMock(wraps=self.fake.get_object)
+            with patch.object(self.fake, "get_object", get_object), \
+                 patch.object(chart.sources, "load", return_value=chart.sources.SourcesIndex({})):
+                result = chart.handler(event, _LambdaContext())
+            assert "research" not in result
+            assert [c.kwargs["Key"] for c in get_object.call_args_list] == [event["markdown"]["claim_check"]]
+            assert self.cc.is_pointer(result["markdown"]) and self.cc.fetch(result["markdown"]).startswith("Intro.")
+
+
+class TestResearchSourceVerification:
+    def setup_method(self):
+        self.mod = _load_module("research")
+
+    def test_order_and_top_three_fetches_stay_deterministic(self):
+        results = [{"url": f"https://s{i}.example/", "title": f"T{i}", "content": f"snippet {i}"} for i in range(6)]
+        results[1]["raw_content"] = "tavily body"
+
+        def verify(url, timeout=10):
+            time.sleep(0.05 if url.startswith("https://s0") else 0)  # finish out of order
+            return (url != "https://s2.example/"), 200, ""
+
+        fetched = []
+        with patch.object(self.mod, "verify_url", side_effect=verify), \
+             patch.object(self.mod, "fetch_full_article", side_effect=lambda u: fetched.append(u) or f"full {u}"):
+            block, count = self.mod.format_sources_for_prompt(results)
+        assert count == 5
+        assert [block.index(f"T{i}") for i in (0, 1, 3, 4, 5)] == sorted(block.index(f"T{i}") for i in (0, 1, 3, 4, 5))
+        # s2 failed verification, so the third full fetch moves on to s4 (s1 had raw_content)
+        assert "full https://s4.example/" in block and "Excerpt: snippet 5" in block
+        assert "https://s2.example/" not in block
+        assert "https://s5.example/" not in fetched
+
+    def test_sources_past_deadline_are_dropped(self):
+        results = [{"url": "https://fast.example/", "title": "Fast", "raw_content": "x"},
+                   {"url": "https://slow.example/", "title": "Slow", "raw_content": "y"}]
+
+        def verify(url, timeout=10):
+            if "slow" in url:
+                time.sleep(0.5)
+            return True, 200, ""
+
+        with patch.object(self.mod, "_SOURCE_VERIFY_DEADLINE_SECONDS", 0.1), \
+             patch.object(self.mod, "verify_url", side_effect=verify):
+            block, count = self.mod.format_sources_for_prompt(results)
+        assert count == 1 and "Fast" in block and "Slow" not in block
+
+
+class TestResearchGatherPipeline:
+    def setup_method(self):
+        self.mod = _load_module("research")
+
+    def _run(self, tavily, **overrides):
+        patches = {
+            "build_search_queries": lambda topic, content: ["q1", "q2"],
+            "build_perplexity_queries": lambda qs, topic, content: ["pq"],
+            "perplexity_search": lambda q: {"text": "px", "citations": ["https://cite.example/"]},
+            "verify_url": MagicMock(return_value=(True, 200, "")),
+            "fetch_full_article": lambda url: "full",
+            "_thinking_plan": lambda *a, **k: "PLAN",
+            "_extract_editorial_hooks": lambda *a: "HOOKS",
+            "_collect_tool_urls": lambda *a: "",
+            "tavily_search": tavily,
+        }
+        patches.update(overrides)
+        with patch.multiple(self.mod, **patches):
+            out = asyncio.run(self.mod._gather_research("topic", "", goal="", avoid="", analogies="",
+                                                        has_author_content=False, request_id="t"))
+        return out, patches["verify_url"]
+
+    def test_blocked_query_retried_and_each_url_verified_once(self):
+        calls = []
+
+        def tavily(query, max_results=8):
+            calls.append(query)
+            if query == "q1":
+                return [{"url": "https://medium.com/x", "title": "M"}]
+            return [{"url": "https://a.example/", "title": "A", "raw_content": "body"},
+                    {"url": "https://b.example/", "title": "B", "raw_content": "body"}]
+
+        out, verify = self._run(tavily)
+        assert any(q.startswith("q1 -site:medium.com") for q in calls)
+        assert out["plan"] == "PLAN" and out["editorial_hooks"] == "HOOKS"
+        assert out["verified_source_count"] == 3
+        verified = [c.args[0] for c in verify.call_args_list]
+        assert sorted(verified) == sorted(set(verified))  # no URL checked twice
+        assert "https://cite.example/" in out["sources_block"]
+
+    def test_deadline_abandons_slow_queries(self):
+        def tavily(query, max_results=8):
+            if query == "q2":
+                time.sleep(1)
+            return [{"url": f"https://{query}.example/", "title": query, "raw_content": "b"}]
+
+        with patch.object(self.mod, "_GATHER_DEADLINE_SECONDS", 0.3):
+            start = time.monotonic()
+            out, _ = self._run(tavily)
+        assert time.monotonic() - start < 0.9
+        assert [r["url"] for r in out["all_results"]] == ["https://q1.example/"]
+
+
+class TestResearchCache:
+    def setup_method(self):
+        self.mod = _load_module("research")
+        self.calls = []
+
+    def _gathered(self):
+        return {"all_results": [], "sources_block": "SOURCES", "verified_source_count": 2, "perplexity_raw": [],
+                "editorial_hooks": "HOOKS", "plan": "PLAN", "tool_urls_block": "", "deadline_hit": False}
+
+    def _run(self, fake, gathered=None, **event):
+        async def gather(*a, **k):
+            self.calls.append("gather")
+            return gathered or self._gathered()
+
+        def plan(*a, **k):
+            self.calls.append("plan")
+            return "NEW PLAN"
+
+        def synth(prompt, on_checkpoint=None):
+            self.calls.append("synthesis")
+            return "Suggested Title: T\nNOTES"
+
+        def factcheck(text, results, claims="5-8"):
+            self.calls.append("factcheck")
+            return "CHECKED"
+
+        with patch.object(self.mod, "s3", fake), patch.object(self.mod, "DRAFTS_BUCKET", "bucket"), \
+             patch.multiple(self.mod, _gather_research=gather, _invoke_synthesis_with_backoff=synth,
+                            _fact_check=factcheck, _extract_chart_data=lambda text: "", _thinking_plan=plan):
+            return self.mod.handler({"topic": "Zero Trust in AWS", "author_content": "bullets", **event}, None)
+
+    def test_fingerprint_ignores_case_punctuation_and_word_order(self):
+        fp = self.mod._topic_fingerprint
+        assert fp("Zero Trust in AWS", "bullets") == fp("aws: zero-trust", " bullets\n")
+        assert fp("Zero Trust in AWS", "bullets") != fp("Zero Trust in AWS", "other bullets")
+
+    def test_rerun_is_served_from_cache(self):
+        fake = _FakeS3()
+        first = self._run(fake)
+        second = self._run(fake)
+        assert self.calls == ["gather", "synthesis", "factcheck"]
+        assert second["research"] == first["research"] and second["verified_source_count"] == 2
+
+    def test_changed_option_resynthesizes_without_searching(self):
+        fake = _FakeS3()
+        self._run(fake)
+        self._run(fake, tone="more technical")
+        # Same notes back from the new synthesis -> the fact-check is still reusable.
+        assert self.calls == ["gather", "synthesis", "factcheck", "synthesis"]
+
+    def test_stale_sources_and_refresh_flag_run_live(self):
+        fake = _FakeS3()
+        self._run(fake)
+        key = next(iter(fake.store))
+        data = json.loads(fake.store[key])
+        data["components"]["gather"]["stored_at"] -= 2 * 24 * 3600
+        fake.store[key] = json.dumps(data).encode()
+        self._run(fake)
+        assert self.calls.count("gather") == 2 and self.calls.count("synthesis") == 1  # same prompt
+        self._run(fake, refresh_research=True)
+        assert self.calls.count("gather") == 3 and self.calls.count("synthesis") == 2
+
+    def test_changed_goal_replans_without_searching(self):
+        fake = _FakeS3()
+        self._run(fake)
+        self._run(fake, goal="a different takeaway")
+        self._run(fake, goal="a different takeaway")
+        assert self.calls.count("gather") == 1 and self.calls.count("plan") == 1
+
+    def test_degraded_gather_is_not_cached(self):
+        fake = _FakeS3()
+        self._run(fake, gathered={**self._gathered(), "deadline_hit": True})
+        self._run(fake, gathered={**self._gathered(), "verified_source_count": 0})
+        self._run(fake)
+        assert self.calls.count("gather") == 3
+
+
+class TestSectionedSynthesis:
+    NOTES = ("## Key Points\n\nAdoption grew 40% in [the survey](https://a.example/) of 2024 teams. " + "x" * 200 + "\n\n"
+             "## Quantitative Data Points\n\n- Data point: adoption\n- Values: A: 1, B: 2\n\n"
+             "## Suggested Title\n\nWhy Zero Trust Stalls\n")
+
+    def setup_method(self):
+        self.mod = _load_module("research")
+
+    def _stream(self, published=None):
+        checked, charted = [], []
+
+        def fact_check(text, results, claims="5-8"):
+            checked.append((text.split("\n", 1)[0], claims))
+            return "CLAIM: x"
+
+        def chart(text):
+            charted.append(text.split("\n", 1)[0])
+            return "### Quantitative Data Points (for chart generation)\n\n- Data point: adoption"
+
+        patcher = patch.multiple(self.mod, _fact_check=fact_check, _extract_chart_data=chart)
+        patcher.start()
+        on_stable = (lambda sections, status: published.append([t for t, _ in sections])) if published is not None else None
+        return self.mod._SectionStream([{"url": "https://a.example/"}], on_stable=on_stable), checked, charted, patcher
+
+    def test_split_sections_round_trips_and_titles(self):
+        sections = self.mod._split_sections("intro\n" + self.NOTES)
+        assert [t for t, _ in sections] == ["", "Key Points", "Quantitative Data Points", "Suggested Title"]
+        assert "".join(text for _, text in sections) == "intro\n" + self.NOTES
+
+    def test_sections_are_checked_as_they_stabilize(self):
+        published = []
+        stream, checked, charted, patcher = self._stream(published)
+        try:
+            cut = self.NOTES.index("## Suggested")
+            stream.feed(self.NOTES[:cut + 5])
+            self.mod.wait(list(stream.futures.values()))
+            # Both finished sections were published and their passes ran before the stream ended.
+            assert published == [["Key Points", "Quantitative Data Points"]]
+            assert ("## Key Points", "2-4") in checked and charted == ["## Quantitative Data Points"]
+            out = stream.finish(self.NOTES)
+        finally:
+            patcher.stop()
+        assert out.startswith(self.NOTES)
+        assert "### Fact-Check Summary\n\n#### Key Points\n\nCLAIM: x" in out
+        assert out.endswith("### Quantitative Data Points (for chart generation)\n\n- Data point: adoption")
+        assert checked == [("## Key Points", "2-4")]  # data block too short, title section has no claims
+
+    def test_restarted_stream_and_headingless_notes(self):
+        stream, checked, charted, patcher = self._stream()
+        try:
+            stream.feed(self.NOTES[:self.NOTES.index("## Suggested")])
+            out = stream.finish("Plain notes, 12 claims, no headings.")  # a fallback started over
+        finally:
+            patcher.stop()
+        assert stream.sections == [("", "Plain notes, 12 claims, no headings.")]
+        assert out == ("Plain notes, 12 claims, no headings.\n\n### Fact-Check Summary\n\nCLAIM: x\n\n"
+                       "### Quantitative Data Points (for chart generation)\n\n- Data point: adoption")
+        assert checked[-1] == ("Plain notes, 12 claims, no headings.", "5-8")
+
+    def test_suggested_title_under_a_heading(self):
+        assert self.mod._suggested_field(self.NOTES, "suggested title") == "Why Zero Trust Stalls"
+        assert self.mod._suggested_field("5. **Suggested Title:** \"Inline\"", "suggested title") == "Inline"
+
+
+class TestPlanHandoff:
+    def setup_method(self):
+        self.mod = _load_module("draft")
+
+    def test_plan_branch_waits_for_stable_research_then_draft_reuses_it(self):
+        fake = _FakeS3()
+        research = "## Key Points\n\n" + "r" * 900
+        fake.store["handoff/exec-1.json"] = json.dumps({
+            "status": "streaming", "topic": "T", "author_content": "", "goal": "", "avoid": "", "analogies": "",
+            "sections": [{"title": "Key Points", "text": research}]}).encode()
+        plan = MagicMock(return_value="PLAN")
+        with patch.object(self.mod, "s3", fake), patch.object(self.mod, "DRAFTS_BUCKET", "bucket"), \
+             patch.multiple(self.mod, _thinking_plan=plan, _load_voice_profile=lambda: ""):
+            assert self.mod.handler({"mode": "plan", "execution_id": "exec-1"}, None) == {"planned": True}
+            assert plan.call_args.kwargs["research"] == research
+            event = {"execution_id": "exec-1"}
+            assert self.mod._handoff_plan(event, research + "\n\n### Fact-Check Summary") == "PLAN"
+            assert self.mod._handoff_plan(event, "## Different notes") is None
+            assert self.mod._handoff_plan({"execution_id": "exec-2"}, research) is None
+
+    def test_plan_branch_gives_up_when_research_fails(self):
+        fake = _FakeS3()
+        fake.store["handoff/exec-1.json"] = json.dumps({"status": "failed", "sections": []}).encode()
+        plan = MagicMock(return_value="PLAN")
+        with patch.object(self.mod, "s3", fake), patch.object(self.mod, "DRAFTS_BUCKET", "bucket"), \
+             patch.object(self.mod, "_thinking_plan", plan):
+            assert self.mod.handler({"mode": "plan", "execution_id": "exec-1"}, None) == {"planned": False}
+        plan.assert_not_called()
+
+
 class _FakeS3Body:
     def __init__(self, payload):
         self._payload = payload
@@ -871,6 +1931,50 @@ class TestDraftCheckpoint:
             ckpt.done()
         assert "checkpoints/k.json" not in fake.store
 
+    def test_save_partial_persists_until_stage_completes(self):
+        fake = _FakeS3()
+        with patch.object(self.mod, "s3", fake):
+            ckpt = self.mod._DraftCheckpoint("bucket", "checkpoints/k.json")
+            ckpt.load()
+            ckpt.save_partial("opus_draft", "## Intro\nHalf a dra")
+            stored = json.loads(fake.store["checkpoints/k.json"])
+            assert stored["partial"] == {"stage": "opus_draft", "text": "## Intro\nHalf a dra"}
+            assert stored["completed"] == []
+
+            # A retry sees the partial output left behind by the interrupted stream.
+            c2 = self.mod._DraftCheckpoint("bucket", "checkpoints/k.json")
+            c2.load()
+            assert c2.partial["text"] == "## Intro\nHalf a dra"
+
+            ckpt.run("opus_draft", lambda: "FULL BODY")
+        assert "partial" not in json.loads(fake.store["checkpoints/k.json"])
+
+    def test_save_partial_records_prompt_and_section_boundary(self):
+        fake = _FakeS3()
+        text = "TL;DR " + "x" * 1600 + "\n\n## Two\n\nFinished.\n\n## Three\n\nHalf a sen"
+        with patch.object(self.mod, "s3", fake):
+            ckpt = self.mod._DraftCheckpoint("bucket", "checkpoints/k.json")
+            ckpt.save_partial("opus_draft", text, prompt="PROMPT")
+            stored = json.loads(fake.store["checkpoints/k.json"])["partial"]
+        assert stored["prompt"] == "PROMPT"
+        assert stored["resume"].endswith("Finished.") and "## Three" not in stored["resume"]
+
+    def test_continue_draft_joins_clean_continuation(self):
+        resume = "TL;DR intro.\n\n## One\n\nDone."
+        with patch.object(self.mod, "_invoke_draft_with_backoff",
+                          return_value=("## Two\n\nMore.", "opus")) as gen:
+            out = self.mod._continue_draft("PROMPT", resume)
+        assert out == "TL;DR intro.\n\n## One\n\nDone.\n\n## Two\n\nMore."
+        sent = gen.call_args.args[0]
+        assert sent.startswith("PROMPT") and "=== DRAFT SO FAR" in sent and resume in sent
+
+    def test_continue_draft_rejects_repeated_or_unanchored_seam(self):
+        resume = "TL;DR intro.\n\n## One\n\nDone."
+        for bad in ("## One\n\nDone again.", "continuing mid-sentence...", "TL;DR intro.\n\n## Two\n\nX"):
+            assert self.mod._join_continuation(resume, bad) is None
+        with patch.object(self.mod, "_invoke_draft_with_backoff", side_effect=RuntimeError("throttled")):
+            assert self.mod._continue_draft("PROMPT", resume) is None
+
     def test_load_corrupt_checkpoint_starts_fresh(self):
         fake = _FakeS3()
         fake.store["checkpoints/k.json"] = b"{not valid json"
@@ -912,6 +2016,31 @@ class TestDraftAnnotations:
         out = self.mod._apply_annotations(base, [("No such line", "<!-- ⚡ INSIGHT: x -->")])
         assert out == base
 
+    def test_apply_annotations_keeps_placeholder_whose_anchor_was_rewritten(self):
+        base = ("## Adoption\n\nTeams adopted agents fast. Most now run them in production.\n\n"
+                "Budgets followed.\n\n## Costs\n\nCosts fell.")
+        anchor = "Most teams have adopted agents quickly, and a majority of them now run agents in production today."
+        with patch.object(self.mod.logger, "warning") as warn:
+            out = self.mod._apply_annotations(base, [(anchor, "<!-- CHART: adoption -->")])
+        assert "Budgets followed.\n<!-- CHART: adoption -->\n\n## Costs" in out
+        assert "placeholder_anchor_lost" in warn.call_args.args[0]
+
+    def test_audits_share_identical_cached_system_prefix(self):
+        post = "## Heading\n\n" + "word " * 320
+        with patch.object(self.mod, "_voice_profile_cache", "VOICE RULES"), \
+             patch.object(self.mod, "_llm_invoke_model",
+                          side_effect=lambda *a, **kw: "[]" if kw["label"].endswith(".patch") else post) as m:
+            self.mod._audit_citations(post, "RESEARCH NOTES BODY")
+            self.mod._audit_voice_profile(post, "VOICE RULES", research="RESEARCH NOTES BODY")
+            self.mod._audit_insight(post, "RESEARCH NOTES BODY")
+            self.mod._audit_named_entities(post, "RESEARCH NOTES BODY")
+        systems = [c.kwargs["system"] for c in m.call_args_list]
+        assert len(systems) == 4 and all(s == systems[0] for s in systems)
+        prefix = systems[0][0]
+        assert prefix["cache_control"] == {"type": "ephemeral"}
+        assert "RESEARCH NOTES BODY" in prefix["text"] and "VOICE RULES" in prefix["text"]
+        assert all("RESEARCH NOTES BODY" not in c.args[0] for c in m.call_args_list)
+
     def test_parallel_merges_both_annotation_sets(self):
         base = "## Heading\n\nPara one.\n\nPara two."
         insight_out = "## Heading\n\nPara one.\n<!-- ⚡ INSIGHT: weak -->\n\nPara two."
@@ -943,6 +2072,142 @@ class TestDraftAnnotations:
         ins.assert_called_once()
         ent.assert_called_once()
 
+    def test_split_h2_sections_round_trips_and_skips_fences(self):
+        body = "TL;DR intro.\n\n## One\n\nText.\n\n```\n## not a heading\n```\n\n## Two\n\nMore."
+        parts = self.mod._split_h2_sections(body)
+        assert "".join(parts) == body
+        assert [p.split("\n", 1)[0] for p in parts] == ["TL;DR intro.", "## One", "## Two"]
+
+    def test_section_citation_audit_stitches_and_skips_linkless_sections(self):
+        body = ("Intro.\n\n## One\n\nSee [a](https://a.example/x). " + "filler " * 500
+                + "\n\n## Two\n\nNo links here. " + "filler " * 500
+                + "\n\n## Three\n\nSee [b](https://b.example/y).")
+        with patch.object(self.mod, "_audit_citations",
+                          side_effect=lambda s, r, section=None, focus="": s.strip() + "\nFIXED") as audit:
+            out = self.mod._audit_citations_by_section(body, "research")
+        assert audit.call_count == 2
+        assert [c.kwargs["section"][:2] for c in audit.call_args_list] == [(1, 4), (3, 4)]
+        assert out.count("FIXED") == 2 and "No links here." in out
+        assert [ln for ln in out.split("\n") if ln.startswith("## ")] == ["## One", "## Two", "## Three"]
+
+    def test_section_audit_dropping_heading_keeps_original_section(self):
+        body = "## One\n\n" + "alpha " * 600 + "\n\n## Two\n\n" + "beta " * 600
+        def _audit(index, section, total):
+            return "rewritten without heading" if index == 1 else section + "\nOK"
+        out = self.mod._sectioned_audit(body, "voice", _audit, lambda: "WHOLE")
+        assert out.startswith("## One") and "\nOK" in out
+        assert "## Two" in out and "rewritten without heading" not in out
+
+    def test_section_audit_short_post_uses_whole_document(self):
+        body = "## One\n\nShort.\n\n## Two\n\nShort."
+        audit = MagicMock()
+        assert self.mod._sectioned_audit(body, "voice", audit, lambda: "WHOLE") == "WHOLE"
+        audit.assert_not_called()
+
+    def test_research_for_section_prefers_cited_blocks(self):
+        cited = "- **Cited**\n  URL: https://a.example/x\n  Excerpt: unrelated words"
+        unrelated = "- **Other**\n  URL: https://z.example/\n  Excerpt: " + "zebra " * 3000
+        research = f"{unrelated}\n\n{cited}"
+        subset = self.mod._research_for_section(research, "Claim [a](https://a.example/x).")
+        assert cited in subset and "zebra" not in subset
+
+    def test_section_citation_audits_share_one_system_prefix(self):
+        research = "- **Other**\n  URL: https://z.example/\n  Excerpt: " + "zebra " * 3000 + \
+                   "\n\n- **Cited**\n  URL: https://a.example/x\n  Excerpt: unrelated words"
+        body = "## One\n\nSee [a](https://a.example/x). " + "filler " * 600 + \
+               "\n\n## Two\n\nSee [z](https://z.example/). " + "filler " * 600
+        with patch.object(self.mod, "_llm_invoke_model", return_value="[]\n<!-- CITATION_AUDIT: 1 checked, 0 fixed, 0 removed -->") as m, \
+             patch.object(self.mod, "_build_site_context", return_value="SITE"):
+            self.mod._audit_citations_by_section(body, research)
+        systems = [c.kwargs["system"] for c in m.call_args_list]
+        assert len(systems) == 2 and systems[0] == systems[1] and "zebra" in systems[0][0]["text"]
+        assert any("RESEARCH MOST RELEVANT" in c.args[0] and "zebra" not in c.args[0] for c in m.call_args_list)
+
+    def test_section_edit_script_prompt_does_not_ask_for_the_section_back(self):
+        body = "## One\n\nWe do not ship. " + "filler " * 600 + "\n\n## Two\n\nIt is fine. " + "filler " * 600
+        with patch.object(self.mod, "_llm_invoke_model", return_value="[]\n<!-- VOICE_AUDIT: 0 issues fixed -->") as m:
+            self.mod._audit_voice_by_section(body, "VOICE RULES")
+        prompts = [c.args[0] for c in m.call_args_list]
+        assert len(prompts) == 2 and all("SECTION SCOPE" in p for p in prompts)
+        assert not any("Do NOT output the draft" in p and "output ONLY this section" in p for p in prompts)
+
+    def test_edit_script_applies_unique_anchors(self):
+        body = "## H\n\nWe do not ship [x](https://a.example/).\n\nIt is fine."
+        reply = ('[{"find": "We do not ship", "replace": "We don\'t ship"}, '
+                 '{"find": "It is fine.", "replace": "It\'s fine."}]\n<!-- VOICE_AUDIT: 2 issues fixed -->')
+        with patch.object(self.mod, "_llm_invoke_model", return_value=reply) as m:
+            out = self.mod._audit_voice_profile(body, "VOICE RULES")
+        assert out == "## H\n\nWe don't ship [x](https://a.example/).\n\nIt's fine."
+        m.assert_called_once()
+        assert m.call_args.kwargs["max_tokens"] == self.mod._PATCH_MAX_TOKENS
+
+    def test_edit_script_ambiguous_anchor_is_rejected(self):
+        assert self.mod._apply_edit_script("It is. It is.", [("It is.", "It's.")]) is None
+        assert self.mod._apply_edit_script("abcdef", [("abcd", "x"), ("cdef", "y")]) is None
+        assert self.mod._parse_edit_script("not json") is None
+
+    def test_edit_script_failure_falls_back_to_full_rewrite(self):
+        body = "## H\n\nIt is fine. It is fine."
+        rewritten = "## H\n\nIt's fine. It's fine.\n<!-- VOICE_AUDIT: 2 issues fixed -->"
+        replies = iter(['[{"find": "It is fine.", "replace": "It\'s fine."}]', rewritten])
+        with patch.object(self.mod, "_llm_invoke_model", side_effect=lambda *a, **kw: next(replies)) as m:
+            out = self.mod._audit_voice_profile(body, "VOICE RULES")
+        assert out == "## H\n\nIt's fine. It's fine."
+        assert [c.kwargs["label"] for c in m.call_args_list] == ["draft.voice.patch", "draft.voice"]
+
+    def test_pass_graph_runs_independent_nodes_on_their_own_prose_version(self):
+        seen = {}
+
+        def _rewrite(name, old, new):
+            def fn(body):
+                seen[name] = body
+                return body.replace(old, new)
+            return fn
+
+        def _chart(body):
+            seen["charts"] = body
+            return body.replace("It is fast.", "It is fast.\n<!-- CHART: speed -->")
+
+        passes = [
+            self.mod._Pass("structure", _rewrite("structure", "Intro", "TL;DR"), writes=(self.mod._PROSE,)),
+            self.mod._Pass("charts", _chart, markers=("<!-- CHART:",)),
+            self.mod._Pass("voice", _rewrite("voice", "It is fast.", "It's fast."), writes=(self.mod._PROSE,)),
+            self.mod._Pass("meta", lambda body: len(body), writes=("meta",)),
+        ]
+        deps = self.mod._pass_dependencies(passes)
+        assert [q.name for q in deps["charts"]] == ["structure"]
+        assert [q.name for q in deps["voice"]] == ["structure"]
+        body, values = self.mod._run_passes(passes, "Intro\n\nIt is fast.")
+        assert seen["charts"] == seen["voice"] == "TL;DR\n\nIt is fast."
+        # The chart comment is re-anchored onto the line voice rewrote.
+        assert body == "TL;DR\n\nIt's fast.\n<!-- CHART: speed -->"
+        assert values == {"meta": len("TL;DR\n\nIt's fast.")}  # declared after voice: sees its prose
+
+    def test_pass_graph_gate_skips_node_and_keeps_prose(self):
+        passes = [self.mod._Pass("structure", lambda body: "REWRITTEN", writes=(self.mod._PROSE,),
+                                 gate=lambda: False)]
+        body, _ = self.mod._run_passes(passes, "ORIGINAL")
+        assert body == "ORIGINAL"
+
+    def test_pass_graph_replays_checkpointed_nodes(self):
+        fake = _FakeS3()
+        passes = [
+            self.mod._Pass("citations", lambda body: body + " [fixed]", writes=(self.mod._PROSE,)),
+            self.mod._Pass("annotations", lambda body: body + "\n<!-- ⚡ INSIGHT: thin -->", markers=("⚡ INSIGHT:",)),
+        ]
+
+        def _boom(body):
+            raise AssertionError("checkpointed node must not re-run")
+
+        with patch.object(self.mod, "s3", fake):
+            ckpt = self.mod._DraftCheckpoint("bucket", "checkpoints/k.json")
+            first, _ = self.mod._run_passes(passes, "Body.", ckpt=ckpt)
+            retry = self.mod._DraftCheckpoint("bucket", "checkpoints/k.json")
+            retry.load()
+            replay = [self.mod._Pass(p.name, _boom, writes=p.writes - {p.name}, markers=p.markers) for p in passes]
+            second, _ = self.mod._run_passes(replay, "Body.", ckpt=retry)
+        assert first == second == "Body. [fixed]\n<!-- ⚡ INSIGHT: thin -->"
+
 
 # ---------------------------------------------------------------------------
 # Deployability: every handler must import with ONLY its own directory on the
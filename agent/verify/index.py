@@ -2,39 +2,116 @@
 Verify Lambda — Post-draft URL verification, citation-to-content matching, and auto-repair.
 
 Flow:
-1. Extract all [text](url) links from the draft
-2. Fetch each URL in parallel, extract page title + text excerpt
-3. LLM (Haiku) checks claim↔content match: PASS / FAIL / WARN / UNREACHABLE
+1. Extract all [text](url) links from the draft; internal /blog/<slug>/ links are
+   resolved against the known-post-slugs list without a fetch
+2. Fetch each URL in parallel, extract page title + text excerpt; a reachable page
+   with no extractable text falls back to the excerpt Research captured for it
+   (the sources index, common/sources.py)
+3. Deterministic tier decides the clear cases (unreachable, direct quote found/missing,
+   cited figures found verbatim); only the ambiguous rest go to the LLM, which checks
+   claim↔content match: PASS / FAIL / WARN / UNREACHABLE
 4. Auto-repair: for each FAIL/WARN, Tavily searches for a better source and
    Haiku selects the best replacement URL. Swaps it silently in the markdown.
 5. Remaining unrepaired FAIL/WARN are annotated with HTML comments for human review.
    Publish Lambda strips those comments before committing to GitHub.
+
+Every phase respects the Lambda time budget: citations that cannot be fetched or
+judged in time come back UNVERIFIED rather than the whole stage timing out.
 """
 
+import hashlib
 import json
 import logging
 import os
 import re
-import urllib.error
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
 import boto3
+import htmltext
+import http_pool
+import pdftext
+import sources
+import urlcache
+from claimcheck import hydrate, offload
+from llm import flush_usage_metrics, invoke_model, reset_usage, usage_summary
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-bedrock = boto3.client("bedrock-runtime", region_name=os.environ.get("AWS_REGION", "us-east-1"))
 ssm = boto3.client("ssm", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+s3 = boto3.client("s3", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+DRAFTS_BUCKET = os.environ.get("DRAFTS_BUCKET", "")
 MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "us.anthropic.claude-sonnet-4-6")
 HAIKU_MODEL_ID = os.environ.get("HAIKU_MODEL_ID", "us.anthropic.claude-haiku-4-5-20251001-v1:0")
 TAVILY_API_KEY_PARAM = os.environ.get("TAVILY_API_KEY_PARAM", "/blog-agent/tavily-api-key")
+KNOWN_SLUGS_PARAM = os.environ.get("KNOWN_SLUGS_PARAM", "/blog-agent/known-post-slugs")
+SITE_BASE_URL = os.environ.get("SITE_BASE_URL", "https://khaledzaky.com")
 _tavily_key_cache = [None]
+_known_slugs_cache = [None]
+
+# Deterministic pre-filter (see _prefilter_verdict): internal post links and specific
+# figures in the claim context.
+_BLOG_URL_RE = re.compile(
+    rf"^https?://(?:www\.)?{re.escape(SITE_BASE_URL.split('://', 1)[-1].rstrip('/'))}/blog/([a-z0-9-]+)/?(?:[?#].*)?$",
+    re.IGNORECASE,
+)
+_FIGURE_RE = re.compile(r"(?<![\w.,])(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)(\s?%|\s?percent\b)?")
+_CLAIM_TERM_RE = re.compile(r"[a-z][a-z-]{3,}")
+_CLAIM_STOPWORDS = frozenset((
+    "about", "after", "also", "been", "from", "have", "into", "more", "most", "only", "over", "said", "says",
+    "since", "than", "that", "their", "them", "then", "there", "these", "they", "this", "those", "were", "what",
+    "when", "which", "while", "with", "within", "would", "your",
+))
 
-# Max bytes to read from each URL for content extraction
-_MAX_FETCH_BYTES = 32768
+# Max bytes to stream from each URL for content extraction — an upper bound only: the
+# extractor stops as soon as it has _EXCERPT_CHARS of visible body text.
+_MAX_FETCH_BYTES = 262144
+_EXCERPT_CHARS = 2000
 _FETCH_TIMEOUT = 12
 
+# Citation verdicts are judged in batches sized by estimated prompt tokens, so a post
+# with 40+ links never overruns one call's verdict budget. Batches run concurrently;
+# Bedrock concurrency itself is bounded by the shared limiter in llm.py.
+_CHARS_PER_TOKEN = 4
+_VERIFY_BATCH_INPUT_TOKENS = int(os.environ.get("VERIFY_BATCH_INPUT_TOKENS", "6000"))
+_VERIFY_BATCH_MAX_CITATIONS = int(os.environ.get("VERIFY_BATCH_MAX_CITATIONS", "12"))
+_VERIFY_BATCH_WORKERS = int(os.environ.get("VERIFY_BATCH_WORKERS", "4"))
+_VERDICT_TOKENS_PER_CITATION = 80
+
+# Lambda context captured at handler entry so the fetch, LLM and repair phases can check
+# the remaining budget, the way Draft's _budget_ok does. Fetches still running when the
+# fetch deadline (remaining time minus VERIFY_FETCH_RESERVE_SECONDS) passes are abandoned
+# and their citations marked UNVERIFIED; the LLM pass and repair are skipped when too
+# little time is left for them. Fetched page metadata is already persisted per URL by
+# urlcache (and decided verdicts by _VerifyState), so a Step Functions retry resumes
+# from there instead of starting over.
+_lambda_context = [None]
+_FETCH_RESERVE_SECONDS = int(os.environ.get("VERIFY_FETCH_RESERVE_SECONDS", "90"))
+_LLM_MIN_SECONDS = int(os.environ.get("VERIFY_LLM_MIN_SECONDS", "45"))
+_REPAIR_MIN_SECONDS = int(os.environ.get("VERIFY_REPAIR_MIN_SECONDS", "60"))
+
+
+def _remaining_seconds():
+    """Lambda's remaining wall-clock budget in seconds, or None if no context (local test)."""
+    ctx = _lambda_context[0]
+    if ctx is None:
+        return None
+    try:
+        return ctx.get_remaining_time_in_millis() // 1000
+    except Exception:
+        return None
+
+
+def _budget_ok(min_seconds):
+    """True if at least `min_seconds` of Lambda budget remain. Fails open (returns True)
+    if context unavailable — important for local testing."""
+    rem = _remaining_seconds()
+    return rem is None or rem >= min_seconds
+
+
+def _unverified(link, reason):
+    return _deterministic_verdict(link, "UNVERIFIED", reason)
+
 
 def _get_tavily_key():
     """Retrieve Tavily API key from SSM, cached after first call."""
@@ -56,22 +133,15 @@ def _tavily_search_for_claim(query):
     if not api_key:
         return []
     try:
-        payload = json.dumps({
+        payload = {
             "api_key": api_key,
             "query": query,
             "search_depth": "advanced",
             "max_results": 6,
             "exclude_domains": ["medium.com", "reddit.com", "quora.com", "linkedin.com"],
-        }).encode("utf-8")
-        req = urllib.request.Request(
-            "https://api.tavily.com/search",
-            data=payload,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            return data.get("results", [])
+        }
+        data = http_pool.post_json("https://api.tavily.com/search", payload, timeout=15)
+        return data.get("results", [])
     except Exception as e:
         logger.warning(json.dumps({"event": "repair_search_failed", "error": str(e)[:200]}))
         return []
@@ -101,20 +171,9 @@ Choose the candidate that BEST supports the specific claim.
 - Output ONLY the URL of the best match, nothing else.
 - If none clearly support the claim, output: NONE"""
 
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 256,
-        "temperature": 0.0,
-        "messages": [{"role": "user", "content": prompt}],
-    })
     try:
-        response = bedrock.invoke_model(
-            modelId=HAIKU_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        chosen = json.loads(response["body"].read())["content"][0]["text"].strip()
+        chosen = invoke_model(prompt, model_id=HAIKU_MODEL_ID, temperature=0.0, max_tokens=256,
+                              label="verify.repair").strip()
         if chosen == "NONE" or not chosen.startswith("http"):
             return None
         candidate_urls = [r.get("url", "") for r in search_results[:5]]
@@ -124,134 +183,569 @@ Choose the candidate that BEST supports the specific claim.
         return None
 
 
-def _repair_citations(verdicts, markdown, request_id):
+_CLUSTER_SIMILARITY = 0.35  # Jaccard over claim words; at or above this two issues share one search
+_CLAIM_WORD_RE = re.compile(r"[a-z0-9][a-z0-9%.-]{3,}")
+
+
+def _claim_words(v):
+    prose = re.sub(r"\(https?://[^)\s]+\)", " ", v.get("context", "") or v.get("link_text", ""))
+    return set(_CLAIM_WORD_RE.findall(prose.lower()))
+
+
+def _cluster_issues(issues):
+    """Group (index, verdict) issues that share a URL or make overlapping claims
+    (Jaccard similarity of claim words >= _CLUSTER_SIMILARITY). Greedy single-link:
+    an issue joins the first cluster holding a member it matches."""
+    clusters = []
+    for i, v in issues:
+        words = _claim_words(v)
+        for cluster in clusters:
+            if any(v["url"] == other["url"] or
+                   (words and len(words & ow) / len(words | ow) >= _CLUSTER_SIMILARITY)
+                   for _, other, ow in cluster):
+                cluster.append((i, v, words))
+                break
+        else:
+            clusters.append([(i, v, words)])
+    return [[(i, v) for i, v, _ in cluster] for cluster in clusters]
+
+
+def _url_spans(markdown, url, spans=None):
+    """(start, end) of ``url`` inside every ``[text](url)`` link. Uses the link spans
+    from _DraftIndex when given, else scans the markdown."""
+    if spans is None:
+        spans = [(m.start(), m.end()) for m in _LINK_RE.finditer(markdown) if m.group(2) == url]
+    found = []
+    for _start, end in spans:
+        url_start = end - 1 - len(url)  # "...](url)" — url ends just before the closing paren
+        if markdown[url_start:end - 1] == url:
+            found.append((url_start, end - 1))
+    return found
+
+
+def _apply_patches(markdown, patches):
+    """Apply non-overlapping (start, end, replacement) patches in one pass."""
+    out, pos = [], 0
+    for start, end, replacement in sorted(patches):
+        if start < pos:
+            continue
+        out.append(markdown[pos:start])
+        out.append(replacement)
+        pos = end
+    out.append(markdown[pos:])
+    return "".join(out)
+
+
+def _repair_citations(verdicts, markdown, request_id, spans_by_url=None):
     """For each FAIL/WARN verdict, search Tavily for a better source and swap the URL.
     Repaired citations are marked with verdict=REPAIRED. Unrepaired keep FAIL/WARN
-    for human annotation. Returns (updated_markdown, updated_verdicts)."""
+    for human annotation. Returns (updated_markdown, updated_verdicts).
+
+    Issues are clustered by URL and claim similarity first: each cluster runs one
+    Tavily search and every member picks its replacement from that shared candidate
+    pool. Replacements are collected as offset patches (every span of the URL, from
+    ``spans_by_url`` or a scan) and applied in a single pass."""
     issues = [(i, v) for i, v in enumerate(verdicts) if v["verdict"] in ("FAIL", "WARN")]
     if not issues:
         return markdown, verdicts
 
-    logger.info(json.dumps({"event": "repair_start", "count": len(issues), "request_id": request_id}))
+    clusters = _cluster_issues(issues)
+    logger.info(json.dumps({"event": "repair_start", "count": len(issues), "clusters": len(clusters),
+                            "request_id": request_id}))
     updated_verdicts = list(verdicts)
-    updated_markdown = markdown
+    spans_by_url = spans_by_url or {}
 
-    def _repair_one(idx_verdict):
-        i, v = idx_verdict
-        query = v.get("context", v["link_text"])[:200]
+    def _repair_cluster(cluster):
+        query = cluster[0][1].get("context", cluster[0][1]["link_text"])[:200]
         results = _tavily_search_for_claim(query)
-        replacement = _find_replacement_url(v.get("context", ""), v["url"], results)
-        return i, v, replacement
+        return [(i, v, _find_replacement_url(v.get("context", ""), v["url"], results)) for i, v in cluster]
 
-    with ThreadPoolExecutor(max_workers=min(len(issues), 4)) as executor:
-        futures = [executor.submit(_repair_one, iv) for iv in issues]
+    patches = []
+    patched_urls = set()
+    with ThreadPoolExecutor(max_workers=min(len(clusters), 4)) as executor:
+        futures = [executor.submit(_repair_cluster, cluster) for cluster in clusters]
         for future in as_completed(futures):
             try:
-                i, v, replacement_url = future.result()
-                if replacement_url and replacement_url != v["url"]:
-                    old_link = f']({v["url"]})'
-                    new_link = f']({replacement_url})'
-                    if old_link in updated_markdown:
-                        updated_markdown = updated_markdown.replace(old_link, new_link, 1)
-                        updated_verdicts[i] = {**v, "verdict": "REPAIRED", "replacement_url": replacement_url}
-                        logger.info(json.dumps({
-                            "event": "citation_repaired",
-                            "original_url": v["url"][:80],
-                            "replacement_url": replacement_url[:80],
-                            "request_id": request_id,
-                        }))
-                else:
-                    logger.info(json.dumps({"event": "repair_no_replacement", "url": v["url"][:80], "request_id": request_id}))
+                for i, v, replacement_url in future.result():
+                    if not replacement_url or replacement_url == v["url"]:
+                        logger.info(json.dumps({"event": "repair_no_replacement", "url": v["url"][:80], "request_id": request_id}))
+                        continue
+                    if v["url"] in patched_urls:
+                        continue
+                    url_spans = _url_spans(markdown, v["url"], spans_by_url.get(v["url"]))
+                    if not url_spans:
+                        continue
+                    patched_urls.add(v["url"])
+                    patches.extend((start, end, replacement_url) for start, end in url_spans)
+                    updated_verdicts[i] = {**v, "verdict": "REPAIRED", "replacement_url": replacement_url}
+                    logger.info(json.dumps({
+                        "event": "citation_repaired",
+                        "original_url": v["url"][:80],
+                        "replacement_url": replacement_url[:80],
+                        "request_id": request_id,
+                    }))
             except Exception as e:
                 logger.warning(json.dumps({"event": "repair_error", "error": str(e)[:200], "request_id": request_id}))
 
+    updated_markdown = _apply_patches(markdown, patches)
     repaired = sum(1 for v in updated_verdicts if v.get("verdict") == "REPAIRED")
-    logger.info(json.dumps({"event": "repair_complete", "repaired": repaired, "remaining_issues": len(issues) - repaired, "request_id": request_id}))
+    logger.info(json.dumps({"event": "repair_complete", "repaired": repaired, "remaining_issues": len(issues) - repaired,
+                            "searches": len(clusters), "request_id": request_id}))
     return updated_markdown, updated_verdicts
 
 
+_LINK_RE = re.compile(r'\[([^\]]+)\]\((https?://[^)\s]+)\)')
+_FRONTMATTER_RE = re.compile(r"\A---\s*\n.*?\n---\s*\n", re.DOTALL)
+_ANNOTATION_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_BLOCK_START_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)]|>)\s+")
+# Sentence end: terminal punctuation (plus closing quotes/brackets/emphasis) followed by
+# whitespace and something that can start a sentence.
+_SENTENCE_END_RE = re.compile(r"[.!?][\"”’')\]*_]*\s+(?=[\"“‘(\[*_]*[A-Z0-9])")
+_ABBREVIATIONS = ("e.g.", "i.e.", "vs.", "etc.", "cf.", "approx.", "Fig.", "No.", "Dr.", "Mr.", "Ms.", "U.S.")
+_MAX_SENTENCE_CHARS = 240  # a "sentence" longer than this (lists, run-ons) is windowed around the link
+_MAX_CONTEXT_CHARS = 500
+
+
+class _DraftIndex:
+    """One-pass index over a draft: frontmatter offset, paragraphs (with the heading
+    they sit under), sentences, and every citation link with its character span.
+
+    Fenced code blocks and the frontmatter are skipped; list items, blockquote lines
+    and headings each form their own block. Sentence boundaries are found with link
+    markup masked out, so periods inside URLs or link text never split a sentence.
+    """
+
+    def __init__(self, markdown):
+        self.markdown = markdown
+        fm = _FRONTMATTER_RE.match(markdown)
+        self.body_offset = fm.end() if fm else 0
+        self.paragraphs = []   # (start, end, heading)
+        self.sentences = []    # (start, end, paragraph index)
+        self.links = []        # {link_text, url, start, end, sentence, paragraph, heading}
+        self._scan()
+
+    def _scan(self):
+        heading = ""
+        in_fence = False
+        block_start = None
+        pos = self.body_offset
+        for line in self.markdown[self.body_offset:].splitlines(keepends=True):
+            line_start, pos = pos, pos + len(line)
+            stripped = line.strip()
+            if stripped.startswith(("```", "~~~")):
+                self._close_block(block_start, line_start, heading)
+                block_start = None
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                continue
+            heading_match = _HEADING_RE.match(stripped)
+            if not stripped or heading_match or _BLOCK_START_RE.match(line):
+                self._close_block(block_start, line_start, heading)
+                block_start = None
+                if heading_match:
+                    heading = heading_match.group(2)
+                    # A heading is a block of its own, so links in it are checked
+                    # with the heading text as their claim.
+                    text_start = line_start + line.index(heading) if heading else line_start
+                    self._close_block(text_start, text_start + len(heading), heading)
+                    continue
+                if not stripped:
+                    continue
+            if block_start is None:
+                block_start = line_start
+        self._close_block(block_start, len(self.markdown), heading)
+
+    def _close_block(self, start, end, heading):
+        if start is None or start >= end:
+            return
+        p = len(self.paragraphs)
+        self.paragraphs.append((start, end, heading))
+        text = self.markdown[start:end]
+        masked = _LINK_RE.sub(lambda m: "x" * len(m.group(0)), text)
+        masked = _ANNOTATION_RE.sub(lambda m: " " * len(m.group(0)), masked)
+        first_sentence = len(self.sentences)
+        s_start = 0
+        for m in _SENTENCE_END_RE.finditer(masked):
+            if masked[:m.start() + 1].endswith(_ABBREVIATIONS):
+                continue
+            self.sentences.append((start + s_start, start + m.end(), p))
+            s_start = m.end()
+        if s_start < len(text):
+            self.sentences.append((start + s_start, end, p))
+        for m in _LINK_RE.finditer(text):
+            abs_start = start + m.start()
+            s = next(i for i in range(first_sentence, len(self.sentences))
+                     if self.sentences[i][0] <= abs_start < self.sentences[i][1])
+            self.links.append({"link_text": m.group(1), "url": m.group(2), "start": abs_start,
+                               "end": start + m.end(), "sentence": s, "paragraph": p, "heading": heading})
+
+    def sentence_text(self, s):
+        start, end, _ = self.sentences[s]
+        text = _BLOCK_START_RE.sub("", _ANNOTATION_RE.sub(" ", self.markdown[start:end]), count=1)
+        return re.sub(r"\s+", " ", text).strip()
+
+    def context_for(self, link):
+        """The link's full enclosing sentence plus one neighbour from the same paragraph
+        (the previous sentence, which usually sets up the claim, else the next one)."""
+        s = link["sentence"]
+        sentence = self.sentence_text(s)
+        if len(sentence) > _MAX_SENTENCE_CHARS:
+            s_start = self.sentences[s][0]
+            window = self.markdown[max(s_start, link["start"] - 100):min(self.sentences[s][1], link["end"] + 100)]
+            return re.sub(r"\s+", " ", _ANNOTATION_RE.sub(" ", window)).strip()
+        for n in (s - 1, s + 1):
+            if 0 <= n < len(self.sentences) and self.sentences[n][2] == link["paragraph"]:
+                neighbour = self.sentence_text(n)
+                if len(sentence) + len(neighbour) + 1 <= _MAX_CONTEXT_CHARS:
+                    return f"{neighbour} {sentence}" if n < s else f"{sentence} {neighbour}"
+                break
+        return sentence
+
+    def claim_for(self, link):
+        """The part of the link's own sentence that belongs to it: from the previous
+        link in the sentence (or the sentence start) to the next one (or the end). The
+        deterministic pre-filter matches quotes and figures here only, so a quote
+        attached to a neighbouring citation never fails this one."""
+        s_start, s_end, _ = self.sentences[link["sentence"]]
+        start, end = s_start, s_end
+        for other in self.links:
+            if other["sentence"] != link["sentence"] or other is link:
+                continue
+            if other["end"] <= link["start"]:
+                start = max(start, other["end"])
+            elif other["start"] >= link["end"]:
+                end = min(end, other["start"])
+        return re.sub(r"\s+", " ", _ANNOTATION_RE.sub(" ", self.markdown[start:end])).strip()
+
+    def citations(self):
+        """One entry per URL, in first-appearance order. A URL cited more than once
+        gets the distinct sentences of every occurrence as its context (and the
+        distinct claims of every occurrence as its claim), and all of its
+        (start, end) spans."""
+        by_url = {}
+        for link in self.links:
+            entry = by_url.get(link["url"])
+            context = self.context_for(link)
+            claim = self.claim_for(link)
+            if entry is None:
+                by_url[link["url"]] = {
+                    "link_text": link["link_text"],
+                    "url": link["url"],
+                    "context": context,
+                    "claim": claim,
+                    "heading": link["heading"],
+                    "spans": [(link["start"], link["end"])],
+                }
+                continue
+            entry["spans"].append((link["start"], link["end"]))
+            if context not in entry["context"] and len(entry["context"]) + len(context) + 3 <= _MAX_CONTEXT_CHARS * 2:
+                entry["context"] += f" … {context}"
+            if claim not in entry["claim"]:
+                entry["claim"] += f" … {claim}"
+        return list(by_url.values())
+
+
 def _extract_links(markdown):
-    """Extract all inline markdown links [text](url) from the draft.
-    Returns list of (link_text, url, surrounding_sentence)."""
-    links = []
-    # Match [text](url) and capture a window of surrounding text
-    for m in re.finditer(r'\[([^\]]+)\]\((https?://[^)\s]+)\)', markdown):
-        link_text = m.group(1)
-        url = m.group(2)
-        # Get ~200 chars of surrounding context
-        start = max(0, m.start() - 100)
-        end = min(len(markdown), m.end() + 100)
-        context = markdown[start:end].replace("\n", " ").strip()
-        links.append({"link_text": link_text, "url": url, "context": context})
-    return links
+    """Extract the draft's inline markdown links [text](url), one per URL, each with
+    its claim context (enclosing sentence + a neighbour, for the LLM judge), its own
+    claim (for the deterministic pre-filter), heading and spans."""
+    return _DraftIndex(markdown).citations()
+
+
+def _known_post_slugs():
+    """Published post slugs from SSM (kept current by Publish), cached per container.
+    An empty set (SSM unavailable) disables internal-link resolution — those links
+    are then fetched and judged like any other."""
+    if _known_slugs_cache[0] is not None:
+        return _known_slugs_cache[0]
+    try:
+        resp = ssm.get_parameter(Name=KNOWN_SLUGS_PARAM)
+        _known_slugs_cache[0] = {s.strip() for s in resp["Parameter"]["Value"].split(",") if s.strip()}
+    except Exception as e:
+        logger.warning(json.dumps({"event": "known_slugs_unavailable", "error": str(e)[:100]}))
+        _known_slugs_cache[0] = set()
+    return _known_slugs_cache[0]
+
+
+def _internal_slug(url):
+    """The post slug for a SITE_BASE_URL/blog/<slug>/ link, else None."""
+    m = _BLOG_URL_RE.match(url)
+    return m.group(1) if m else None
+
+
+def _deterministic_verdict(link, verdict, reason):
+    return {
+        "url": link["url"],
+        "link_text": link["link_text"],
+        "context": link.get("context", ""),
+        "verdict": verdict,
+        "reason": reason,
+        "method": "deterministic",
+    }
+
+
+def _resolve_internal_link(link, known_slugs, own_slug=""):
+    """PASS/FAIL an internal blog link against the published slug list, or None
+    when the link is external (or the slug list is unavailable)."""
+    slug = _internal_slug(link["url"])
+    if slug is None or not known_slugs:
+        return None
+    if slug in known_slugs or slug == own_slug:
+        return _deterministic_verdict(link, "PASS", "Internal link to a published post")
+    return _deterministic_verdict(link, "FAIL", f"Internal link to unknown post slug: {slug[:60]}")
+
+
+def _context_quotes(context):
+    quotes = re.findall(r'“([^”]+)”|"([^"]+)"', context)
+    return [q for q in (a or b for a, b in quotes) if len(q.strip()) >= 10]
+
+
+def _context_figures(context):
+    """Specific figures in the claim (72%, 1,200, 4.5, $30 …) as (number, is_percent).
+    Bare years are left out — they match too many pages to count as evidence."""
+    figures = []
+    prose = re.sub(r"\(?https?://[^)\s]+\)?", " ", context)  # link targets carry ids and dates, not claims
+    for number, percent in _FIGURE_RE.findall(prose):
+        if not percent and re.fullmatch(r"(19|20)\d\d", number):
+            continue
+        if not percent and len(number) < 2:
+            continue
+        figures.append((number, bool(percent)))
+    return figures
+
+
+def _claim_terms(lr):
+    """Key words of the claim: link text plus claim prose, stopwords dropped."""
+    prose = re.sub(r"\(?https?://[^)\s]+\)?", " ", f"{lr.get('link_text', '')} {_own_claim(lr)}")
+    return {w for w in _CLAIM_TERM_RE.findall(prose.lower()) if w not in _CLAIM_STOPWORDS}
+
+
+def _figure_in(number, is_percent, text):
+    # A neighbouring "-" or "/" means a date or id fragment (2025-01-30), not the figure.
+    pattern = rf"(?<![\d.,/-]){re.escape(number)}(?![\d]|[.,]\d|[/-]\d)"
+    if is_percent:
+        pattern += r"\s?(?:%|percent)"
+    return re.search(pattern, text) is not None
+
+
+def _own_claim(lr):
+    """The text the pre-filter judges: the link's own claim, not the wider context the
+    LLM sees (neighbouring sentences can carry other citations' quotes and figures)."""
+    return lr.get("claim") or lr.get("context", "")
+
+
+def _prefilter_verdict(lr):
+    """Deterministic tier ahead of the LLM. Returns a verdict dict for clear-cut
+    citations, or None when the citation is ambiguous and needs the LLM:
+
+      * unreachable page                        -> UNREACHABLE
+      * a direct quote (10+ chars) not in page  -> FAIL
+      * every direct quote found in page        -> PASS
+      * every specific figure found in page,
+        with at least half the claim's key terms -> PASS
+
+    Quotes, figures and terms come from the link's own claim (_own_claim).
+    """
+    if not lr.get("reachable"):
+        status = lr.get("status_code") or 0
+        return _deterministic_verdict(lr, "UNREACHABLE", f"HTTP {status}" if status else "Fetch failed")
+    excerpt = lr.get("excerpt", "")
+    if not excerpt or excerpt.startswith("[Binary content"):
+        return None
+    context = _own_claim(lr)
+    quotes = _context_quotes(context)
+    if quotes:
+        lowered = excerpt.lower()
+        for quote in quotes:
+            if quote.lower() not in lowered:
+                logger.info(json.dumps({"event": "direct_quote_mismatch", "url": lr["url"][:120], "quote": quote[:80]}))
+                return _deterministic_verdict(lr, "FAIL", f"Direct quote not found in source: \"{quote[:60]}\"")
+        return _deterministic_verdict(lr, "PASS", "Direct quote found verbatim in source")
+    figures = _context_figures(context)
+    if figures and all(_figure_in(number, pct, excerpt) for number, pct in figures):
+        terms = _claim_terms(lr)
+        found = {t for t in terms if t in excerpt.lower()}
+        if not terms or len(found) * 2 < len(terms):
+            return None
+        shown = ", ".join(number + ("%" if pct else "") for number, pct in figures[:3])
+        return _deterministic_verdict(lr, "PASS", f"Cited figures found verbatim in source: {shown}")
+    return None
+
+
+def _with_research_excerpt(report, index):
+    """A reachable page whose text could not be extracted (scripted pages, binary
+    content) is judged on the excerpt Research captured for the same URL, when the
+    sources index has one."""
+    excerpt = report.get("excerpt", "")
+    if not report.get("reachable") or (excerpt and not excerpt.startswith("[Binary content")):
+        return report
+    entry = index.by_url(report["url"]) if index is not None else None
+    if not entry or not entry.get("excerpt"):
+        return report
+    return {**report, "excerpt": entry["excerpt"], "excerpt_source": "research"}
 
 
 def _fetch_page_meta(url):
     """Fetch a URL and extract title + first ~2000 chars of visible text.
-    Returns (ok, status_code, title, excerpt)."""
+    Returns (ok, status_code, title, excerpt).
+
+    Consults the shared urlcache first: a fresh entry with an excerpt (or any fresh
+    failure, including a known-403 domain) skips the network entirely."""
+    cached = urlcache.lookup(url, need_excerpt=True)
+    if cached is not None:
+        return cached["ok"], cached["status"], cached.get("title", ""), cached.get("excerpt") or ""
+    ok, status, title, excerpt, final_url, raw, canonical = _fetch_page_meta_live(url)
+    urlcache.store(url, status=status, ok=ok, final_url=final_url, title=title, body=raw,
+                   excerpt=excerpt if ok else None, canonical=canonical)
+    return ok, status, title, excerpt
+
+
+def _fetch_page_meta_live(url):
+    """Network half of _fetch_page_meta.
+    Returns (ok, status, title, excerpt, final_url, raw, canonical)."""
     try:
-        req = urllib.request.Request(
-            url,
-            method="GET",
-            headers={
-                "User-Agent": "BlogAgent/1.0 (citation-verifier)",
-                "Accept": "text/html,application/xhtml+xml,*/*",
-            },
-        )
-        with urllib.request.urlopen(req, timeout=_FETCH_TIMEOUT) as resp:
+        headers = {
+            "User-Agent": "BlogAgent/1.0 (citation-verifier)",
+            "Accept": "text/html,application/xhtml+xml,*/*",
+        }
+        if pdftext.is_pdf("", url):
+            headers.update(pdftext.RANGE_HEADER)
+        with http_pool.get(url, headers=headers, timeout=_FETCH_TIMEOUT) as resp:
             status = resp.getcode()
             if status >= 400:
-                return False, status, "", ""
+                logger.warning(json.dumps({"event": "verify_fetch_failed", "url": url[:80], "method": "GET",
+                                           "status": status}))
+                return False, status, "", "", resp.url, "", ""
 
             content_type = resp.headers.get("Content-Type", "")
-            # Skip binary content (PDFs, images, etc.)
-            if "pdf" in content_type or "image" in content_type:
-                # For PDFs, just confirm they resolve
-                return True, status, f"[PDF document at {url}]", "[Binary content — cannot extract text]"
-
-            raw = resp.read(_MAX_FETCH_BYTES).decode("utf-8", errors="ignore")
-
-            # Extract title
-            title = ""
-            title_match = re.search(r"<title[^>]*>([^<]+)</title>", raw, re.IGNORECASE)
-            if title_match:
-                title = title_match.group(1).strip()
-
-            # Extract visible text (strip HTML tags, collapse whitespace)
-            text = re.sub(r"<script[^>]*>.*?</script>", " ", raw, flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r"<style[^>]*>.*?</style>", " ", text, flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r"<[^>]+>", " ", text)
-            text = re.sub(r"\s+", " ", text).strip()
-            excerpt = text[:2000]
-
-            return True, status, title, excerpt
-
-    except urllib.error.HTTPError as e:
-        logger.warning(json.dumps({"event": "verify_fetch_failed", "url": url[:80], "method": "GET", "status": e.code}))
-        return False, e.code, "", ""
+            if pdftext.is_pdf(content_type, url):
+                # Text of the first pages only (range-bounded prefix), parsed once per content hash
+                data = resp.read(pdftext.MAX_BYTES)
+                doc = pdftext.extract_cached(data, max_chars=_EXCERPT_CHARS)
+                title = doc.title or f"[PDF document at {url}]"
+                excerpt = doc.text or "[Binary content — cannot extract text]"
+                return True, status, title, excerpt, resp.url, data, ""
+            if "image" in content_type:
+                return True, status, f"[Image at {url}]", "[Binary content — cannot extract text]", resp.url, "", ""
+
+            # One streaming pass: title, meta description, canonical and visible body text
+            # (script/style/nav/footer skipped), stopping once the excerpt is full.
+            page = htmltext.extract_response(resp, max_chars=_EXCERPT_CHARS, max_bytes=_MAX_FETCH_BYTES)
+            excerpt = page.text
+            if page.description and page.description not in excerpt:
+                excerpt = f"{page.description} {excerpt}".strip()[:_EXCERPT_CHARS]
+
+            return True, status, page.title, excerpt, resp.url, page.text, page.canonical
+
     except Exception as e:
         logger.warning(json.dumps({"event": "verify_fetch_failed", "url": url[:80], "error": str(e)[:200]}))
-        return False, 0, "", ""
+        return False, 0, "", "", url, "", ""
 
 
-def _verify_citations_with_llm(link_reports):
-    """Use LLM to verify whether each citation's claim matches the fetched page content.
-    Returns list of {url, status, verdict, issue} dicts."""
-    if not link_reports:
-        return []
+_INCREMENTAL_ENABLED = os.environ.get("VERIFY_INCREMENTAL", "1") != "0"
+
+
+def _citation_key(link):
+    """(url, normalized claim context) identity of one citation. Context is lowercased,
+    whitespace-collapsed and stripped of this Lambda's own annotation comments, so a
+    paragraph the revision left untouched hashes the same as last round."""
+    context = _ANNOTATION_RE.sub(" ", link.get("context", ""))
+    context = re.sub(r"\s+", " ", context).strip().lower()
+    return hashlib.sha256(f"{link['url']}\n{context}".encode()).hexdigest()[:32]
+
+
+class _VerifyState:
+    """Per-execution verdict store for revision loops.
 
-    report_block = ""
-    for i, lr in enumerate(link_reports, 1):
-        report_block += f"""
---- CITATION {i} ---
+    Every verdict this run decides (deterministically or by the LLM, before repair)
+    is persisted under ``verify-state/{execution_id}.json`` keyed by
+    ``_citation_key``. When Verify runs again in the same execution (after a HITL
+    revise), citations whose URL and surrounding text are unchanged reuse their
+    verdict — no fetch, no LLM — and only new or edited citations are judged.
+    UNREACHABLE and UNVERIFIED verdicts are never reused; a transient outage or a
+    timed-out run deserves a retry.
+
+    Best-effort like the Draft checkpoints: any S3 failure just means a full
+    re-verification, never a failed run.
+    """
+
+    def __init__(self, bucket, execution_id):
+        self.bucket = bucket
+        self.key = f"verify-state/{execution_id}.json" if execution_id else ""
+        self.enabled = bool(bucket and self.key and _INCREMENTAL_ENABLED)
+        self.citations = {}
+
+    def load(self):
+        if not self.enabled:
+            return
+        try:
+            obj = s3.get_object(Bucket=self.bucket, Key=self.key)
+            self.citations = json.loads(obj["Body"].read()).get("citations", {})
+        except Exception as e:
+            if "NoSuchKey" not in str(e) and "NoSuchKey" not in type(e).__name__:
+                logger.warning(json.dumps({"event": "verify_state_load_failed", "error": str(e)[:200]}))
+
+    def lookup(self, link):
+        stored = self.citations.get(_citation_key(link)) if self.enabled else None
+        if not stored or stored.get("verdict") in ("UNREACHABLE", "UNVERIFIED"):
+            return None
+        return {
+            "url": link["url"],
+            "link_text": link["link_text"],
+            "context": link.get("context", ""),
+            "verdict": stored["verdict"],
+            "reason": stored.get("reason", ""),
+            "method": "reused",
+        }
+
+    def save(self, links, verdicts_by_idx):
+        if not self.enabled:
+            return
+        for i, v in verdicts_by_idx.items():
+            if v.get("method") != "reused":
+                self.citations[_citation_key(links[i])] = {"verdict": v["verdict"], "reason": v.get("reason", "")}
+        try:
+            s3.put_object(Bucket=self.bucket, Key=self.key, Body=json.dumps({"citations": self.citations}).encode("utf-8"),
+                          ContentType="application/json")
+        except Exception as e:
+            logger.warning(json.dumps({"event": "verify_state_save_failed", "error": str(e)[:200]}))
+
+
+def _citation_report(number, lr):
+    return f"""
+--- CITATION {number} ---
 Link text: {lr['link_text']}
 URL: {lr['url']}
+Section: {lr.get('heading') or 'N/A'}
 Claim context: {lr['context']}
 Page title: {lr.get('title', 'N/A')}
 Page excerpt: {lr.get('excerpt', 'N/A')[:1000]}
 HTTP status: {lr.get('status_code', 'N/A')}
 """
 
+
+def _citation_batches(link_reports, indices):
+    """Split ``indices`` into batches whose rendered reports stay under the token budget."""
+    batches, current, tokens = [], [], 0
+    for i in indices:
+        cost = len(_citation_report(i + 1, link_reports[i])) // _CHARS_PER_TOKEN
+        if current and (tokens + cost > _VERIFY_BATCH_INPUT_TOKENS or len(current) >= _VERIFY_BATCH_MAX_CITATIONS):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(i)
+        tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _verify_citation_batch(link_reports, indices):
+    """Judge one batch. Returns {index into link_reports: verdict dict} for every
+    citation the model answered; unanswered ones are simply absent."""
+    report_block = "".join(_citation_report(n, link_reports[i]) for n, i in enumerate(indices, 1))
+
     prompt = f"""You are a citation verification assistant. For each citation below, determine whether
 the linked page actually supports the claim made in the blog post.
 
@@ -271,44 +765,72 @@ Be strict. If the claim says "Article 61 requires deployer monitoring" but the p
 
 Output ONLY the verdict lines, nothing else."""
 
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 1024,
-        "temperature": 0.0,
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-    })
-
+    max_tokens = min(4096, 256 + _VERDICT_TOKENS_PER_CITATION * len(indices))
     try:
-        response = bedrock.invoke_model(
-            modelId=MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        result = json.loads(response["body"].read())
-        verdict_text = result["content"][0]["text"].strip()
-
-        verdicts = []
-        for line in verdict_text.split("\n"):
-            line = line.strip()
-            match = re.match(r"CITATION\s*(\d+):\s*(PASS|FAIL|WARN|UNREACHABLE)\s*\|\s*(.+)", line)
-            if match:
-                idx = int(match.group(1)) - 1
-                if 0 <= idx < len(link_reports):
-                    verdicts.append({
-                        "url": link_reports[idx]["url"],
-                        "link_text": link_reports[idx]["link_text"],
-                        "context": link_reports[idx].get("context", ""),
-                        "verdict": match.group(2),
-                        "reason": match.group(3).strip(),
-                    })
-        return verdicts
-
+        verdict_text = invoke_model(prompt, model_id=MODEL_ID, temperature=0.0, max_tokens=max_tokens,
+                                    label="verify.citations").strip()
     except Exception as e:
-        logger.warning(json.dumps({"event": "verify_llm_failed", "error": str(e)[:200]}))
-        return []
+        logger.warning(json.dumps({"event": "verify_llm_failed", "batch_size": len(indices), "error": str(e)[:200]}))
+        return {}
+
+    verdicts = {}
+    for line in verdict_text.split("\n"):
+        line = line.strip()
+        match = re.match(r"CITATION\s*(\d+):\s*(PASS|FAIL|WARN|UNREACHABLE)\s*\|\s*(.+)", line)
+        if match:
+            n = int(match.group(1)) - 1
+            if 0 <= n < len(indices) and indices[n] not in verdicts:
+                lr = link_reports[indices[n]]
+                verdicts[indices[n]] = {
+                    "url": lr["url"],
+                    "link_text": lr["link_text"],
+                    "context": lr.get("context", ""),
+                    "verdict": match.group(2),
+                    "reason": match.group(3).strip(),
+                    "method": "llm",
+                }
+    return verdicts
+
+
+def _run_citation_batches(link_reports, batches):
+    merged = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(len(batches), _VERIFY_BATCH_WORKERS))) as executor:
+        for result in executor.map(lambda batch: _verify_citation_batch(link_reports, batch), batches):
+            merged.update(result)
+    return merged
+
+
+def _llm_verdicts(link_reports, indices):
+    """LLM-judge the citations at ``indices``. Returns {index: verdict dict}.
+
+    Citations are judged in token-sized batches run concurrently and merged by index.
+    Any citation left without a verdict (truncated output, skipped line, failed call)
+    is re-queued once, on its own."""
+    indices = list(indices)
+    if not indices:
+        return {}
+
+    batches = _citation_batches(link_reports, indices)
+    verdicts = _run_citation_batches(link_reports, batches)
+
+    missing = [i for i in indices if i not in verdicts]
+    if missing:
+        logger.info(json.dumps({"event": "verify_verdicts_requeued", "count": len(missing)}))
+        verdicts.update(_run_citation_batches(link_reports, [[i] for i in missing]))
+        still_missing = len(indices) - len(verdicts)
+        if still_missing:
+            logger.warning(json.dumps({"event": "verify_verdicts_missing", "count": still_missing}))
+
+    logger.info(json.dumps({"event": "verify_llm_batches", "batches": len(batches), "citations": len(indices),
+                            "requeued": len(missing)}))
+    return verdicts
+
+
+def _verify_citations_with_llm(link_reports):
+    """Use LLM to verify whether each citation's claim matches the fetched page content.
+    Returns list of {url, status, verdict, issue} dicts, in citation order."""
+    verdicts = _llm_verdicts(link_reports, range(len(link_reports)))
+    return [verdicts[i] for i in sorted(verdicts)]
 
 
 def handler(event, context):
@@ -321,7 +843,8 @@ def handler(event, context):
         "description": "...",
         "markdown": "complete markdown with frontmatter",
         "date": "YYYY-MM-DD",
-        "research": "research notes from Research Lambda"
+        "sources_key": "the Research sources index (common/sources.py)",
+        "execution_id": "..."   # $$.Execution.Name — keys the per-execution verdict store
     }
 
     Output: same fields as input, plus:
@@ -332,15 +855,21 @@ def handler(event, context):
             "warnings": N,
             "failures": N,
             "unreachable": N,
+            "unverified": N,     # not judged within the Lambda time budget
+            "repaired": N,
             "details": [...]
-        }
+        },
+        "llm_usage": {...}   # llm.usage_summary() for this invocation
     }
     """
+    event = hydrate(event)
     title = event.get("title", "")
     markdown = event.get("markdown", "")
 
     request_id = getattr(context, 'aws_request_id', 'local')
+    _lambda_context[0] = context
     logger.info(json.dumps({"event": "verify_start", "title": title[:100], "request_id": request_id}))
+    reset_usage()
 
     if not markdown:
         raise ValueError("No markdown provided for verification")
@@ -350,7 +879,7 @@ def handler(event, context):
     logger.info(json.dumps({"event": "verify_links_extracted", "count": len(links), "request_id": request_id}))
 
     if not links:
-        return {
+        return offload({
             **event,
             "verification": {
                 "total_links": 0,
@@ -358,60 +887,102 @@ def handler(event, context):
                 "warnings": 0,
                 "failures": 0,
                 "unreachable": 0,
+                "unverified": 0,
+                "repaired": 0,
                 "details": [],
             },
-        }
+            "llm_usage": usage_summary(),
+        })
 
-    # Fetch each URL in parallel and build link reports
+    # Citations unchanged since an earlier Verify pass of this execution (revision
+    # loops) reuse that verdict; internal blog links resolve against the published
+    # slug list. Neither needs a fetch.
+    state = _VerifyState(DRAFTS_BUCKET, (event.get("execution_id") or "").replace("/", "_")[:80])
+    state.load()
     link_reports = [None] * len(links)
-    with ThreadPoolExecutor(max_workers=min(len(links), 8)) as executor:
-        future_to_idx = {
-            executor.submit(_fetch_page_meta, link["url"]): i
-            for i, link in enumerate(links)
-        }
-        for future in as_completed(future_to_idx):
-            i = future_to_idx[future]
-            try:
-                ok, status_code, page_title, excerpt = future.result()
-            except Exception as e:
-                logger.warning("URL fetch raised in thread: %s", e)
-                ok, status_code, page_title, excerpt = False, 0, "", ""
-            link_reports[i] = {
-                **links[i],
-                "reachable": ok,
-                "status_code": status_code,
-                "title": page_title,
-                "excerpt": excerpt,
-            }
-
-    reachable_count = sum(1 for lr in link_reports if lr["reachable"])
-    logger.info(json.dumps({"event": "verify_fetch_complete", "reachable": reachable_count, "total": len(link_reports), "request_id": request_id}))
-
-    # LLM verification pass
-    verdicts = _verify_citations_with_llm(link_reports)
-
-    # Deterministic post-pass: verify direct quotes against source content.
-    # If the claim context contains a quoted string ("...") that doesn't appear
-    # in the fetched page excerpt, downgrade to FAIL regardless of LLM verdict.
-    for v in verdicts:
-        if v["verdict"] in ("PASS", "WARN"):
-            context = v.get("context", "")
-            quotes = re.findall(r'“([^”]+)”|"([^"]+)"', context)
-            flat_quotes = [q[0] or q[1] for q in quotes if (q[0] or q[1]).strip()]
-            if flat_quotes:
-                lr = next((r for r in link_reports if r["url"] == v["url"]), None)
-                excerpt = (lr.get("excerpt", "") if lr else "").lower()
-                if excerpt:
-                    for quote in flat_quotes:
-                        if len(quote) >= 10 and quote.lower() not in excerpt:
-                            logger.info(json.dumps({
-                                "event": "direct_quote_mismatch",
-                                "url": v["url"][:120],
-                                "quote": quote[:80],
-                            }))
-                            v["verdict"] = "FAIL"
-                            v["reason"] = f"Direct quote not found in source: \"{quote[:60]}\""
-                            break
+    verdicts_by_idx = {}
+    known_slugs = _known_post_slugs() if any(_internal_slug(link["url"]) for link in links) else set()
+    for i, link in enumerate(links):
+        resolved = state.lookup(link) or _resolve_internal_link(link, known_slugs, event.get("slug", ""))
+        if resolved:
+            verdicts_by_idx[i] = resolved
+            link_reports[i] = {**link, "reachable": resolved["verdict"] != "UNREACHABLE", "status_code": 0,
+                               "title": "", "excerpt": ""}
+    to_fetch = [i for i in range(len(links)) if i not in verdicts_by_idx]
+    index = sources.load(event.get("sources_key", "")) if to_fetch else None
+    reused = sum(1 for v in verdicts_by_idx.values() if v["method"] == "reused")
+    if reused:
+        logger.info(json.dumps({"event": "verify_incremental", "reused": reused, "total": len(links),
+                                "request_id": request_id}))
+
+    # Fetch each remaining URL in parallel and build link reports, abandoning whatever is
+    # still in flight at the fetch deadline
+    remaining = _remaining_seconds()
+    fetch_deadline = None if remaining is None else max(0, remaining - _FETCH_RESERVE_SECONDS)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(len(to_fetch), 8)))
+    future_to_idx = {
+        executor.submit(_fetch_page_meta, links[i]["url"]): i
+        for i in to_fetch
+    }
+    done, not_done = wait(future_to_idx, timeout=fetch_deadline)
+    executor.shutdown(wait=False, cancel_futures=True)
+    for future in done:
+        i = future_to_idx[future]
+        try:
+            ok, status_code, page_title, excerpt = future.result()
+        except Exception as e:
+            logger.warning("URL fetch raised in thread: %s", e)
+            ok, status_code, page_title, excerpt = False, 0, "", ""
+        link_reports[i] = _with_research_excerpt({
+            **links[i],
+            "reachable": ok,
+            "status_code": status_code,
+            "title": page_title,
+            "excerpt": excerpt,
+        }, index)
+    for future in not_done:
+        i = future_to_idx[future]
+        link_reports[i] = {**links[i], "reachable": False, "status_code": 0, "title": "", "excerpt": ""}
+        verdicts_by_idx[i] = _unverified(links[i], "Not verified: fetch still running at the Verify time budget")
+    if not_done:
+        logger.warning(json.dumps({"event": "verify_fetch_timeout", "timed_out": len(not_done),
+                                   "remaining_s": _remaining_seconds(), "request_id": request_id}))
+
+    fetched = [i for i in to_fetch if i not in verdicts_by_idx]
+    reachable_count = sum(1 for i in fetched if link_reports[i]["reachable"])
+    research_excerpts = sum(1 for i in fetched if link_reports[i].get("excerpt_source") == "research")
+    logger.info(json.dumps({"event": "verify_fetch_complete", "reachable": reachable_count, "total": len(to_fetch),
+                            "research_excerpts": research_excerpts, "request_id": request_id}))
+
+    # Deterministic tier: unreachable pages, direct-quote matches/mismatches and exact
+    # figure matches are decided here; only ambiguous citations reach the LLM.
+    ambiguous = []
+    for i in fetched:
+        decided = _prefilter_verdict(link_reports[i])
+        if decided:
+            verdicts_by_idx[i] = decided
+        else:
+            ambiguous.append(i)
+    logger.info(json.dumps({
+        "event": "verify_prefilter",
+        "internal": len(links) - len(to_fetch) - reused,
+        "decided": len(fetched) - len(ambiguous),
+        "to_llm": len(ambiguous),
+        "request_id": request_id,
+    }))
+
+    # LLM verification pass (persist what is already decided first, so a retry after a
+    # timeout here only re-judges the ambiguous citations)
+    if ambiguous and _budget_ok(_LLM_MIN_SECONDS):
+        state.save(links, verdicts_by_idx)
+        verdicts_by_idx.update(_llm_verdicts(link_reports, ambiguous))
+    elif ambiguous:
+        logger.warning(json.dumps({"event": "verify_llm_skipped_budget", "citations": len(ambiguous),
+                                   "remaining_s": _remaining_seconds(), "request_id": request_id}))
+        for i in ambiguous:
+            verdicts_by_idx[i] = _unverified(links[i], "Not verified: too little Verify time budget left for the LLM check")
+    state.save(links, verdicts_by_idx)
+    verdicts = [verdicts_by_idx[i] for i in sorted(verdicts_by_idx)]
 
     # Build summary
     passed = sum(1 for v in verdicts if v["verdict"] == "PASS")
@@ -429,14 +1000,21 @@ def handler(event, context):
         "request_id": request_id,
     }))
 
-    # Auto-repair: attempt to find better sources for FAIL/WARN citations
-    markdown, verdicts = _repair_citations(verdicts, markdown, request_id)
+    # Auto-repair: attempt to find better sources for FAIL/WARN citations (skipped when
+    # the remaining budget cannot cover the searches)
+    if _budget_ok(_REPAIR_MIN_SECONDS):
+        markdown, verdicts = _repair_citations(verdicts, markdown, request_id,
+                                               spans_by_url={link["url"]: link["spans"] for link in links})
+    else:
+        logger.warning(json.dumps({"event": "verify_repair_skipped_budget", "remaining_s": _remaining_seconds(),
+                                   "request_id": request_id}))
 
     # Recompute summary after repairs
     passed = sum(1 for v in verdicts if v["verdict"] == "PASS")
     warnings = sum(1 for v in verdicts if v["verdict"] == "WARN")
     failures = sum(1 for v in verdicts if v["verdict"] == "FAIL")
     unreachable = sum(1 for v in verdicts if v["verdict"] == "UNREACHABLE")
+    unverified = sum(1 for v in verdicts if v["verdict"] == "UNVERIFIED")
     repaired = sum(1 for v in verdicts if v["verdict"] == "REPAIRED")
 
     # Annotate remaining unrepaired FAILs for human review (WARNs are logged only — not noisy enough to block)
@@ -457,7 +1035,8 @@ def handler(event, context):
                 "reason": v["reason"][:200],
             }))
 
-    return {
+    flush_usage_metrics("verify")
+    return offload({
         "title": event.get("title", ""),
         "slug": event.get("slug", ""),
         "categories": event.get("categories", []),
@@ -470,7 +1049,9 @@ def handler(event, context):
             "warnings": warnings,
             "failures": failures,
             "unreachable": unreachable,
+            "unverified": unverified,
             "repaired": repaired,
             "details": verdicts,
         },
-    }
+        "llm_usage": usage_summary(),
+    })